@@ -0,0 +1,559 @@
+# fake_github.py - Local stand-in for the GitHub REST API used by the benchmarks
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+REPOSITORY_DEFAULTS = {
+    "description": None,
+    "homepage": None,
+    "private": True,
+    "has_issues": True,
+    "has_projects": True,
+    "has_wiki": True,
+    "allow_squash_merge": True,
+    "allow_merge_commit": True,
+    "allow_rebase_merge": True,
+    "delete_branch_on_merge": False,
+    "archived": False,
+}
+
+# Labels GitHub adds to every new repository
+DEFAULT_LABELS = (
+    ("bug", "d73a4a", "Something isn't working"),
+    ("documentation", "0075ca", "Improvements or additions to documentation"),
+    ("duplicate", "cfd3d7", "This issue or pull request already exists"),
+    ("enhancement", "a2eeef", "New feature or request"),
+    ("good first issue", "7057ff", "Good for newcomers"),
+    ("help wanted", "008672", "Extra attention is needed"),
+    ("invalid", "e4e669", "This doesn't seem right"),
+    ("question", "d876e3", "Further information is requested"),
+    ("wontfix", "ffffff", "This will not be worked on"),
+)
+
+MAX_PAGE_SIZE = 100
+
+# Settings GitHub leaves out of repository listings, only returned for one repository
+LISTING_OMITS = ("allow_squash_merge", "allow_merge_commit", "allow_rebase_merge", "delete_branch_on_merge")
+
+# Built-in repository roles, lowest first, and the role_name GitHub lists them with
+PERMISSIONS = ("pull", "triage", "push", "maintain", "admin")
+ROLE_NAMES = {"pull": "read", "push": "write"}
+
+class RequestLog:
+    """
+    Every request served: method, route template, status and seconds spent.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self._lock = threading.Lock()
+
+    def add(self, method, route, status, seconds):
+        with self._lock:
+            self.entries.append((method, route, status, seconds))
+
+    def clear(self):
+        with self._lock:
+            self.entries = []
+
+    def routes(self):
+        return [f"{method} {route}" for method, route, _, _ in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+class FakeGitHub:
+    """
+    Serves the REST endpoints ghrm uses for one organization from memory.
+
+    `latency` seconds are added to every response. Rate-limit headers count
+    down from `rate_limit` per hour like the primary limit, separately for
+    every Authorization header; once exhausted, requests are rejected with
+    403 until the reset. GETs carry an ETag and answer If-None-Match with 304,
+    which does not use the budget.
+
+    With `app_id` set it also stands in for a GitHub App installed on the
+    organization: installation tokens are minted for JWTs issued by that app
+    and expire after `token_ttl` seconds.
+    """
+
+    def __init__(self, org="bench-org", latency=0.0, rate_limit=1_000_000, host="127.0.0.1", port=0, app_id=None):
+        self.org = org
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.app_id = app_id
+        self.installation_id = 1
+        self.token_ttl = 3600
+        # Installation tokens minted so far
+        self.tokens_issued = []
+        # Requests served per Authorization header
+        self.authorizations = Counter()
+        # {method: [status, ...]} answered instead of handling the next requests
+        self.faults = {}
+        self.log = RequestLog()
+        self.repos = {}
+        # {repo name (lower): {label name (lower): label}}
+        self.labels = {}
+        # {team slug (lower): {repo name (lower): permission}}
+        self.teams = {}
+        self._lock = threading.Lock()
+        self._request = threading.local()
+        self._next_id = 1
+        self._reset_budget()
+        self._httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-github", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _reset_budget(self):
+        # {Authorization header: requests left}
+        self.budgets = {}
+        self.reset_at = int(time.time()) + 3600
+
+    def remaining_for(self, authorization):
+        return self.budgets.get(authorization, self.rate_limit)
+
+    @property
+    def remaining(self):
+        # Budget of the credential making the current request
+        return self.remaining_for(getattr(self._request, "authorization", None))
+
+    def reset(self):
+        """
+        Empties the organization, the request log and the rate-limit budget.
+        """
+        with self._lock:
+            self.repos = {}
+            self.labels = {}
+            self.teams = {}
+            self.tokens_issued = []
+            self.authorizations.clear()
+            self.faults = {}
+            self._reset_budget()
+        self.log.clear()
+
+    def add_repo(self, name, labels=DEFAULT_LABELS, **settings):
+        """
+        Adds a repository with `labels`, given as (name, color, description) tuples.
+        """
+        with self._lock:
+            repo = self._add_repo(name, settings)
+            for label_name, color, description in labels:
+                self._add_label(name, {"name": label_name, "color": color, "description": description})
+            return repo
+
+    def add_team(self, slug, repos=None):
+        """
+        Adds a team with access to `repos`, given as {repo name: permission}.
+        """
+        with self._lock:
+            self.teams[slug.lower()] = {name.lower(): permission for name, permission in (repos or {}).items()}
+
+    def inject_faults(self, method, *statuses):
+        """
+        Answers the next requests with `method` with `statuses`, one each, without handling them.
+        """
+        with self._lock:
+            self.faults.setdefault(method, []).extend(statuses)
+
+    def _add_repo(self, name, settings):
+        repo = {**REPOSITORY_DEFAULTS, **settings, "id": self._next_id, "name": name}
+        self._next_id += 1
+        self.repos[name.lower()] = repo
+        self.labels[name.lower()] = {}
+        return repo
+
+    def _add_label(self, repo_name, fields):
+        label = {"id": self._next_id, "name": fields["name"], "color": fields.get("color", "ededed"),
+                 "description": fields.get("description"), "default": False}
+        self._next_id += 1
+        self.labels[repo_name.lower()][label["name"].lower()] = label
+        return label
+
+    # Response bodies
+
+    def org_json(self):
+        private = sum(1 for repo in self.repos.values() if repo["private"])
+        return {
+            "login": self.org,
+            "id": 1,
+            "type": "Organization",
+            "url": f"{self.url}/orgs/{self.org}",
+            "repos_url": f"{self.url}/orgs/{self.org}/repos",
+            "public_repos": len(self.repos) - private,
+            "total_private_repos": private,
+            "owned_private_repos": private,
+        }
+
+    def label_json(self, repo_name, label):
+        return {**label, "url": f"{self.url}/repos/{self.org}/{repo_name}/labels/{label['name']}"}
+
+    def repo_json(self, repo):
+        return {
+            **repo,
+            "full_name": f"{self.org}/{repo['name']}",
+            "owner": {"login": self.org, "type": "Organization", "url": f"{self.url}/orgs/{self.org}"},
+            "url": f"{self.url}/repos/{self.org}/{repo['name']}",
+            "html_url": f"https://github.com/{self.org}/{repo['name']}",
+        }
+
+    # Request handling, called from the server threads
+
+    def handle(self, method, path, query, body):
+        """
+        Returns (route, status, payload, extra_headers).
+        """
+        org = re.escape(self.org)
+        routes = (
+            ("GET", r"/user", "/user", self._get_user),
+            ("GET", r"/rate_limit", "/rate_limit", self._get_rate_limit),
+            ("GET", rf"/orgs/{org}", "/orgs/{org}", self._get_org),
+            ("GET", rf"/orgs/{org}/installation", "/orgs/{org}/installation", self._get_installation),
+            (
+                "POST",
+                r"/app/installations/(\d+)/access_tokens",
+                "/app/installations/{id}/access_tokens",
+                self._create_installation_token
+            ),
+            ("GET", rf"/orgs/{org}/repos", "/orgs/{org}/repos", self._list_repos),
+            ("POST", rf"/orgs/{org}/repos", "/orgs/{org}/repos", self._create_repo),
+            ("GET", rf"/repos/{org}/([^/]+)", "/repos/{org}/{repo}", self._get_repo),
+            ("PATCH", rf"/repos/{org}/([^/]+)", "/repos/{org}/{repo}", self._edit_repo),
+            ("DELETE", rf"/repos/{org}/([^/]+)", "/repos/{org}/{repo}", self._delete_repo),
+            ("GET", rf"/repos/{org}/([^/]+)/labels", "/repos/{org}/{repo}/labels", self._list_labels),
+            ("POST", rf"/repos/{org}/([^/]+)/labels", "/repos/{org}/{repo}/labels", self._create_label),
+            ("PATCH", rf"/repos/{org}/([^/]+)/labels/([^/]+)", "/repos/{org}/{repo}/labels/{name}", self._edit_label),
+            ("DELETE", rf"/repos/{org}/([^/]+)/labels/([^/]+)", "/repos/{org}/{repo}/labels/{name}", self._delete_label),
+            ("POST", r"/graphql", "/graphql", self._graphql),
+            ("GET", rf"/orgs/{org}/teams/([^/]+)/repos", "/orgs/{org}/teams/{team}/repos", self._list_team_repos),
+            (
+                "PUT",
+                rf"/orgs/{org}/teams/([^/]+)/repos/{org}/([^/]+)",
+                "/orgs/{org}/teams/{team}/repos/{org}/{repo}",
+                self._set_team_repo
+            ),
+            (
+                "DELETE",
+                rf"/orgs/{org}/teams/([^/]+)/repos/{org}/([^/]+)",
+                "/orgs/{org}/teams/{team}/repos/{org}/{repo}",
+                self._remove_team_repo
+            ),
+        )
+        for verb, pattern, route, handler in routes:
+            match = re.fullmatch(pattern, path, re.IGNORECASE)
+            if match and verb == method:
+                with self._lock:
+                    if self.faults.get(method):
+                        return route, self.faults[method].pop(0), {"message": "Server Error"}, {}
+                    return (route, *handler(query, body, *[unquote(group) for group in match.groups()]))
+        return path, 404, {"message": "Not Found"}, {}
+
+    def _page(self, items, query, path):
+        # One page of `items` and the Link header pointing at the next and last pages
+        per_page = min(int(query.get("per_page", ["30"])[0]), MAX_PAGE_SIZE)
+        page = int(query.get("page", ["1"])[0])
+        start = (page - 1) * per_page
+        headers = {}
+        if start + per_page < len(items):
+            last = (len(items) + per_page - 1) // per_page
+            headers["Link"] = (
+                f'<{self.url}{path}?per_page={per_page}&page={page + 1}>; rel="next", '
+                f'<{self.url}{path}?per_page={per_page}&page={last}>; rel="last"'
+            )
+        return items[start:start + per_page], headers
+
+    def _get_user(self, query, body):
+        return 200, {"login": "bench-user", "id": 1, "type": "User", "url": f"{self.url}/user"}, {}
+
+    def _get_rate_limit(self, query, body):
+        core = {"limit": self.rate_limit, "remaining": self.remaining, "reset": self.reset_at}
+        return 200, {"resources": {"core": core}, "rate": core}, {}
+
+    def _get_org(self, query, body):
+        return 200, self.org_json(), {}
+
+    def _app_authorized(self):
+        # Signatures are not checked, only that the JWT was issued by the app
+        import jwt
+        authorization = getattr(self._request, "authorization", None) or ""
+        if self.app_id is None or not authorization.startswith("Bearer "):
+            return False
+        try:
+            claims = jwt.decode(authorization[len("Bearer "):], options={"verify_signature": False})
+        except jwt.InvalidTokenError:
+            return False
+        return str(claims.get("iss")) == str(self.app_id)
+
+    def _get_installation(self, query, body):
+        if not self._app_authorized():
+            return 401, {"message": "A JSON web token could not be decoded"}, {}
+        return 200, {
+            "id": self.installation_id,
+            "app_id": self.app_id,
+            "account": {"login": self.org, "type": "Organization"},
+            "target_type": "Organization",
+        }, {}
+
+    def _create_installation_token(self, query, body, installation_id):
+        if not self._app_authorized():
+            return 401, {"message": "A JSON web token could not be decoded"}, {}
+        if int(installation_id) != self.installation_id:
+            return 404, {"message": "Not Found"}, {}
+        token = f"ghs_fake{len(self.tokens_issued) + 1:04d}"
+        self.tokens_issued.append(token)
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.token_ttl)
+        return 201, {
+            "token": token,
+            "expires_at": expires_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "permissions": {"administration": "write", "metadata": "read"},
+            "repository_selection": "all",
+        }, {}
+
+    def _list_repos(self, query, body):
+        repos, headers = self._page(list(self.repos.values()), query, f"/orgs/{self.org}/repos")
+        listed = [self.repo_json(repo) for repo in repos]
+        for repo in listed:
+            for key in LISTING_OMITS:
+                repo.pop(key, None)
+        return 200, listed, headers
+
+    def _create_repo(self, query, body):
+        name = body.get("name", "")
+        if name.lower() in self.repos:
+            return 422, {
+                "message": "Repository creation failed.",
+                "errors": [{"resource": "Repository", "field": "name", "message": "name already exists on this account"}]
+            }, {}
+        settings = {key: value for key, value in body.items() if key in REPOSITORY_DEFAULTS}
+        repo = self._add_repo(name, settings)
+        for label_name, color, description in DEFAULT_LABELS:
+            self._add_label(name, {"name": label_name, "color": color, "description": description})
+        return 201, self.repo_json(repo), {}
+
+    def _get_repo(self, query, body, name):
+        repo = self.repos.get(name.lower())
+        if repo is None:
+            return 404, {"message": "Not Found"}, {}
+        return 200, self.repo_json(repo), {}
+
+    def _edit_repo(self, query, body, name):
+        repo = self.repos.get(name.lower())
+        if repo is None:
+            return 404, {"message": "Not Found"}, {}
+        repo.update({key: value for key, value in body.items() if key in REPOSITORY_DEFAULTS})
+        if body.get("name") and body["name"].lower() != name.lower():
+            del self.repos[name.lower()]
+            repo["name"] = body["name"]
+            self.repos[repo["name"].lower()] = repo
+            self.labels[repo["name"].lower()] = self.labels.pop(name.lower())
+            for repos in self.teams.values():
+                if name.lower() in repos:
+                    repos[repo["name"].lower()] = repos.pop(name.lower())
+        return 200, self.repo_json(repo), {}
+
+    def _delete_repo(self, query, body, name):
+        if self.repos.pop(name.lower(), None) is None:
+            return 404, {"message": "Not Found"}, {}
+        self.labels.pop(name.lower(), None)
+        for repos in self.teams.values():
+            repos.pop(name.lower(), None)
+        return 204, None, {}
+
+    def _list_labels(self, query, body, repo_name):
+        if repo_name.lower() not in self.repos:
+            return 404, {"message": "Not Found"}, {}
+        labels, headers = self._page(
+            list(self.labels[repo_name.lower()].values()), query, f"/repos/{self.org}/{repo_name}/labels"
+        )
+        return 200, [self.label_json(repo_name, label) for label in labels], headers
+
+    def _create_label(self, query, body, repo_name):
+        if repo_name.lower() not in self.repos:
+            return 404, {"message": "Not Found"}, {}
+        if body.get("name", "").lower() in self.labels[repo_name.lower()]:
+            return 422, {"message": "Validation Failed", "errors": [{"resource": "Label", "code": "already_exists"}]}, {}
+        return 201, self.label_json(repo_name, self._add_label(repo_name, body)), {}
+
+    def _edit_label(self, query, body, repo_name, label_name):
+        labels = self.labels.get(repo_name.lower(), {})
+        label = labels.get(label_name.lower())
+        if label is None:
+            return 404, {"message": "Not Found"}, {}
+        new_name = body.get("new_name") or label["name"]
+        if new_name.lower() != label_name.lower() and new_name.lower() in labels:
+            return 422, {"message": "Validation Failed", "errors": [{"resource": "Label", "code": "already_exists"}]}, {}
+        del labels[label_name.lower()]
+        label["name"] = body.get("new_name") or label["name"]
+        for key in ("color", "description"):
+            if key in body:
+                label[key] = body[key]
+        labels[label["name"].lower()] = label
+        return 200, self.label_json(repo_name, label), {}
+
+    def _delete_label(self, query, body, repo_name, label_name):
+        if self.labels.get(repo_name.lower(), {}).pop(label_name.lower(), None) is None:
+            return 404, {"message": "Not Found"}, {}
+        return 204, None, {}
+
+    def _graphql(self, query, body):
+        # Answers the aliased repository lookups of ghrm.graphql, whatever the query text
+        data, errors = {}, []
+        for key, name in (body.get("variables") or {}).items():
+            if key == "owner":
+                continue
+            alias = f"r{key[1:]}"
+            repo = self.repos.get(str(name).lower())
+            if repo is None:
+                data[alias] = None
+                errors.append({"type": "NOT_FOUND", "path": [alias], "message": f"Could not resolve to a Repository with the name '{name}'."})
+                continue
+            data[alias] = {
+                "name": repo["name"],
+                "description": repo["description"],
+                "homepageUrl": repo["homepage"] or "",
+                "visibility": "PRIVATE" if repo["private"] else "PUBLIC",
+                "isPrivate": repo["private"],
+                "isArchived": repo["archived"],
+                "hasIssuesEnabled": repo["has_issues"],
+                "hasWikiEnabled": repo["has_wiki"],
+                "hasProjectsEnabled": repo["has_projects"],
+                "mergeCommitAllowed": repo["allow_merge_commit"],
+                "squashMergeAllowed": repo["allow_squash_merge"],
+                "rebaseMergeAllowed": repo["allow_rebase_merge"],
+                "deleteBranchOnMerge": repo["delete_branch_on_merge"],
+            }
+        payload = {"data": data}
+        if errors:
+            payload["errors"] = errors
+        return 200, payload, {}
+
+    def _list_team_repos(self, query, body, slug):
+        repos = self.teams.get(slug.lower())
+        if repos is None:
+            return 404, {"message": "Not Found"}, {}
+        listed = [(self.repos[name], permission) for name, permission in repos.items() if name in self.repos]
+        page, headers = self._page(listed, query, f"/orgs/{self.org}/teams/{slug}/repos")
+        return 200, [
+            {
+                **self.repo_json(repo),
+                "permissions": {role: PERMISSIONS.index(role) <= PERMISSIONS.index(permission) for role in PERMISSIONS},
+                "role_name": ROLE_NAMES.get(permission, permission),
+            }
+            for repo, permission in page
+        ], headers
+
+    def _set_team_repo(self, query, body, slug, repo_name):
+        if slug.lower() not in self.teams or repo_name.lower() not in self.repos:
+            return 404, {"message": "Not Found"}, {}
+        permission = body.get("permission", "push")
+        if permission not in PERMISSIONS:
+            return 422, {"message": "Validation Failed", "errors": [{"field": "permission", "code": "invalid"}]}, {}
+        self.teams[slug.lower()][repo_name.lower()] = permission
+        return 204, None, {}
+
+    def _remove_team_repo(self, query, body, slug, repo_name):
+        if self.teams.get(slug.lower(), {}).pop(repo_name.lower(), None) is None:
+            return 404, {"message": "Not Found"}, {}
+        return 204, None, {}
+
+    def take_budget(self, authorization=None):
+        """
+        Uses one request of the credential's primary budget. Returns False when it is exhausted.
+        """
+        with self._lock:
+            if time.time() >= self.reset_at:
+                self._reset_budget()
+            remaining = self.remaining_for(authorization)
+            if remaining <= 0:
+                return False
+            self.budgets[authorization] = remaining - 1
+            return True
+
+    def rate_limit_headers(self, authorization=None):
+        remaining = self.remaining_for(authorization)
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Used": str(self.rate_limit - remaining),
+            "X-RateLimit-Reset": str(self.reset_at),
+            "X-RateLimit-Resource": "core",
+        }
+
+def _handler_for(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _serve(self):
+            started = time.perf_counter()
+            parts = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            body = json.loads(raw) if raw else {}
+
+            if server.latency:
+                time.sleep(server.latency)
+
+            if_none_match = self.headers.get("If-None-Match")
+            authorization = self.headers.get("Authorization")
+            server._request.authorization = authorization
+            with server._lock:
+                server.authorizations[authorization] += 1
+            route, status, payload, headers = server.handle(
+                self.command, parts.path, parse_qs(parts.query), body
+            )
+            data = b"" if payload is None else json.dumps(payload).encode()
+            etag = f'"{hashlib.sha1(data).hexdigest()}"' if self.command == "GET" and status == 200 else None
+
+            if etag and if_none_match == etag:
+                # Conditional requests answered with 304 are free
+                status, data = 304, b""
+            elif not server.take_budget(authorization):
+                status = 403
+                data = json.dumps({"message": "API rate limit exceeded for installation."}).encode()
+                etag = None
+
+            # Logged before answering so the client never sees a response that is not counted yet
+            server.log.add(self.command, route, status, time.perf_counter() - started)
+            self.send_response(status)
+            for key, value in {**headers, **server.rate_limit_headers(authorization)}.items():
+                self.send_header(key, value)
+            if etag:
+                self.send_header("ETag", etag)
+            if data:
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _serve
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
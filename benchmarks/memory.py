@@ -0,0 +1,119 @@
+# memory.py - Measures the memory an organization-wide inventory takes
+#
+#   python -m benchmarks.memory --repos 50000 --out memory.json
+#
+# The inventory is built from listing pages shaped like GitHub's REST
+# responses, once as PyGithub Repository objects (what ghrm used to keep) and
+# once as RepoState records, and the memory still allocated afterwards is
+# compared. No server is involved, only decoding and indexing.
+
+import argparse
+import json
+import time
+import tracemalloc
+from .fake_github import REPOSITORY_DEFAULTS
+
+DEFAULT_REPOS = 50_000
+PAGE_SIZE = 100
+ORG = "bench-org"
+
+# Link fields of a repository in GitHub's listings, all held by PyGithub
+URL_FIELDS = (
+    "archive", "assignees", "blobs", "branches", "collaborators", "comments", "commits", "compare",
+    "contents", "contributors", "deployments", "downloads", "events", "forks", "git_commits", "git_refs",
+    "git_tags", "hooks", "issue_comment", "issue_events", "issues", "keys", "labels", "languages",
+    "merges", "milestones", "notifications", "pulls", "releases", "stargazers", "statuses",
+    "subscribers", "subscription", "tags", "teams", "trees",
+)
+
+def repository_json(i):
+    name = f"bench-repo-{i:05d}"
+    api = f"https://api.github.com/repos/{ORG}/{name}"
+    return {
+        **REPOSITORY_DEFAULTS,
+        "id": i + 1,
+        "node_id": f"R_kgDO{i:08d}",
+        "name": name,
+        "full_name": f"{ORG}/{name}",
+        "description": f"Benchmark repository {i}",
+        "owner": {"login": ORG, "id": 1, "type": "Organization", "url": f"https://api.github.com/orgs/{ORG}"},
+        "url": api,
+        "html_url": f"https://github.com/{ORG}/{name}",
+        **{f"{field}_url": f"{api}/{field}" for field in URL_FIELDS},
+        "visibility": "private",
+        "default_branch": "main",
+        "created_at": "2024-01-01T00:00:00Z",
+        "updated_at": "2024-06-01T00:00:00Z",
+        "pushed_at": "2024-06-01T00:00:00Z",
+        "size": 1024,
+        "stargazers_count": 0,
+        "watchers_count": 0,
+        "forks_count": 0,
+        "open_issues_count": 0,
+        "topics": [],
+        "permissions": {"admin": True, "maintain": True, "push": True, "triage": True, "pull": True},
+    }
+
+def listing_pages(count):
+    # Decoded from text like a response body, so nothing is shared between repositories
+    for start in range(0, count, PAGE_SIZE):
+        body = json.dumps([repository_json(i) for i in range(start, min(start + PAGE_SIZE, count))])
+        yield json.loads(body)
+
+def build_pygithub():
+    from github import Github
+    from github.Repository import Repository
+
+    g = Github()
+    return lambda data: g.create_from_raw_data(Repository, data)
+
+def build_repo_state():
+    from ghrm.state import RepoState
+
+    return RepoState.from_rest
+
+def measure(build, count):
+    """
+    Returns (bytes still allocated, seconds) for an inventory of `count` repositories.
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+    inventory = {}
+    for page in listing_pages(count):
+        for data in page:
+            inventory[data["name"].lower()] = build(data)
+        del page
+    seconds = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(inventory) == count
+    return current, seconds
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the memory of an organization-wide inventory")
+    parser.add_argument("--repos", type=int, default=DEFAULT_REPOS, help="Repositories in the organization")
+    parser.add_argument("--out", metavar="PATH", help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'model':<12} {'repos':>7} {'MB':>9} {'bytes/repo':>11} {'seconds':>8}")
+    for model, build in (("pygithub", build_pygithub()), ("repo_state", build_repo_state())):
+        current, seconds = measure(build, args.repos)
+        results.append({
+            "model": model,
+            "repos": args.repos,
+            "bytes": current,
+            "bytes_per_repo": round(current / args.repos) if args.repos else 0,
+            "seconds": round(seconds, 3),
+        })
+        print(f"{model:<12} {args.repos:>7} {current / 2**20:>9.1f} {results[-1]['bytes_per_repo']:>11} {seconds:>8.2f}")
+
+    report = {"repos": args.repos, "results": results}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.out}")
+    return report
+
+if __name__ == "__main__":
+    main()
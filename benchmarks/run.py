@@ -0,0 +1,233 @@
+# run.py - Benchmarks ghrm against the local fake GitHub API
+#
+#   python -m benchmarks.run --sizes 100 1000 --latency 0.005 --out results.json
+#   python -m benchmarks.run --sizes 100 --baseline results.json
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from .fake_github import FakeGitHub
+
+DEFAULT_SIZES = (100, 1000, 10000)
+SCENARIOS = (
+    "create_repository",
+    "delete_repository",
+    "decommission_repository",
+    "configure_repository",
+    "labels_sync",
+    "teams_sync",
+    "drift",
+    "run_cli",
+)
+
+LABELS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config", "labels.yaml")
+# Teams of the teams_sync scenario, each configured with access to every repository
+BENCH_TEAMS = 4
+
+def percentile(values, share):
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(share * 100) - 1]
+
+def repo_names(count):
+    return [f"bench-repo-{i:05d}" for i in range(count)]
+
+def write_config(path, names, existing):
+    """
+    Writes a config for `names`. Repositories that already exist get one
+    setting changed so create/configure has both creates and updates to do.
+    """
+    import yaml
+    repositories = {}
+    for i, name in enumerate(names):
+        repositories[name] = {
+            "description": f"Benchmark repository {i}",
+            "private": True,
+            "has_wiki": name not in existing,
+            # Left out of organization listings, so it has to be read separately
+            "allow_squash_merge": True,
+        }
+    with open(path, "w") as f:
+        yaml.safe_dump({"repositories": repositories}, f, sort_keys=False)
+
+def reset_client():
+    # Every scenario starts with a fresh client so inventory sizing sees the seeded org
+    from ghrm import repository
+    repository._client = None
+    repository.get_github()
+
+@contextlib.contextmanager
+def quiet():
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            yield
+
+def run_scenario(server, scenario, size, workdir, concurrency):
+    from ghrm import repository
+    from ghrm.cli import run_cli
+
+    names = repo_names(size)
+    server.reset()
+    existing = set()
+    if scenario in ("delete_repository", "decommission_repository", "labels_sync", "teams_sync"):
+        existing = set(names)
+    elif scenario in ("configure_repository", "drift", "run_cli"):
+        existing = set(names[::2])
+    for name in existing:
+        server.add_repo(name, description=f"Benchmark repository {names.index(name)}")
+    if scenario == "teams_sync":
+        # Every team already has access to all but every tenth repository
+        for team in range(BENCH_TEAMS):
+            server.add_team(f"bench-team-{team}", {name: "pull" for i, name in enumerate(names) if i % 10})
+
+    config_path = os.path.join(workdir, f"{scenario}-{size}.yaml")
+    write_config(config_path, names, existing)
+
+    with quiet():
+        reset_client()
+    server.log.clear()
+
+    started = time.perf_counter()
+    with quiet():
+        if scenario == "create_repository":
+            for name in names:
+                repository.create_repository(name, description="Benchmark repository")
+        elif scenario == "delete_repository":
+            for name in names:
+                repository.delete_repository(name)
+        elif scenario == "decommission_repository":
+            repository.decommission_repository(config_path, dry_run=False, concurrency=concurrency)
+        elif scenario == "configure_repository":
+            repository.configure_repository(config_path)
+        elif scenario == "labels_sync":
+            from ghrm.labels import load_label_specs, sync_labels
+            list(sync_labels(names, load_label_specs(LABELS_FILE), concurrency=concurrency))
+        elif scenario == "teams_sync":
+            from ghrm.teams import sync_team_access
+            access = {f"bench-team-{team}": {name: "pull" for name in names} for team in range(BENCH_TEAMS)}
+            list(sync_team_access(access, concurrency=concurrency))
+        elif scenario == "drift":
+            from ghrm.config import ConfigSource
+            from ghrm.drift import drift
+            list(drift(ConfigSource(config_path, use_cache=False).repositories()))
+        elif scenario == "run_cli":
+            argv = sys.argv
+            sys.argv = [
+                "ghrm", "create",
+                "--config", config_path,
+                "--concurrency", str(concurrency),
+                "--state-file", os.path.join(workdir, "state.json"),
+                "--journal", os.path.join(workdir, "journal.ndjson"),
+                "--full",
+                "--no-cache",
+            ]
+            try:
+                run_cli()
+            finally:
+                sys.argv = argv
+    wall = time.perf_counter() - started
+
+    entries = list(server.log.entries)
+    latencies = sorted(seconds for _, _, _, seconds in entries)
+    return {
+        "scenario": scenario,
+        "repos": size,
+        "wall_seconds": round(wall, 3),
+        "requests": len(entries),
+        "requests_per_repo": round(len(entries) / size, 3) if size else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "by_route": dict(Counter(f"{method} {route}" for method, route, _, _ in entries)),
+        "by_status": {str(status): count for status, count in Counter(status for _, _, status, _ in entries).items()},
+    }
+
+def compare(results, baseline_path):
+    """
+    Prints wall time and request count changes against an earlier results file.
+    """
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["repos"]): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        before = baseline.get((result["scenario"], result["repos"]))
+        if before is None:
+            continue
+        wall = result["wall_seconds"] / before["wall_seconds"] if before["wall_seconds"] else 0.0
+        print(
+            f"  {result['scenario']:<24} {result['repos']:>6}  "
+            f"wall x{wall:.2f}  requests {before['requests']} -> {result['requests']}"
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ghrm against a local fake GitHub API")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Repository counts")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every API response")
+    parser.add_argument("--rate-limit", type=int, default=1_000_000, help="Primary rate limit of the fake API")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrency of the run_cli, decommission, labels and teams scenarios")
+    parser.add_argument(
+        "--pace-writes",
+        action="store_true",
+        help="Keep the default write pacing (80 writes per minute) instead of disabling it"
+    )
+    parser.add_argument("--out", metavar="PATH", help="Write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare with an earlier results file")
+    args = parser.parse_args(argv)
+
+    from ghrm import transport
+    from ghrm.__version__ import VERSION
+    from ghrm.ratelimit import RateLimitScheduler
+
+    if not args.pace_writes:
+        transport.scheduler = RateLimitScheduler(writes_per_minute=10**9, write_burst=10**9)
+    transport.disable_cache()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir, FakeGitHub(latency=args.latency, rate_limit=args.rate_limit) as server:
+        os.environ.update({
+            "GITHUB_API_URL": server.url,
+            "GITHUB_GRAPHQL_URL": f"{server.url}/graphql",
+            "GITHUB_TOKEN": "benchmark-token",
+            "GITHUB_ORG": server.org,
+            "XDG_CACHE_HOME": os.path.join(workdir, "cache"),
+        })
+        os.environ.pop("SLACK_WEBHOOK_URL", None)
+        os.environ.pop("DISCORD_WEBHOOK_URL", None)
+
+        print(f"{'scenario':<24} {'repos':>6} {'wall s':>9} {'requests':>9} {'req/repo':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for size in args.sizes:
+            for scenario in args.scenarios:
+                result = run_scenario(server, scenario, size, workdir, args.concurrency)
+                results.append(result)
+                print(
+                    f"{scenario:<24} {size:>6} {result['wall_seconds']:>9.2f} {result['requests']:>9} "
+                    f"{result['requests_per_repo']:>9.2f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}"
+                )
+
+    report = {
+        "ghrm_version": VERSION,
+        "python": platform.python_version(),
+        "timestamp": int(time.time()),
+        "latency": args.latency,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.out}")
+    if args.baseline:
+        compare(results, args.baseline)
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# applied.py - Remembers which config entries were applied successfully
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+DEFAULT_STATE_FILE = ".ghrm-state.json"
+STATE_VERSION = 1
+
+def entry_hash(repo_name, description, repo_config):
+    """
+    Content hash of one config entry. Key order in the YAML does not matter.
+    """
+    content = json.dumps(
+        {"name": repo_name, "description": description, "config": repo_config},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+class AppliedState:
+    """
+    The hash and outcome of every config entry applied by the last runs.
+
+    Entries whose hash still matches were applied as configured and can be
+    skipped. Failed entries are never recorded, so they are retried.
+    The state is tied to one organization; another org starts empty.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_FILE, org=None):
+        self.path = path
+        self.org = org
+        self.entries = {}
+        self.skipped = 0
+        self._seen = set()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable state file {self.path}: {str(e)}", file=sys.stderr)
+            return
+        if data.get("version") != STATE_VERSION or data.get("org") != self.org:
+            return
+        self.entries = data.get("entries", {})
+
+    def pending(self, entries, full=False):
+        """
+        Yields the (repo_name, description, repo_config) entries that were
+        added or changed since they were last applied, or all of them if `full`.
+        """
+        for entry in entries:
+            key = str(entry[0]).lower()
+            self._seen.add(key)
+            applied = self.entries.get(key)
+            if full or applied is None or applied["hash"] != entry_hash(*entry):
+                yield entry
+            else:
+                self.skipped += 1
+
+    def record(self, entry, outcome):
+        self._dirty = True
+        self.entries[str(entry[0]).lower()] = {
+            "name": entry[0],
+            "hash": entry_hash(*entry),
+            "outcome": outcome,
+            "applied_at": int(time.time())
+        }
+
+    def forget(self, repo_name):
+        if self.entries.pop(str(repo_name).lower(), None) is not None:
+            self._dirty = True
+
+    def prune(self):
+        """
+        Drops entries that are no longer in the config. Only call this after
+        pending() has seen the whole config. Returns the names dropped.
+        """
+        removed = [applied["name"] for key, applied in self.entries.items() if key not in self._seen]
+        if removed:
+            self._dirty = True
+            self.entries = {key: applied for key, applied in self.entries.items() if key in self._seen}
+        return removed
+
+    def save(self):
+        if not self._dirty:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(
+                    {"version": STATE_VERSION, "org": self.org, "entries": self.entries},
+                    f,
+                    indent=1,
+                    sort_keys=True
+                )
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            print(f"Failed to save state file {self.path}: {str(e)}", file=sys.stderr)
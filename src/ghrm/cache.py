@@ -0,0 +1,111 @@
+# cache.py - Persistent conditional-request cache for GitHub reads
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Default upper bound for the size of cached response bodies
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+def default_cache_dir():
+    """
+    Returns the ghrm cache directory, honouring XDG_CACHE_HOME.
+    """
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ghrm")
+
+class HttpCache:
+    """
+    Stores the last response body and validators (ETag / Last-Modified) per
+    request key in SQLite, evicting least recently used entries when the
+    total body size exceeds `max_bytes`.
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        if path is None:
+            path = os.path.join(default_cache_dir(), "http.sqlite")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " headers TEXT NOT NULL,"
+            " body TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def lookup(self, key):
+        """
+        Returns (etag, last_modified, headers, body) for `key`, or None.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, headers, body FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, headers, body = row
+        return etag, last_modified, json.loads(headers), body
+
+    def hit(self, key):
+        """
+        Records that the cached entry for `key` was served.
+        """
+        with self._lock:
+            self.hits += 1
+            self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def store(self, key, etag, last_modified, headers, body):
+        """
+        Saves a response body with its validators and evicts old entries if needed.
+        """
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, json.dumps(dict(headers)), body, size, time.time())
+            )
+            self._size += size - (previous[0] if previous else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Drop the least recently used entries until the cache is back under 90% of its budget
+        target = self.max_bytes * 0.9
+        rows = self._db.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall()
+        stale = []
+        for key, size in rows:
+            if self._size <= target:
+                break
+            stale.append((key,))
+            self._size -= size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
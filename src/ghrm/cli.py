@@ -2,31 +2,39 @@
 
 import argparse
 import os
-import yaml
-from rich.text import Text
-from dotenv import load_dotenv
-from github import Github, GithubException, Auth
-from .repository import (
-    create_repository,
-    delete_repository
-)
-
+import sys
+from .applied import DEFAULT_STATE_FILE
+from .journal import DEFAULT_JOURNAL_FILE
+from .labels import DEFAULT_LABELS_FILE
+from .serve import DEFAULT_POLL_INTERVAL, DEFAULT_RESYNC_INTERVAL
+from .engine import run_tasks, write_gate
 from .display import (
     display_result,
     display_list,
     display_empty
 )
 
-from .notifications.slack import send_slack_notification
-from .notifications.discord import send_discord_notification
 from .__version__ import VERSION
 
+# Notification per outcome of a create or reconcile: (action, status)
+CREATE_NOTIFICATIONS = {
+    "created": ("Repository Created", "success"),
+    "updated": ("Repository Updated", "success"),
+    "unchanged": ("Repository Unchanged", "info"),
+}
+
+# Title of the summary table per action
+SUMMARY_TITLES = {
+    "create": "Create summary",
+    "delete": "Decommission summary",
+    "labels": "Label sync summary",
+    "teams": "Team access summary",
+    "serve": "Serve summary",
+}
+
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
-
-def load_config(config_path):
-    with open(config_path, 'r') as file:
-        return yaml.safe_load(file)
+GHRM_WEBHOOK_SECRET = os.getenv("GHRM_WEBHOOK_SECRET")
 
 def run_cli():
     parser = argparse.ArgumentParser(description="GitHub Repository Manager CLI")
@@ -39,17 +47,185 @@ def run_cli():
 
     parser.add_argument(
         "action",
-        choices=["create", "delete"],
+        choices=["create", "delete", "labels", "teams", "serve", "drift"],
         help="Action to perform",
         nargs="?"
     )
 
+    parser.add_argument(
+        "subaction",
+        choices=["sync"],
+        help="Sub-command of the labels and teams actions",
+        nargs="?"
+    )
+
     parser.add_argument(
         "--config",
-        help="Path to YAML config file",
+        help="Path to a YAML config file, a directory of them or a glob pattern",
         required=False
     )
 
+    parser.add_argument(
+        "--watch",
+        metavar="PATH",
+        help="With serve, the config file, directory or glob pattern to watch and reconcile"
+    )
+
+    parser.add_argument(
+        "--resync-interval",
+        type=float,
+        default=DEFAULT_RESYNC_INTERVAL,
+        metavar="SECONDS",
+        help=f"With serve, reconcile every config entry this often; 0 disables (default: {DEFAULT_RESYNC_INTERVAL})"
+    )
+
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        metavar="SECONDS",
+        help="With serve, how often config files are checked where inotify is unavailable "
+             f"(default: {DEFAULT_POLL_INTERVAL:g})"
+    )
+
+    parser.add_argument(
+        "--webhook-port",
+        type=int,
+        metavar="PORT",
+        help="With serve, receive GitHub organization webhooks on PORT (requires GHRM_WEBHOOK_SECRET)"
+    )
+
+    parser.add_argument(
+        "--webhook-host",
+        default="127.0.0.1",
+        metavar="HOST",
+        help="Address the webhook receiver listens on (default: 127.0.0.1)"
+    )
+
+    parser.add_argument(
+        "--org-processes",
+        type=int,
+        metavar="N",
+        help="With an `organizations` config, how many organizations run at once (default: all)"
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of repositories to process in parallel (default: 1)"
+    )
+
+    parser.add_argument(
+        "--reader",
+        choices=["rest", "graphql"],
+        default="rest",
+        help="API used to read current repository settings (default: rest)"
+    )
+
+    parser.add_argument(
+        "--notify",
+        choices=["event", "digest"],
+        default="event",
+        help="Send one notification per repository or a summary at the end of the run (default: event)"
+    )
+
+    parser.add_argument(
+        "--notify-window",
+        type=float,
+        metavar="SECONDS",
+        help="With serve and --notify digest, also send the summary every SECONDS instead of only after each pass"
+    )
+
+    parser.add_argument(
+        "--labels",
+        default=DEFAULT_LABELS_FILE,
+        metavar="PATH",
+        help=f"Label definitions used by `labels sync` (default: {DEFAULT_LABELS_FILE})"
+    )
+
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="With `labels sync`, delete labels that are not in the label definitions; "
+             "with `teams sync`, revoke team access that is not in `team_access`"
+    )
+
+    parser.add_argument(
+        "--format",
+        choices=["table", "ndjson", "csv"],
+        default="table",
+        help="Output format of the drift report (default: table)"
+    )
+
+    parser.add_argument(
+        "--output",
+        choices=["text", "progress", "ndjson"],
+        help="How create, delete, labels sync, teams sync and serve report each repository: a line, "
+             "a live progress view or NDJSON records on stdout (default: progress on a terminal, text otherwise)"
+    )
+
+    parser.add_argument(
+        "-q", "--quiet",
+        action="store_true",
+        help="Only report errors and a one-line summary"
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="For delete, only report what would be deleted (default); use --no-dry-run to delete"
+    )
+
+    parser.add_argument(
+        "--state-file",
+        default=DEFAULT_STATE_FILE,
+        metavar="PATH",
+        help=f"File recording the config entries already applied (default: {DEFAULT_STATE_FILE})"
+    )
+
+    parser.add_argument(
+        "--journal",
+        default=DEFAULT_JOURNAL_FILE,
+        metavar="PATH",
+        help=f"Journal of per-repository outcomes written during create and delete (default: {DEFAULT_JOURNAL_FILE})"
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the entries an interrupted create or delete run of the same config already completed"
+    )
+
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Reconcile every config entry, not only those changed since the last run"
+    )
+
+    parser.add_argument(
+        "--metrics-out",
+        metavar="PATH",
+        help="Write API call counts, latencies and rate-limit usage to PATH "
+             "(Prometheus textfile for .prom, JSON otherwise)"
+    )
+
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="ghrm.prof",
+        metavar="PATH",
+        help="Profile the run with cProfile and write the stats to PATH (default: ghrm.prof)"
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the on-disk caches for GitHub reads and parsed config files"
+    )
+
     args = parser.parse_args()
 
     if args.version:
@@ -59,132 +235,547 @@ def run_cli():
     if not args.action:
         parser.error("action is required when not using --version")
 
+    if args.action in ("labels", "teams") and args.subaction != "sync":
+        parser.error(f"the {args.action} action requires a sub-command: {args.action} sync")
+
+    if args.action not in ("labels", "teams") and args.subaction:
+        parser.error(f"{args.action} does not take a sub-command")
+
+    if args.action == "serve":
+        if not args.watch:
+            parser.error("serve requires --watch")
+        if args.config and args.config != args.watch:
+            parser.error("serve reads its config from --watch")
+        args.config = args.watch
+    elif args.watch or args.webhook_port is not None:
+        parser.error("--watch and --webhook-port are only used by serve")
+
+    if args.webhook_port is not None and not GHRM_WEBHOOK_SECRET:
+        parser.error("--webhook-port requires the GHRM_WEBHOOK_SECRET environment variable")
+
     if not args.config:
         parser.error("--config is required when performing an action")
 
-    config = load_config(args.config)
-    repos = config.get('repositories', {})
-    description = config.get('description')
+    if args.resync_interval < 0 or args.poll_interval <= 0:
+        parser.error("--resync-interval must not be negative and --poll-interval must be positive")
+
+    if args.notify_window is not None:
+        if args.action != "serve" or args.notify != "digest":
+            parser.error("--notify-window is only used by serve with --notify digest")
+        if args.notify_window <= 0:
+            parser.error("--notify-window must be positive")
+
+    if args.action == "drift" and (args.output or args.quiet):
+        parser.error("drift is reported with --format (table, ndjson or csv), not --output or --quiet")
+
+    if args.resume and args.action not in ("create", "delete"):
+        parser.error("--resume is only used by create and delete")
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    if args.org_processes is not None and args.org_processes < 1:
+        parser.error("--org-processes must be at least 1")
+
+    try:
+        if args.profile:
+            profile_action(args)
+        else:
+            run_action(args)
+    finally:
+        if args.metrics_out:
+            write_metrics(args.metrics_out)
+
+def profile_action(args):
+    """
+    Runs the action under cProfile, then writes the stats to args.profile
+    and prints the most expensive calls.
+    """
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        run_action(args)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        print(f"\nProfile written to {args.profile}, top calls by cumulative time:", file=sys.stderr)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+
+def run_organizations(args, source):
+    """
+    Runs the action for every organization of the `organizations` setting,
+    each in its own process with its own credentials and rate-limit budget,
+    then prints their output in config order and a merged summary.
+    """
+    from .orgs import fan_out, format_counts, load_organizations
+
+    if args.action == "serve":
+        print("serve manages one organization; run one serve per organization", file=sys.stderr)
+        return None
+    try:
+        targets = load_organizations(source.settings, os.path.dirname(source.paths[0]))
+    except ValueError as e:
+        print(f"Invalid organizations config: {str(e)}", file=sys.stderr)
+        return None
+
+    rows = []
+    totals = {}
+    for result in fan_out(targets, args, args.org_processes):
+        display_empty(f"Organization {result.org}")
+        sys.stdout.write(result.output)
+        if result.error:
+            display_empty(f"Organization {result.org} failed: {result.error}")
+        for outcome, number in result.counts.items():
+            totals[outcome] = totals.get(outcome, 0) + number
+        core = (result.metrics.get("rate_limit") or {}).get("core") or {}
+        requests = sum(endpoint["count"] for endpoint in result.metrics.get("endpoints", []))
+        rows.append((
+            result.org,
+            f"error: {result.error}" if result.error else format_counts(result.counts),
+            requests,
+            core.get("consumed", 0),
+            core["remaining"] if core.get("remaining") is not None else "-",
+            f"{result.seconds:.1f}"
+        ))
+
+    display_list(
+        "Organizations summary",
+        rows,
+        ["Organization", "Results", "Requests", "Rate limit used", "Rate limit left", "Seconds"]
+    )
+    display_empty(f"{len(targets)} organizations: {format_counts(totals)}")
+    # Every organization wrote its own metrics file
+    args.metrics_out = None
+    return totals
+
+def write_metrics(path):
+    from . import transport
+    from .metrics import registry
+
+    extra = {"scheduler_wait_seconds": round(transport.scheduler.waited, 6)}
+    if transport.cache is not None:
+        extra["http_cache_hits"] = transport.cache.hits
+        extra["http_cache_misses"] = transport.cache.misses
+    try:
+        registry.write(path, extra)
+    except OSError as e:
+        display_empty(f"Failed to write metrics to {path}: {str(e)}")
+
+def run_action(args):
+    """
+    Runs `create`, `delete`, `labels sync` or `drift` for every repository in
+    the config, `teams sync` for its `team_access`, or keeps reconciling it with `serve`.
+    """
+    # Heavy dependencies are only imported once an action is going to run.
+    # The GitHub client itself is created on the first API call.
+    from rich.text import Text
+    from . import transport
+    from .applied import AppliedState
+    from .config import ConfigSource
+    from .notifications.dispatcher import NotificationDispatcher
+    from .decommission import (
+        decommission,
+        DELETED,
+        FAILED,
+        WOULD_DELETE
+    )
+    from .drift import drift, format_changes, IN_SYNC
+    from .journal import Journal, run_key
+    from .labels import describe_change, load_label_specs, sync_labels
+    from .progress import Reporter, default_output, TEXT
+    from .receiver import WebhookReceiver, apply_events
+    from .serve import serve
+    from .teams import describe_change as describe_team_change, load_team_access, sync_team_access
+    from .repository import (
+        build_repository,
+        complete_inventory,
+        create_repository,
+        load_inventory,
+        load_inventory_graphql,
+        inventory_pays_off
+    )
+
+    if args.no_cache:
+        transport.disable_cache()
+
+    # Config files are streamed; unchanged files are read from the compiled cache
+    source = ConfigSource(args.config, use_cache=not args.no_cache)
+    # A config naming several organizations runs each one in its own process
+    if "organizations" in source.settings and getattr(args, "organization", None) is None:
+        return run_organizations(args, source)
+    # One tuned HTTP pool for GitHub and the webhooks, sized to the workers
+    try:
+        transport.configure(args.concurrency, source.settings.get("http"))
+    except (TypeError, ValueError) as e:
+        print(f"Invalid HTTP settings: {str(e)}", file=sys.stderr)
+        return None
+    # Entries applied by earlier runs and unchanged since are skipped
+    applied = AppliedState(args.state_file, os.getenv("GITHUB_ORG"))
+    # Outcomes are journaled as they happen, so an interrupted run can be resumed
+    journal = None
+    if args.action in ("create", "delete"):
+        journal = Journal(
+            args.journal,
+            run_key(args.action, os.getenv("GITHUB_ORG"), source.digest(), dry_run=args.dry_run),
+            resume=args.resume
+        )
+
+    # Webhooks are called from background threads so they never hold up the run
+    # A long-running serve can also send its digest on a timer
+    notifier = NotificationDispatcher(
+        SLACK_WEBHOOK_URL,
+        DISCORD_WEBHOOK_URL,
+        mode=args.notify,
+        window=args.notify_window
+    )
+
+    # One line, a live view or an NDJSON record per repository; drift has --format
+    reporter = Reporter(
+        args.action,
+        output=TEXT if args.action == "drift" else args.output or default_output(),
+        quiet=args.quiet
+    )
+
+    # Repositories per outcome, returned to the caller
+    counts = reporter.counts
+
+    def count(outcome, number=1):
+        counts[outcome] = counts.get(outcome, 0) + number
 
     def send_notification(action, details, status="success"):
-        if SLACK_WEBHOOK_URL:
-            send_slack_notification(action, details, status)
-        if DISCORD_WEBHOOK_URL:
-            send_discord_notification(action, details, status)
+        notifier.submit(action, details, status)
+
+    def report_error(repo_name, error):
+        error_message = str(error)
+        send_notification(
+            "Error Occurred",
+            {
+                "Action": args.action,
+                "Repository": repo_name,
+                "Error": error_message
+            },
+            "error"
+        )
+        reporter.result(repo_name, "failed", error=error_message)
+
+    def report_create(task, state):
+        repo_name, repo_description, _ = task.item
+        if task.error is not None:
+            if journal is not None:
+                journal.record(repo_name, "failed")
+            report_error(repo_name, task.error)
+            return
+        state.record(task.item, task.value)
+        if journal is not None:
+            journal.record(repo_name, task.value)
+        reporter.result(repo_name, task.value)
+        if task.value in CREATE_NOTIFICATIONS:
+            action, status = CREATE_NOTIFICATIONS[task.value]
+            send_notification(
+                action,
+                {
+                    "Repository": repo_name,
+                    "Description": repo_description
+                },
+                status
+            )
+
+    # Fewer workers run as the API budget runs low
+    worker_slot = write_gate(args.concurrency)
+
+    def create_task(entry):
+        repo_name, repo_description, repo_config = entry
+        return create_repository(
+            repo_name,
+            description=repo_description,
+            repo_config=repo_config,
+            inventory=inventory
+        )
+
+    def resume(entries, completed):
+        """
+        Drops the entries the interrupted run completed, calling
+        `completed(entry, outcome)` for each.
+        """
+        if not args.resume:
+            return entries
+        if not journal.resumed:
+            reporter.notice(f"No interrupted run of this config in {args.journal}, starting from the beginning")
+            return entries
+        remaining = []
+        for entry in entries:
+            outcome = journal.done(entry[0])
+            if outcome is None:
+                remaining.append(entry)
+            else:
+                completed(entry, outcome)
+        reporter.notice(f"Resuming: {len(entries) - len(remaining)} entries were completed by the interrupted run")
+        return remaining
+
+    def prefetch_inventory():
+        repo_count = len(entries)
+        if not repo_count:
+            return None
+        if args.reader == "graphql":
+            repo_names = [repo_name for repo_name, _, _ in entries]
+            try:
+                return load_inventory_graphql(repo_names)
+            except Exception as e:
+                reporter.notice(f"GraphQL read failed ({str(e)}), falling back to REST")
+        # One paginated listing of the organization replaces a lookup per repository
+        if not inventory_pays_off(repo_count):
+            return None
+        inventory = load_inventory()
+        # The settings the listing leaves out are read in batches, not per repository
+        complete_inventory(inventory, entries)
+        return inventory
 
     try:
-        # Handle repository creation based on YAML config
-        if args.action == "create":
-            if isinstance(repos, dict):
-                for repo_name, repo_config in repos.items():
-                    result = create_repository(repo_name, description=repo_config.get('description'), repo_config=repo_config)
-                    if result == "created":
-                        send_notification(
-                            "Repository Created",
-                            {
-                                "Repository": repo_name,
-                                "Description": repo_config.get('description')
-                            },
-                            "success"
-                        )
-                        display_result(
-                            Text.assemble(
-                                "GitHub repository created: ",
-                                (repo_name, "bold green")
-                            ),
-                            "success"
-                        )
-                    elif result == "updated":
-                        send_notification(
-                            "Repository Updated",
-                            {
-                                "Repository": repo_name,
-                                "Description": repo_config.get('description')
-                            },
-                            "success"
-                        )
-                        display_result(
-                            Text.assemble(
-                                "GitHub repository updated: ",
-                                (repo_name, "bold blue")
-                            ),
-                            "success"
-                        )
-            elif isinstance(repos, list):
-                for repo_name in repos:
-                    result = create_repository(repo_name, description=description)
-                    if result == "created":
-                        send_notification(
-                            "Repository Created",
-                            {
-                                "Repository": repo_name,
-                                "Description": description
-                            },
-                            "success"
-                        )
-                        display_result(
-                            Text.assemble(
-                                "GitHub repository created: ",
-                                (repo_name, "bold green")
-                            ),
-                            "success"
-                        )
-                    elif result == "updated":
-                        send_notification(
-                            "Repository Updated",
-                            {
-                                "Repository": repo_name,
-                                "Description": description
-                            },
-                            "success"
-                        )
-                        display_result(
-                            Text.assemble(
-                                "GitHub repository updated: ",
-                                (repo_name, "bold blue")
-                            ),
-                            "success"
-                        )
-
-        # Handle repository deletion based on YAML config
-        elif args.action == "delete":
-            if isinstance(repos, dict):
-                for repo_name in repos.keys():
-                    if delete_repository(repo_name):
-                        send_notification(
-                            "Repository Deleted",
-                            {
-                                "Repository": repo_name
-                            },
-                            "warning"
-                        )
-                        display_result(
-                            Text.assemble(
-                                "GitHub repository deleted: ",
-                                (repo_name, "bold red")
-                            ),
-                            "warning"
-                        )
-            elif isinstance(repos, list):
-                for repo_name in repos:
-                    if delete_repository(repo_name):
-                        send_notification(
-                            "Repository Deleted",
-                            {
-                                "Repository": repo_name
-                            },
-                            "warning"
-                        )
-                        display_result(
-                            Text.assemble(
-                                "GitHub repository deleted: ",
-                                (repo_name, "bold red")
-                            ),
-                            "warning"
-                        )
+        with reporter.muted():
+            if args.action == "create":
+                entries = list(applied.pending(source.repositories(), full=args.full))
+                if applied.skipped:
+                    reporter.notice(
+                        f"Skipping {applied.skipped} entries unchanged since the last run (use --full to reconcile all)"
+                    )
+                # The state file of a run that died was never saved
+                entries = resume(entries, applied.record)
+            elif args.action == "serve":
+                # The inventory is loaded by the first pass
+                entries = []
+            elif args.action == "drift":
+                # Compared as they are read, the config is never held in memory
+                entries = None
+            elif args.action == "teams":
+                # Team access is a setting; the repository entries are not read
+                entries = None
+            else:
+                entries = list(source.repositories())
+                if args.action == "delete":
+                    entries = resume(entries, lambda entry, outcome: applied.forget(entry[0]))
+
+            # Label sync lists each repository's labels, which also finds missing
+            # repositories; serve and drift read the organization themselves
+            inventory = prefetch_inventory() if args.action in ("create", "delete") else None
+
+            # Handle repository creation based on YAML config
+            if args.action == "create":
+                with reporter.track(len(entries)):
+                    for task in run_tasks(
+                        create_task,
+                        entries,
+                        args.concurrency,
+                        gate=worker_slot
+                    ):
+                        report_create(task, applied)
+
+                removed = applied.prune()
+                if removed:
+                    reporter.notice(f"{len(removed)} entries no longer in the config were dropped from the state file")
+
+            # Handle repository deletion based on YAML config
+            elif args.action == "delete":
+                with reporter.track(len(entries)):
+                    for result in decommission(
+                        [repo_name for repo_name, _, _ in entries],
+                        dry_run=args.dry_run,
+                        concurrency=args.concurrency,
+                        inventory=inventory,
+                        gate=worker_slot
+                    ):
+                        journal.record(result.repository, result.status)
+                        if result.status == FAILED:
+                            report_error(result.repository, result.detail)
+                            continue
+                        reporter.result(result.repository, result.status)
+                        if result.status == WOULD_DELETE:
+                            continue
+                        # A deleted repository is created again by the next create run
+                        applied.forget(result.repository)
+                        if result.status == DELETED:
+                            send_notification(
+                                "Repository Deleted",
+                                {
+                                    "Repository": result.repository
+                                },
+                                "warning"
+                            )
+
+                if args.dry_run:
+                    reporter.notice("Dry run: no repositories were deleted. Use --no-dry-run to delete them.")
+
+            # Synchronise the labels of every repository in the config
+            elif args.action == "labels":
+                specs = load_label_specs(args.labels)
+                changed = {}
+                # Counted per label change, so the total is not known up front
+                with reporter.track():
+                    for result in sync_labels(
+                        [repo_name for repo_name, _, _ in entries],
+                        specs,
+                        prune=args.prune,
+                        concurrency=args.concurrency,
+                        gate=worker_slot
+                    ):
+                        if result.error is not None:
+                            report_error(result.repository, result.error)
+                            continue
+                        change = describe_change(result.change)
+                        reporter.result(result.repository, result.change.action, detail=change)
+                        changed.setdefault(result.repository, []).append(change)
+
+                for repo_name, changes in changed.items():
+                    send_notification(
+                        "Labels Synced",
+                        {
+                            "Repository": repo_name,
+                            "Changes": ", ".join(changes)
+                        },
+                        "success"
+                    )
+                reporter.notice(
+                    f"{sum(len(changes) for changes in changed.values())} label changes in "
+                    f"{len(changed)} of {len(entries)} repositories, {counts.get('failed', 0)} errors"
+                )
+
+            # Bring the access of every configured team in line
+            elif args.action == "teams":
+                access = load_team_access(source.settings)
+                changed = {}
+                # Counted per permission change, so the total is not known up front
+                with reporter.track():
+                    for result in sync_team_access(
+                        access,
+                        prune=args.prune,
+                        concurrency=args.concurrency,
+                        gate=worker_slot
+                    ):
+                        if result.change is None:
+                            report_error(result.team, result.error)
+                            continue
+                        if result.error is not None:
+                            report_error(result.change.repository, result.error)
+                            continue
+                        change = describe_team_change(result.change)
+                        reporter.result(result.change.repository, result.change.action, detail=change)
+                        changed.setdefault(result.team, []).append(f"{result.change.repository}: {change}")
+
+                for team, changes in changed.items():
+                    send_notification(
+                        "Team Access Synced",
+                        {
+                            "Team": team,
+                            "Changes": ", ".join(changes)
+                        },
+                        "success"
+                    )
+                reporter.notice(
+                    f"{sum(len(changes) for changes in changed.values())} permission changes for "
+                    f"{len(changed)} of {len(access)} teams, {counts.get('failed', 0)} errors"
+                )
+
+            # Report how the organization differs from the config, changing nothing
+            elif args.action == "drift":
+                def drift_rows():
+                    for result in drift(source.repositories()):
+                        count(result.status)
+                        # Repositories matching the config are only counted
+                        if result.status == IN_SYNC:
+                            continue
+                        if args.format == "ndjson":
+                            changes = {
+                                key: {"current": current, "desired": desired}
+                                for key, (current, desired) in result.changes.items()
+                            }
+                            yield (result.repository, result.status, changes, result.unchecked)
+                        else:
+                            yield (
+                                result.repository,
+                                result.status,
+                                format_changes(result.changes),
+                                ", ".join(result.unchecked)
+                            )
+
+                display_list(
+                    "Drift report",
+                    drift_rows(),
+                    ["Repository", "Status", "Changes", "Not checked"],
+                    format=args.format
+                )
+                summary = ", ".join(f"{number} {status}" for status, number in counts.items()) or "no repositories"
+                if args.format == "table":
+                    display_empty(f"Drift: {summary}")
+                else:
+                    print(f"Drift: {summary}", file=sys.stderr)
+
+            # Keep the client, its connection pool and the inventory in memory
+            # and reconcile config changes as they are saved
+            elif args.action == "serve":
+                def serve_task(entry):
+                    repo_name, repo_description, repo_config = entry
+                    # Repositories created after the inventory was loaded are looked up
+                    known = inventory is not None and repo_name.lower() in inventory
+                    return create_repository(
+                        repo_name,
+                        description=repo_description,
+                        repo_config=repo_config,
+                        inventory=inventory if known else None
+                    )
+
+                def reconcile(full):
+                    nonlocal inventory
+                    events = receiver.queue.drain() if receiver is not None else []
+                    if full or inventory is None:
+                        inventory = load_inventory()
+                    state = AppliedState(args.state_file, os.getenv("GITHUB_ORG"))
+                    # Webhook events keep the inventory current and mark their entries for reconciliation
+                    affected = apply_events(events, inventory, state, build_repository)
+                    if affected:
+                        reporter.notice(f"Webhook events for {len(affected)} repositories: {', '.join(affected)}")
+                    changed = list(state.pending(
+                        ConfigSource(args.config, use_cache=not args.no_cache).repositories(),
+                        full=full
+                    ))
+                    complete_inventory(inventory, changed)
+                    with reporter.track(len(changed)):
+                        for task in run_tasks(serve_task, changed, args.concurrency, gate=worker_slot):
+                            report_create(task, state)
+                    state.prune()
+                    state.save()
+                    # A digest covers one pass
+                    notifier.flush()
+                    reporter.notice(
+                        f"{'Full resync' if full else 'Reconciled'}: {len(changed)} entries applied, "
+                        f"{state.skipped} unchanged"
+                    )
+
+                receiver = None
+                if args.webhook_port is not None:
+                    receiver = WebhookReceiver(
+                        GHRM_WEBHOOK_SECRET,
+                        org=os.getenv("GITHUB_ORG"),
+                        host=args.webhook_host,
+                        port=args.webhook_port
+                    ).start()
+                    reporter.notice(f"Receiving GitHub webhooks on {receiver.url}")
+                try:
+                    serve(
+                        args.config,
+                        reconcile,
+                        resync_interval=args.resync_interval,
+                        poll_interval=args.poll_interval,
+                        wake=receiver.queue.pending if receiver is not None else None
+                    )
+                finally:
+                    if receiver is not None:
+                        receiver.close()
 
     except Exception as e:
         error_message = str(e)
+        count("error")
         send_notification(
             "Error Occurred",
             {
@@ -193,13 +784,33 @@ def run_cli():
             },
             "error"
         )
-        display_result(
-            Text.assemble(
-                "Error: ",
-                (error_message, "bold red")
-            ),
-            "error"
+        if reporter.verbose:
+            display_result(
+                Text.assemble(
+                    "Error: ",
+                    (error_message, "bold red")
+                ),
+                "error"
+            )
+        else:
+            print(f"Error: {error_message}", file=sys.stderr)
+    finally:
+        if journal is not None:
+            journal.close()
+        applied.save()
+        notifier.close()
+
+    if args.action in SUMMARY_TITLES:
+        reporter.summary(
+            SUMMARY_TITLES[args.action],
+            unit={"labels": "label changes", "teams": "permission changes"}.get(args.action, "repositories")
+        )
+    # NDJSON and CSV output keeps stdout to the report
+    if transport.cache is not None and args.format == "table":
+        reporter.notice(
+            f"HTTP cache: {transport.cache.hits} hits, {transport.cache.misses} misses"
         )
+    return counts
 
 if __name__ == "__main__":
     run_cli()
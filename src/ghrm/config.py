@@ -0,0 +1,309 @@
+# config.py - Loads the desired repository state from YAML config files
+
+import contextlib
+import glob
+import hashlib
+import os
+import pickle
+import sys
+from .cache import default_cache_dir
+
+# Bump when the cached format or the parsing rules change
+CACHE_VERSION = 1
+
+CONFIG_EXTENSIONS = (".yaml", ".yml")
+
+# The only classes the safe YAML loader produces that pickle stores by name
+CACHE_CLASSES = {
+    ("datetime", "date"),
+    ("datetime", "datetime"),
+    ("datetime", "timedelta"),
+    ("datetime", "timezone"),
+}
+
+class CacheUnpickler(pickle.Unpickler):
+    """
+    Loads the compiled config cache. Cache files are plain data, so any
+    other class is refused rather than imported: a file planted in the cache
+    directory cannot run code.
+    """
+
+    def find_class(self, module, name):
+        if (module, name) not in CACHE_CLASSES:
+            raise pickle.UnpicklingError(f"{module}.{name} is not allowed in the config cache")
+        return super().find_class(module, name)
+
+def _loader_class():
+    import yaml
+    # libyaml's C parser is several times faster than the pure Python one
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+def resolve_paths(source):
+    """
+    Expands a config source into a sorted list of files. `source` may be a
+    file, a directory (its *.yaml / *.yml files) or a glob pattern.
+    """
+    if os.path.isdir(source):
+        paths = [
+            os.path.join(source, name)
+            for name in os.listdir(source)
+            if name.endswith(CONFIG_EXTENSIONS)
+        ]
+    elif glob.has_magic(source):
+        paths = [path for path in glob.glob(source, recursive=True) if os.path.isfile(path)]
+    else:
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Configuration file not found: {source}")
+        paths = [source]
+    if not paths:
+        raise FileNotFoundError(f"No configuration files found for: {source}")
+    return sorted(paths)
+
+def _compose(loader, anchors):
+    """
+    Builds the node for the next value from parser events. PyYAML's C
+    parser only composes whole documents, this lets one entry be built at a time.
+    """
+    from yaml import events, nodes
+
+    event = loader.get_event()
+    if isinstance(event, events.AliasEvent):
+        return anchors[event.anchor]
+
+    if isinstance(event, events.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(nodes.ScalarNode, event.value, event.implicit)
+        node = nodes.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+    elif isinstance(event, events.SequenceStartEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(nodes.SequenceNode, None, event.implicit)
+        node = nodes.SequenceNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        while not loader.check_event(events.SequenceEndEvent):
+            node.value.append(_compose(loader, anchors))
+        node.end_mark = loader.get_event().end_mark
+    elif isinstance(event, events.MappingStartEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(nodes.MappingNode, None, event.implicit)
+        node = nodes.MappingNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        while not loader.check_event(events.MappingEndEvent):
+            key = _compose(loader, anchors)
+            node.value.append((key, _compose(loader, anchors)))
+        node.end_mark = loader.get_event().end_mark
+    else:
+        raise ValueError(f"Unexpected YAML event: {event}")
+
+    if event.anchor is not None:
+        anchors[event.anchor] = node
+    return node
+
+def parse_config_file(path):
+    """
+    Streams a config file. Yields ("repository", name, config) for every entry
+    of `repositories` and ("setting", key, value) for other top-level keys.
+    A list of repositories yields a config of None for each name.
+    """
+    from yaml import events
+
+    with open(path, "rb") as stream:
+        loader = _loader_class()(stream)
+        try:
+            anchors = {}
+            loader.get_event()  # StreamStart
+            if loader.check_event(events.StreamEndEvent):
+                return
+            loader.get_event()  # DocumentStart
+            if not loader.check_event(events.MappingStartEvent):
+                if loader.check_event(events.ScalarEvent) and loader.peek_event().value == "":
+                    return
+                raise ValueError(f"Configuration file must contain a mapping: {path}")
+            loader.get_event()
+
+            while not loader.check_event(events.MappingEndEvent):
+                key = loader.construct_document(_compose(loader, anchors))
+                if key != "repositories":
+                    yield "setting", key, loader.construct_document(_compose(loader, anchors))
+                    continue
+
+                if loader.check_event(events.MappingStartEvent):
+                    loader.get_event()
+                    while not loader.check_event(events.MappingEndEvent):
+                        name = loader.construct_document(_compose(loader, anchors))
+                        yield "repository", name, loader.construct_document(_compose(loader, anchors))
+                    loader.get_event()
+                elif loader.check_event(events.SequenceStartEvent):
+                    loader.get_event()
+                    while not loader.check_event(events.SequenceEndEvent):
+                        yield "repository", loader.construct_document(_compose(loader, anchors)), None
+                    loader.get_event()
+                else:
+                    # An empty `repositories:` key
+                    loader.construct_document(_compose(loader, anchors))
+        finally:
+            loader.dispose()
+
+class ConfigSource:
+    """
+    The desired state described by one or more config files.
+
+    Files are parsed once and kept in a compiled cache keyed by their content
+    hash, so unchanged files load without parsing YAML on the next run.
+    Repositories are streamed rather than collected into one dict.
+    """
+
+    def __init__(self, source, use_cache=True, cache_dir=None):
+        self.paths = resolve_paths(source)
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir or os.path.join(default_cache_dir(), "config")
+        self._meta = {}
+        self._digests = {}
+
+    def _file_digest(self, path):
+        if path not in self._digests:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            self._digests[path] = digest.hexdigest()
+        return self._digests[path]
+
+    def _cache_base(self, path):
+        return os.path.join(self.cache_dir, f"v{CACHE_VERSION}-{self._file_digest(path)}")
+
+    def digest(self):
+        """
+        Content hash of the whole config: changes when any file is edited,
+        added, removed or reordered.
+        """
+        digest = hashlib.sha256()
+        for path in self.paths:
+            digest.update(self._file_digest(path).encode())
+        return digest.hexdigest()
+
+    def _compile(self, path, base):
+        # Entries are pickled one by one so memory stays flat; the meta
+        # file is written last and marks the cache entry as complete.
+        os.makedirs(self.cache_dir, exist_ok=True)
+        settings, count = {}, 0
+        entries_tmp = f"{base}.entries.{os.getpid()}.tmp"
+        meta_tmp = f"{base}.meta.{os.getpid()}.tmp"
+        try:
+            with open(entries_tmp, "wb") as out:
+                pickler = pickle.Pickler(out, protocol=pickle.HIGHEST_PROTOCOL)
+                for kind, key, value in parse_config_file(path):
+                    if kind == "setting":
+                        settings[key] = value
+                    else:
+                        pickler.dump((key, value))
+                        pickler.clear_memo()
+                        count += 1
+            os.replace(entries_tmp, f"{base}.entries")
+
+            meta = {"settings": settings, "count": count}
+            with open(meta_tmp, "wb") as out:
+                pickle.dump(meta, out, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(meta_tmp, f"{base}.meta")
+            return meta
+        finally:
+            # Left behind only when compiling failed partway
+            for tmp in (entries_tmp, meta_tmp):
+                with contextlib.suppress(OSError):
+                    os.remove(tmp)
+
+    def _file_meta(self, path):
+        if path in self._meta:
+            return self._meta[path]
+        meta = None
+        if self.use_cache:
+            base = self._cache_base(path)
+            try:
+                with open(f"{base}.meta", "rb") as f:
+                    meta = CacheUnpickler(f).load()
+                if not isinstance(meta, dict) or not isinstance(meta.get("settings"), dict) or "count" not in meta:
+                    raise ValueError("unexpected cache content")
+            except Exception:
+                # Missing, truncated or written by another version: compiled again
+                meta = None
+                try:
+                    meta = self._compile(path, base)
+                except OSError as e:
+                    print(f"Config cache disabled: {str(e)}", file=sys.stderr)
+                    self.use_cache = False
+        if meta is None:
+            settings, count = {}, 0
+            for kind, key, value in parse_config_file(path):
+                if kind == "setting":
+                    settings[key] = value
+                else:
+                    count += 1
+            meta = {"settings": settings, "count": count}
+        self._meta[path] = meta
+        return meta
+
+    def _file_entries(self, path):
+        if self.use_cache:
+            self._file_meta(path)
+        read = 0
+        if self.use_cache:
+            try:
+                with open(f"{self._cache_base(path)}.entries", "rb") as f:
+                    unpickler = CacheUnpickler(f)
+                    while True:
+                        try:
+                            key, value = unpickler.load()
+                        except EOFError:
+                            return
+                        yield key, value
+                        read += 1
+            except Exception as e:
+                # A damaged cache entry: the file itself is read from where the cache stopped
+                print(f"Ignoring damaged config cache for {path}: {str(e)}", file=sys.stderr)
+                with contextlib.suppress(OSError):
+                    os.remove(f"{self._cache_base(path)}.meta")
+        for kind, key, value in parse_config_file(path):
+            if kind == "repository":
+                if read:
+                    read -= 1
+                    continue
+                yield key, value
+
+    @property
+    def settings(self):
+        """
+        Top-level keys other than `repositories`, merged across files (later files win).
+        """
+        merged = {}
+        for path in self.paths:
+            merged.update(self._file_meta(path)["settings"])
+        return merged
+
+    def __len__(self):
+        return sum(self._file_meta(path)["count"] for path in self.paths)
+
+    def repositories(self):
+        """
+        Yields (repo_name, description, repo_config) for every repository.
+        Repositories listed by name get the file's top-level description and
+        no config. A repository defined twice keeps its first definition.
+        """
+        seen = set()
+        for path in self.paths:
+            description = self._file_meta(path)["settings"].get("description")
+            for repo_name, repo_config in self._file_entries(path):
+                repo_name = str(repo_name)
+                if repo_name.lower() in seen:
+                    print(f"Repository `{repo_name}` is defined more than once, ignoring {path}", file=sys.stderr)
+                    continue
+                seen.add(repo_name.lower())
+                if repo_config is None:
+                    yield repo_name, description, None
+                else:
+                    yield repo_name, repo_config.get("description"), repo_config
+
+    def repository_configs(self):
+        """
+        Returns {repo_name: repo_config} for every repository.
+        """
+        return {repo_name: repo_config or {} for repo_name, _, repo_config in self.repositories()}
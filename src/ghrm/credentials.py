@@ -0,0 +1,156 @@
+# credentials.py - GitHub App authentication and a pool of credentials
+
+import os
+import threading
+import time
+
+def _private_key():
+    key = os.getenv("GITHUB_APP_PRIVATE_KEY")
+    if key:
+        # Keys passed through CI variables often have their newlines escaped
+        return key.replace("\\n", "\n")
+    path = os.getenv("GITHUB_APP_PRIVATE_KEY_PATH")
+    if not path:
+        raise EnvironmentError("GITHUB_APP_PRIVATE_KEY or GITHUB_APP_PRIVATE_KEY_PATH must be set with GITHUB_APP_ID")
+    with open(path, "r") as f:
+        return f.read()
+
+def github_auth(org, base_url=None):
+    """
+    Returns the PyGithub Auth for the environment.
+
+    With GITHUB_APP_ID the client authenticates as the app's installation on
+    `org` (GITHUB_APP_INSTALLATION_ID, looked up when not set). Installation
+    tokens are minted from the app key, kept until shortly before they expire
+    and then minted again by PyGithub. Otherwise GITHUB_TOKEN is used.
+    """
+    from github import Auth, GithubIntegration
+
+    app_id = os.getenv("GITHUB_APP_ID")
+    if app_id:
+        app_auth = Auth.AppAuth(app_id, _private_key())
+        installation_id = os.getenv("GITHUB_APP_INSTALLATION_ID")
+        if not installation_id:
+            options = {"base_url": base_url} if base_url else {}
+            integration = GithubIntegration(
+                auth=app_auth,
+                seconds_between_requests=None,
+                seconds_between_writes=None,
+                **options
+            )
+            installation_id = integration.get_org_installation(org).id
+        return Auth.AppInstallationAuth(app_auth, int(installation_id))
+
+    github_token = os.getenv("GITHUB_TOKEN")
+    if not github_token:
+        raise EnvironmentError("GITHUB_TOKEN environment variable is not set")
+    return Auth.Token(github_token)
+
+class Credential:
+    """
+    One member of a CredentialPool: a PyGithub Auth and the primary budget
+    GitHub last reported for it.
+    """
+
+    def __init__(self, auth, label):
+        self.auth = auth
+        self.label = label
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+
+    def authorization(self):
+        # App installation tokens are minted again here once they are about to expire
+        return f"{self.auth.token_type} {self.auth.token}"
+
+    def __repr__(self):
+        return f"Credential({self.label!r}, remaining={self.remaining})"
+
+class CredentialPool:
+    """
+    Several credentials the transport rotates through: every request goes
+    out with the one that has the most primary budget left. Credentials that
+    have not been used yet go first, exhausted ones wait for their reset.
+    """
+
+    def __init__(self, credentials, clock=time.time):
+        self.credentials = list(credentials)
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.credentials)
+
+    def _budget(self, credential, now):
+        if credential.reset is not None and credential.reset <= now:
+            credential.remaining = None
+        if credential.remaining is None:
+            return float("inf")
+        return credential.remaining
+
+    def choose(self):
+        """
+        Returns the credential to send the next request with, and counts the request against it.
+        """
+        with self._lock:
+            now = self.clock()
+            credential = max(self.credentials, key=lambda c: self._budget(c, now))
+            if credential.remaining:
+                credential.remaining -= 1
+            return credential
+
+    def update(self, credential, headers):
+        """
+        Records the X-RateLimit-* headers of a response sent with `credential`.
+        """
+        if headers.get("X-RateLimit-Resource", "core") != "core":
+            return
+        remaining = headers.get("X-RateLimit-Remaining")
+        limit = headers.get("X-RateLimit-Limit")
+        if remaining is None or limit is None:
+            return
+        with self._lock:
+            credential.remaining = int(remaining)
+            credential.limit = int(limit)
+            reset = headers.get("X-RateLimit-Reset")
+            if reset is not None:
+                credential.reset = int(reset)
+
+    def available(self):
+        """
+        Tells whether any credential may still have budget left.
+        """
+        with self._lock:
+            now = self.clock()
+            return any(self._budget(credential, now) > 0 for credential in self.credentials)
+
+    def budget_headers(self, headers):
+        """
+        Returns `headers` with the X-RateLimit-* values of the whole pool, so
+        the scheduler paces requests against the combined budget.
+        """
+        with self._lock:
+            known = [credential for credential in self.credentials if credential.limit is not None]
+            if len(known) < len(self.credentials):
+                return headers
+            headers = dict(headers)
+            headers["X-RateLimit-Remaining"] = str(sum(max(c.remaining or 0, 0) for c in known))
+            headers["X-RateLimit-Limit"] = str(sum(c.limit for c in known))
+            resets = [c.reset for c in known if c.reset is not None]
+            if resets:
+                headers["X-RateLimit-Reset"] = str(min(resets))
+            return headers
+
+def credential_pool(primary):
+    """
+    Builds a CredentialPool from `primary` (the client's Auth) and the
+    comma-separated tokens in GITHUB_TOKEN_POOL. Returns None without a pool.
+    """
+    from github import Auth
+
+    tokens = [token.strip() for token in os.getenv("GITHUB_TOKEN_POOL", "").split(",") if token.strip()]
+    if not tokens:
+        return None
+    credentials = [Credential(primary, "primary")]
+    credentials.extend(Credential(Auth.Token(token), f"pool-{i + 1}") for i, token in enumerate(tokens))
+    return CredentialPool(credentials)
@@ -0,0 +1,109 @@
+# decommission.py - Plans and runs bulk repository deletion
+
+import sys
+from collections import namedtuple
+from urllib.parse import quote
+from github import GithubException
+from .engine import run_tasks, write_gate
+from .repository import get_org, get_repo, inventory_pays_off, load_inventory
+
+# One row of the decommission report. `status` is one of the statuses below,
+# `detail` explains failures.
+DecommissionResult = namedtuple("DecommissionResult", ["repository", "status", "detail"])
+
+WOULD_DELETE = "would_delete"
+DELETED = "deleted"
+ALREADY_GONE = "already_gone"
+FAILED = "failed"
+
+DEFAULT_CONCURRENCY = 8
+
+def resolve_targets(repo_names, inventory=None):
+    """
+    Returns [(requested_name, repository_name or None)] without duplicates.
+
+    With an inventory the organization's name is used (GitHub names are case
+    insensitive) and None marks repositories that do not exist. Without one
+    every name is returned as it is.
+    """
+    targets = []
+    seen = set()
+    for repo_name in repo_names:
+        repo_name = str(repo_name)
+        if repo_name.lower() in seen:
+            continue
+        seen.add(repo_name.lower())
+        if inventory is None:
+            targets.append((repo_name, repo_name))
+        else:
+            repo = inventory.get(repo_name.lower())
+            targets.append((repo_name, repo.name if repo is not None else None))
+    return targets
+
+def delete_by_name(org, repo_name):
+    """
+    Sends DELETE /repos/{org}/{repo} directly, without fetching the repository
+    first. Returns DELETED, or ALREADY_GONE when GitHub answers 404.
+    """
+    try:
+        org.requester.requestJsonAndCheck("DELETE", f"/repos/{org.login}/{quote(repo_name, safe='')}")
+        return DELETED
+    except GithubException as e:
+        if e.status == 404:
+            return ALREADY_GONE
+        raise
+
+def decommission(repo_names, dry_run=True, concurrency=DEFAULT_CONCURRENCY, inventory=None, gate=None):
+    """
+    Deletes the named repositories and yields a DecommissionResult per name, in input order.
+
+    Targets come from one listing of the organization when that is cheaper
+    than looking repositories up one by one. Deletes run concurrently and are
+    paced by the transport's write throttle; a 404 counts as already gone.
+    With `dry_run` (the default) nothing is deleted and the plan is reported
+    as WOULD_DELETE / ALREADY_GONE, using read requests only.
+    """
+    org = get_org()
+    repo_names = list(repo_names)
+    if inventory is None and inventory_pays_off(len(repo_names)):
+        inventory = load_inventory()
+    targets = resolve_targets(repo_names, inventory)
+
+    if dry_run:
+        for repo_name, target in targets:
+            if inventory is None:
+                # Small lists are checked one by one instead of listing the organization
+                repo = get_repo(repo_name)
+                target = repo.name if repo is not None else None
+            yield DecommissionResult(repo_name, WOULD_DELETE if target else ALREADY_GONE, None)
+        return
+
+    if gate is None:
+        gate = write_gate(concurrency)
+
+    def delete_task(target):
+        repo_name, name = target
+        if name is None:
+            return ALREADY_GONE
+        print(f"Deleting GitHub repository `{name}`")
+        return delete_by_name(org, name)
+
+    for task in run_tasks(delete_task, targets, concurrency, gate=gate):
+        repo_name, _ = task.item
+        if task.error is not None:
+            detail = str(task.error)
+            if isinstance(task.error, GithubException) and task.error.status == 403:
+                detail = "Permission denied"
+            print(f"Error deleting repository `{repo_name}`: {detail}", file=sys.stderr)
+            yield DecommissionResult(repo_name, FAILED, detail)
+        else:
+            yield DecommissionResult(repo_name, task.value, None)
+
+def summarize(results):
+    """
+    Counts results per status, in the order statuses first appear.
+    """
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    return counts
@@ -1,15 +1,28 @@
 # display.py - Display module for GitHub Manager CLI
 
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich.style import Style
-from rich.text import Text
+import sys
+from .metrics import registry
 
-# Initialize Rich console
-console = Console()
+# rich is imported on first use so that `ghrm --version` and `--help` stay fast
+_console = None
+
+def get_console():
+    """Returns the shared Rich console, creating it on first use"""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+def __getattr__(name):
+    # Keep `display.console` working for existing callers
+    if name == "console":
+        return get_console()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def display_result(message, status="success"):
+    from rich.panel import Panel
+
     # Define styles for different status types
     styles = {
         "success": "green",
@@ -28,12 +41,23 @@ def display_result(message, status="success"):
         padding=(1, 2)
     )
 
-    console.print("\n")
-    console.print(panel)
-    console.print("\n")
+    console = get_console()
+    with registry.timer("render"):
+        console.print("\n")
+        console.print(panel)
+        console.print("\n")
+
+def display_list(title, items, columns, format="table"):
+    """Display items in a rich table format, or stream them to stdout as NDJSON or CSV"""
+    if format == "ndjson":
+        _write_ndjson(items, columns)
+        return
+    if format == "csv":
+        _write_csv(items, columns)
+        return
+
+    from rich.table import Table
 
-def display_list(title, items, columns):
-    """Display items in a rich table format"""
     table = Table(title=title, show_header=True, header_style="bold magenta", border_style="blue")
 
     # Add columns
@@ -44,8 +68,31 @@ def display_list(title, items, columns):
     for item in items:
         table.add_row(*[str(i) for i in item])
 
-    console.print(table)
+    with registry.timer("render"):
+        get_console().print(table)
+
+def _field_names(columns):
+    return [column.lower().replace(" ", "_") for column in columns]
+
+def _write_ndjson(items, columns):
+    # One JSON object per line, written as each item arrives
+    import json
+    names = _field_names(columns)
+    for item in items:
+        with registry.timer("render"):
+            sys.stdout.write(json.dumps(dict(zip(names, item)), default=str) + "\n")
+    sys.stdout.flush()
+
+def _write_csv(items, columns):
+    import csv
+    writer = csv.writer(sys.stdout)
+    writer.writerow(_field_names(columns))
+    for item in items:
+        with registry.timer("render"):
+            writer.writerow(item)
+    sys.stdout.flush()
 
 def display_empty(message):
     """Display message for empty results"""
-    console.print(f"[italic]{message}[/italic]")
+    with registry.timer("render"):
+        get_console().print(f"[italic]{message}[/italic]")
@@ -0,0 +1,144 @@
+# drift.py - Compares the config with the repositories of the organization
+
+import sys
+from collections import namedtuple
+from .state import REST_SETTINGS, RepoState, desired_config, diff_repo_config, unread_settings
+
+IN_SYNC = "in_sync"
+DRIFTED = "drifted"
+MISSING = "missing"
+UNMANAGED = "unmanaged"
+
+# Repositories whose configured settings the listing leaves out, read together
+READ_BATCH_SIZE = 100
+
+# One row of the drift report. `changes` maps each differing setting to
+# (current, desired); `unchecked` lists configured settings GitHub did not
+# return, which could not be compared.
+DriftResult = namedtuple("DriftResult", ["repository", "status", "changes", "unchecked"])
+
+def list_repo_states(org):
+    """
+    Lists every repository of the organization and keeps only their settings
+    as RepoState objects keyed by lowercase name.
+    """
+    from .repository import list_repositories
+
+    states = {}
+    for repo in list_repositories(org):
+        states[repo["name"].lower()] = RepoState.from_rest(repo)
+    # Kept off stdout, which may carry NDJSON or CSV
+    print(f"Listed {len(states)} repositories of GitHub {org.login}", file=sys.stderr)
+    return states
+
+def read_repo_states(org, pending):
+    """
+    Reads the settings the listing left out for `pending`, a list of
+    (RepoState from the listing, desired config). The merge options and the
+    like come from one GraphQL query per READ_BATCH_SIZE repositories; a
+    repository still missing a configured setting is read through REST.
+    Returns the completed RepoState objects keyed by lowercase name.
+    """
+    from github import GithubException
+    from urllib.parse import quote
+    from . import transport
+    from .graphql import fetch_repo_states
+    from .repository import get_token
+
+    try:
+        read = fetch_repo_states(
+            org.login, [current.name for current, _ in pending], get_token(), session=transport.session()
+        )
+    except Exception as e:
+        print(f"GraphQL read failed ({str(e)}), reading repositories through REST", file=sys.stderr)
+        read = {}
+
+    states = {}
+    for current, desired in pending:
+        state = read.get(current.name.lower())
+        if state is not None:
+            # The listing's settings, completed by the GraphQL ones
+            current = current.with_changes({key: getattr(state, key) for key in REST_SETTINGS if hasattr(state, key)})
+        if unread_settings(current, desired):
+            try:
+                _, data = org.requester.requestJsonAndCheck("GET", f"/repos/{org.login}/{quote(current.name, safe='')}")
+                current = RepoState.from_rest(data)
+            except GithubException as e:
+                print(f"Could not read `{current.name}`: {str(e)}", file=sys.stderr)
+        states[current.name.lower()] = current
+    return states
+
+def compare(current, desired):
+    """
+    Returns (changes, unchecked) for one repository, see DriftResult.
+    """
+    changes = {}
+    unchecked = []
+    for key, value in diff_repo_config(current, desired).items():
+        if key == "name" and str(current.name).lower() == str(value).lower():
+            # GitHub repository names are case insensitive
+            continue
+        if hasattr(current, key):
+            changes[key] = (getattr(current, key), value)
+        else:
+            unchecked.append(key)
+    return changes, unchecked
+
+def detect_drift(entries, states, read=None):
+    """
+    Yields a DriftResult per (repo_name, description, repo_config) entry as it
+    is read, then one per repository of `states` that no entry manages.
+
+    Entries configuring settings their state lacks are compared once
+    `read(pending)` (see read_repo_states) has completed a batch of them.
+    """
+    seen = set()
+    pending = []
+
+    def result(repo_name, current, desired):
+        changes, unchecked = compare(current, desired)
+        return DriftResult(repo_name, DRIFTED if changes else IN_SYNC, changes, unchecked)
+
+    def flush():
+        completed = read([(current, desired) for _, current, desired in pending])
+        for repo_name, current, desired in pending:
+            yield result(repo_name, completed.get(repo_name.lower(), current), desired)
+        pending.clear()
+
+    for repo_name, description, repo_config in entries:
+        repo_name = str(repo_name)
+        seen.add(repo_name.lower())
+        current = states.get(repo_name.lower())
+        if current is None:
+            yield DriftResult(repo_name, MISSING, {}, [])
+            continue
+        desired = desired_config(repo_name, description, repo_config)
+        if read is not None and unread_settings(current, desired):
+            pending.append((repo_name, current, desired))
+            if len(pending) >= READ_BATCH_SIZE:
+                yield from flush()
+            continue
+        yield result(repo_name, current, desired)
+    if pending:
+        yield from flush()
+
+    for key, current in states.items():
+        if key not in seen:
+            yield DriftResult(current.name, UNMANAGED, {}, [])
+
+def drift(entries, states=None):
+    """
+    Compares config entries with the organization without changing anything.
+    The organization is read with one listing; entries are compared as they
+    stream in, so only the compact repository states are held in memory.
+    Settings the listing leaves out, such as the merge options, are read in
+    batches for the entries that configure them.
+    """
+    if states is not None:
+        return detect_drift(entries, states)
+    from .repository import get_org
+    org = get_org()
+    return detect_drift(entries, list_repo_states(org), read=lambda pending: read_repo_states(org, pending))
+
+def format_changes(changes):
+    return "; ".join(f"{key}: {current!r} -> {desired!r}" for key, (current, desired) in changes.items())
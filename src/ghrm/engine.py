@@ -0,0 +1,107 @@
+# engine.py - Execution engine for batched repository operations
+
+import sys
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+# One outcome per input item: `value` is what the task returned, `error` the
+# exception it raised. Exactly one of them is meaningful.
+TaskResult = namedtuple("TaskResult", ["item", "value", "error"])
+
+# How many tasks may be queued ahead of the one being reported, per worker
+QUEUE_DEPTH = 4
+
+_capture = threading.local()
+
+class _ThreadOutput:
+    """
+    Stand-in for sys.stdout / sys.stderr that buffers writes made from a
+    worker thread running a task, and passes everything else through.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        chunks = getattr(_capture, "chunks", None)
+        if chunks is None:
+            return self._stream.write(text)
+        chunks.append((self._stream, text))
+        return len(text)
+
+    def flush(self):
+        if getattr(_capture, "chunks", None) is None:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+@contextmanager
+def _captured_output():
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _ThreadOutput(stdout), _ThreadOutput(stderr)
+    try:
+        yield
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+def _call(func, item):
+    try:
+        return TaskResult(item, func(item), None)
+    except Exception as e:
+        return TaskResult(item, None, e)
+
+def _call_captured(func, item, gate):
+    _capture.chunks = []
+    try:
+        with gate() if gate else nullcontext():
+            return _call(func, item), _capture.chunks
+    finally:
+        _capture.chunks = None
+
+def _replay(outcome):
+    result, chunks = outcome
+    for stream, text in chunks:
+        stream.write(text)
+    return result
+
+def write_gate(concurrency):
+    """
+    Returns the default `gate` for run_tasks(): each task holds one of the
+    worker slots of the transport's scheduler, so fewer run at once as the
+    API budget runs low. None when tasks run one at a time.
+    """
+    if concurrency <= 1:
+        return None
+    # Imported here so the engine loads without requests
+    from . import transport
+
+    def gate():
+        return transport.scheduler.slot(concurrency)
+    return gate
+
+def run_tasks(func, items, concurrency=1, gate=None):
+    """
+    Runs `func` for every item and yields a TaskResult per item, in input order.
+
+    With a concurrency above one the calls run on a thread pool. Output printed
+    by a task is buffered and replayed just before its result is yielded, so
+    the console reads the same as a serial run. `gate`, when given, returns a
+    context manager each task holds while it runs, which lets the caller lower
+    the effective concurrency on the fly.
+    """
+    if concurrency <= 1:
+        for item in items:
+            yield _call(func, item)
+        return
+
+    with _captured_output(), ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(_call_captured, func, item, gate))
+            if len(pending) >= concurrency * QUEUE_DEPTH:
+                yield _replay(pending.popleft().result())
+        while pending:
+            yield _replay(pending.popleft().result())
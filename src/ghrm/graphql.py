@@ -0,0 +1,98 @@
+# graphql.py - Batched repository settings reader using the GitHub GraphQL API
+
+import os
+import time
+import requests
+from . import metrics
+from .state import RepoState
+
+DEFAULT_GRAPHQL_URL = "https://api.github.com/graphql"
+
+# Repositories looked up per query, the most GitHub allows per connection page
+BATCH_SIZE = 100
+
+REPOSITORY_FIELDS = """
+    name
+    description
+    homepageUrl
+    visibility
+    isPrivate
+    isArchived
+    hasIssuesEnabled
+    hasWikiEnabled
+    hasProjectsEnabled
+    mergeCommitAllowed
+    squashMergeAllowed
+    rebaseMergeAllowed
+    deleteBranchOnMerge
+"""
+
+class GraphQLError(Exception):
+    """Raised when the GraphQL API answers with errors other than missing repositories."""
+
+def graphql_url():
+    """
+    GITHUB_GRAPHQL_URL, or the GraphQL endpoint of the GITHUB_API_URL host:
+    https://ghe.example/api/v3 -> https://ghe.example/api/graphql. Only
+    github.com's when neither is set, so tokens stay with their host.
+    """
+    if os.getenv("GITHUB_GRAPHQL_URL"):
+        return os.getenv("GITHUB_GRAPHQL_URL")
+    api_url = (os.getenv("GITHUB_API_URL") or "").rstrip("/")
+    if not api_url:
+        return DEFAULT_GRAPHQL_URL
+    if api_url.endswith("/api/v3"):
+        return f"{api_url[:-len('/v3')]}/graphql"
+    return f"{api_url}/graphql"
+
+def build_query(count):
+    """
+    Builds a query looking up `count` repositories of one owner by name.
+    """
+    variables = ", ".join(f"$n{i}: String!" for i in range(count))
+    lookups = "\n".join(
+        f"  r{i}: repository(owner: $owner, name: $n{i}) {{ ...settings }}" for i in range(count)
+    )
+    return (
+        f"query($owner: String!, {variables}) {{\n{lookups}\n}}\n"
+        f"fragment settings on Repository {{{REPOSITORY_FIELDS}}}\n"
+    )
+
+def execute(query, variables, token, url=None, session=None):
+    """
+    Posts a GraphQL query and returns its `data` and `errors`.
+    """
+    started = time.perf_counter()
+    response = (session or requests).post(
+        url or graphql_url(),
+        json={"query": query, "variables": variables},
+        headers={"Authorization": f"bearer {token}"},
+        timeout=30
+    )
+    metrics.registry.observe("github", "POST", "/graphql", response.status_code, time.perf_counter() - started)
+    metrics.registry.rate_limit(response.headers)
+    response.raise_for_status()
+    payload = response.json()
+    return payload.get("data") or {}, payload.get("errors") or []
+
+def fetch_repo_states(owner, names, token, url=None, session=None):
+    """
+    Reads the settings of the named repositories, up to BATCH_SIZE per query.
+    Returns RepoState objects keyed by lowercase name; missing repositories are left out.
+    """
+    states = {}
+    names = list(names)
+    for start in range(0, len(names), BATCH_SIZE):
+        batch = names[start:start + BATCH_SIZE]
+        variables = {"owner": owner}
+        variables.update({f"n{i}": name for i, name in enumerate(batch)})
+
+        data, errors = execute(build_query(len(batch)), variables, token, url, session)
+        unexpected = [error for error in errors if error.get("type") != "NOT_FOUND"]
+        if unexpected:
+            raise GraphQLError("; ".join(error.get("message", str(error)) for error in unexpected))
+
+        for node in data.values():
+            if node:
+                states[node["name"].lower()] = RepoState.from_graphql(node)
+    return states
@@ -0,0 +1,128 @@
+# journal.py - Append-only journal of per-repository outcomes, for resuming interrupted runs
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+DEFAULT_JOURNAL_FILE = ".ghrm-journal.ndjson"
+JOURNAL_VERSION = 1
+
+# Records are written through a buffer and fsync'd together, at most this
+# many records or seconds apart, so the hot loop never waits on the disk
+SYNC_RECORDS = 256
+SYNC_INTERVAL = 1.0
+
+# Outcomes after which an entry needs no more work when the run is resumed.
+# Journals of older versions also hold "already_exists", recorded for
+# creations refused before any setting was applied: those are done again.
+DONE_OUTCOMES = frozenset({"created", "updated", "unchanged", "deleted", "already_gone"})
+
+def run_key(action, org, config_digest, **options):
+    """
+    Identifies what a run does: a journal is only resumed by a run with the same key.
+    """
+    content = json.dumps(
+        {"action": action, "org": org, "config": config_digest, "options": options},
+        sort_keys=True
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+class Journal:
+    """
+    Records the outcome of every repository as the run goes, one JSON line
+    each, after a header naming the run key.
+
+    With `resume` an existing journal for the same key is read first: its
+    completed entries are kept in `completed` and new records are appended.
+    Otherwise, or when the key differs, the journal starts over.
+    """
+
+    def __init__(
+        self,
+        path,
+        key,
+        resume=False,
+        sync_records=SYNC_RECORDS,
+        sync_interval=SYNC_INTERVAL,
+        clock=time.monotonic
+    ):
+        self.path = path
+        self.key = key
+        self.sync_records = sync_records
+        self.sync_interval = sync_interval
+        self.clock = clock
+        # {lowercase name: outcome} of entries a resumed run can skip
+        self.completed = {}
+        self.resumed = resume and self._load()
+        self._unsynced = 0
+        self._synced_at = clock()
+        self._file = open(path, "a" if self.resumed else "w", encoding="utf-8")
+        if self.resumed and self._file.tell():
+            # Starts the appended records on a line of their own
+            self._file.write("\n")
+        if not self.resumed:
+            self._write({"version": JOURNAL_VERSION, "run": key, "started_at": int(time.time())})
+            self.sync()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("version") != JOURNAL_VERSION or header.get("run") != self.key:
+                    return False
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a run that died while writing it
+                        continue
+                    if record.get("outcome") in DONE_OUTCOMES:
+                        self.completed[record["repository"].lower()] = record["outcome"]
+                    else:
+                        self.completed.pop(record["repository"].lower(), None)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            print(f"Ignoring unreadable journal {self.path}: {str(e)}", file=sys.stderr)
+            return False
+        return True
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def done(self, repo_name):
+        """
+        Returns the outcome of an entry the interrupted run completed, None otherwise.
+        """
+        return self.completed.get(str(repo_name).lower())
+
+    def record(self, repo_name, outcome):
+        self._write({"repository": str(repo_name), "outcome": outcome})
+        self._unsynced += 1
+        if self._unsynced >= self.sync_records or self.clock() - self._synced_at >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        """
+        Makes the records written so far durable.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced_at = self.clock()
+
+    def close(self):
+        if self._file.closed:
+            return
+        try:
+            self.sync()
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
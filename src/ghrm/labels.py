@@ -0,0 +1,157 @@
+# labels.py - Synchronises issue labels across repositories
+
+import sys
+from collections import namedtuple
+from urllib.parse import quote
+from .engine import run_tasks, write_gate
+
+DEFAULT_LABELS_FILE = "config/labels.yaml"
+# Color GitHub gives labels created without one
+DEFAULT_COLOR = "ededed"
+LABELS_PAGE_SIZE = 100
+
+# A label from labels.yaml. `aliases` are other names of the same label that
+# are renamed to `name`; `color` and `description` are None when not configured.
+LabelSpec = namedtuple("LabelSpec", ["name", "aliases", "color", "description"])
+
+# One write needed to bring a repository in line. `action` is "create",
+# "update", "rename" or "delete"; `label` is the current name of the label.
+LabelChange = namedtuple("LabelChange", ["repository", "action", "label", "payload"])
+
+# The outcome of listing a repository (change is None) or of applying a change
+LabelResult = namedtuple("LabelResult", ["repository", "change", "error"])
+
+def _color(value):
+    return str(value).lstrip("#").lower() if value is not None else None
+
+def load_label_specs(path=DEFAULT_LABELS_FILE):
+    """
+    Reads labels.yaml. Each label maps either to a list of aliases or to a
+    mapping with `aliases`, `color` and `description`.
+    """
+    import yaml
+    with open(path, "r") as f:
+        data = yaml.safe_load(f) or {}
+
+    specs = []
+    for name, value in (data.get("labels") or {}).items():
+        name = str(name)
+        if isinstance(value, dict):
+            aliases = value.get("aliases") or []
+            color, description = _color(value.get("color")), value.get("description")
+        else:
+            aliases, color, description = value or [], None, None
+        aliases = [str(alias) for alias in aliases if str(alias).lower() != name.lower()]
+        specs.append(LabelSpec(name, aliases, color, description))
+    return specs
+
+def list_labels(org, repo_name):
+    """
+    Returns every label of a repository, LABELS_PAGE_SIZE per request.
+    """
+    # Imported here so the CLI can read DEFAULT_LABELS_FILE without loading PyGithub
+    from .repository import paginate
+
+    path = f"/repos/{org.login}/{quote(repo_name, safe='')}/labels"
+    return list(paginate(org, path, page_size=LABELS_PAGE_SIZE))
+
+def diff_labels(repo_name, current, specs, prune=False):
+    """
+    Compares the labels of a repository with the configured ones and returns
+    the LabelChange list that reconciles them. Label names are compared case
+    insensitively. An alias is renamed rather than recreated so issues keep
+    their labels. Labels that are not configured are deleted only with `prune`.
+    """
+    current = {label["name"].lower(): label for label in current}
+    canonical = {spec.name.lower() for spec in specs}
+    used = set()
+    changes = []
+
+    for spec in specs:
+        label = current.get(spec.name.lower())
+        if label is not None:
+            used.add(spec.name.lower())
+            payload = {}
+            if label["name"] != spec.name:
+                payload["new_name"] = spec.name
+            if spec.color is not None and _color(label.get("color")) != spec.color:
+                payload["color"] = spec.color
+            if spec.description is not None and (label.get("description") or "") != spec.description:
+                payload["description"] = spec.description
+            if payload:
+                changes.append(LabelChange(repo_name, "update", label["name"], payload))
+            continue
+
+        alias = next(
+            (
+                current[alias.lower()] for alias in spec.aliases
+                if alias.lower() in current and alias.lower() not in used and alias.lower() not in canonical
+            ),
+            None
+        )
+        if alias is not None:
+            used.add(alias["name"].lower())
+            payload = {"new_name": spec.name}
+            if spec.color is not None:
+                payload["color"] = spec.color
+            if spec.description is not None:
+                payload["description"] = spec.description
+            changes.append(LabelChange(repo_name, "rename", alias["name"], payload))
+        else:
+            payload = {"name": spec.name, "color": spec.color or DEFAULT_COLOR}
+            if spec.description is not None:
+                payload["description"] = spec.description
+            changes.append(LabelChange(repo_name, "create", spec.name, payload))
+
+    if prune:
+        for key, label in current.items():
+            if key not in used:
+                changes.append(LabelChange(repo_name, "delete", label["name"], None))
+    return changes
+
+def describe_change(change):
+    if change.action == "rename":
+        return f"rename {change.label} -> {change.payload['new_name']}"
+    return f"{change.action} {change.label}"
+
+def apply_change(org, change):
+    url = f"/repos/{org.login}/{quote(change.repository, safe='')}/labels"
+    if change.action == "create":
+        org.requester.requestJsonAndCheck("POST", url, input=change.payload)
+    elif change.action in ("update", "rename"):
+        org.requester.requestJsonAndCheck("PATCH", f"{url}/{quote(change.label, safe='')}", input=change.payload)
+    elif change.action == "delete":
+        org.requester.requestJsonAndCheck("DELETE", f"{url}/{quote(change.label, safe='')}")
+    else:
+        raise ValueError(f"Unknown label change: {change.action}")
+    return change
+
+def sync_labels(repo_names, specs, prune=False, concurrency=8, gate=None):
+    """
+    Brings the labels of every repository in line with `specs` and yields
+    LabelResult rows: one per repository that could not be listed and one
+    per change applied.
+
+    Each repository is listed once and diffed locally; only the differences
+    are sent, concurrently and paced by the transport's write throttle.
+    """
+    # Imported here so the CLI can read DEFAULT_LABELS_FILE without loading PyGithub
+    from .repository import get_org
+
+    org = get_org()
+    if gate is None:
+        gate = write_gate(concurrency)
+
+    def plan(repo_name):
+        return diff_labels(repo_name, list_labels(org, repo_name), specs, prune)
+
+    changes = []
+    for task in run_tasks(plan, [str(name) for name in repo_names], concurrency, gate=gate):
+        if task.error is not None:
+            print(f"Error listing labels of `{task.item}`: {str(task.error)}", file=sys.stderr)
+            yield LabelResult(task.item, None, task.error)
+        else:
+            changes.extend(task.value)
+
+    for task in run_tasks(lambda change: apply_change(org, change), changes, concurrency, gate=gate):
+        yield LabelResult(task.item.repository, task.item, task.error)
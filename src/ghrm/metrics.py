@@ -0,0 +1,258 @@
+# metrics.py - Counts and times GitHub API and webhook calls
+
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Path segments replaced so calls to the same endpoint share one series
+_ENDPOINT_PATTERNS = (
+    (re.compile(r"^/api/v3(?=/)"), ""),
+    (re.compile(r"/repos/[^/]+/[^/]+"), "/repos/{owner}/{repo}"),
+    (re.compile(r"^/orgs/[^/]+"), "/orgs/{org}"),
+    (re.compile(r"^/users/[^/]+"), "/users/{user}"),
+    (re.compile(r"/teams/[^/]+"), "/teams/{team}"),
+    (re.compile(r"/labels/[^/]+"), "/labels/{name}"),
+    (re.compile(r"/(branches|contents|git/refs)/.+"), r"/\1/{ref}"),
+    (re.compile(r"/\d+(?=/|$)"), "/{id}"),
+)
+
+def endpoint_template(path):
+    """
+    Turns a request path into an endpoint template, e.g.
+    /repos/acme/api?per_page=100 -> /repos/{owner}/{repo}.
+    """
+    path = path.split("?", 1)[0]
+    for pattern, replacement in _ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return path or "/"
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def quantile(self, share):
+        """
+        Upper bound of the bucket holding the given share of observations.
+        """
+        if not self.count:
+            return 0.0
+        rank = share * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def cumulative(self):
+        # (le, count) pairs as used by Prometheus histograms
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield str(bound), total
+        yield "+Inf", self.count
+
+class Metrics:
+    """
+    Per-endpoint call counts and latency histograms, retries, rate-limit
+    budget consumed and time spent in named phases (e.g. rendering).
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._latency = {}
+        self._retries = {}
+        self._phases = {}
+        # {resource: {reset: [first used, last used, remaining, limit]}}
+        self._budget = {}
+
+    def observe(self, service, method, endpoint, status, seconds):
+        with self._lock:
+            key = (service, method, endpoint, str(status))
+            self._calls[key] = self._calls.get(key, 0) + 1
+            key = (service, method, endpoint)
+            if key not in self._latency:
+                self._latency[key] = Histogram()
+            self._latency[key].observe(seconds)
+
+    def retry(self, service, method, endpoint):
+        with self._lock:
+            key = (service, method, endpoint)
+            self._retries[key] = self._retries.get(key, 0) + 1
+
+    def rate_limit(self, headers):
+        """
+        Records the X-RateLimit-* headers of a GitHub response.
+        """
+        used = headers.get("X-RateLimit-Used")
+        reset = headers.get("X-RateLimit-Reset")
+        remaining = headers.get("X-RateLimit-Remaining")
+        limit = headers.get("X-RateLimit-Limit")
+        if used is None or reset is None:
+            return
+        resource = headers.get("X-RateLimit-Resource", "core")
+        with self._lock:
+            windows = self._budget.setdefault(resource, {})
+            window = windows.get(reset)
+            if window is None:
+                # The first response of a window has already used its own request
+                windows[reset] = [int(used) - 1, int(used), remaining, limit]
+            else:
+                window[0] = min(window[0], int(used) - 1)
+                window[1] = max(window[1], int(used))
+                window[2], window[3] = remaining, limit
+
+    @contextmanager
+    def timer(self, phase):
+        started = self.clock()
+        try:
+            yield
+        finally:
+            elapsed = self.clock() - started
+            with self._lock:
+                count, seconds = self._phases.get(phase, (0, 0.0))
+                self._phases[phase] = (count + 1, seconds + elapsed)
+
+    def snapshot(self, extra=None):
+        """
+        Returns every metric as a JSON-serialisable dict.
+        """
+        with self._lock:
+            endpoints = []
+            for (service, method, endpoint), histogram in sorted(self._latency.items()):
+                statuses = {
+                    status: count
+                    for (s, m, e, status), count in sorted(self._calls.items())
+                    if (s, m, e) == (service, method, endpoint)
+                }
+                endpoints.append({
+                    "service": service,
+                    "method": method,
+                    "endpoint": endpoint,
+                    "count": histogram.count,
+                    "status": statuses,
+                    "retries": self._retries.get((service, method, endpoint), 0),
+                    "latency_seconds": {
+                        "sum": round(histogram.sum, 6),
+                        "p50": round(histogram.quantile(0.5), 6),
+                        "p95": round(histogram.quantile(0.95), 6),
+                        "max": round(histogram.max, 6),
+                    },
+                })
+            rate_limit = {}
+            for resource, windows in self._budget.items():
+                last = list(windows.values())[-1]
+                rate_limit[resource] = {
+                    "consumed": sum(window[1] - window[0] for window in windows.values()),
+                    "remaining": int(last[2]) if last[2] is not None else None,
+                    "limit": int(last[3]) if last[3] is not None else None,
+                }
+            phases = {
+                phase: {"count": count, "seconds": round(seconds, 6)}
+                for phase, (count, seconds) in self._phases.items()
+            }
+        snapshot = {
+            "wall_seconds": round(self.clock() - self.started, 6),
+            "endpoints": endpoints,
+            "rate_limit": rate_limit,
+            "phases": phases,
+        }
+        snapshot.update(extra or {})
+        return snapshot
+
+    def to_prometheus(self, extra=None):
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+
+        def family(name, kind, text):
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(**values):
+            return ",".join(f'{key}="{_escape(value)}"' for key, value in values.items())
+
+        with self._lock:
+            calls = sorted(self._calls.items())
+            latency = sorted(self._latency.items())
+            retries = sorted(self._retries.items())
+            phases = sorted(self._phases.items())
+
+        family("ghrm_requests_total", "counter", "HTTP requests sent, by endpoint and status.")
+        for (service, method, endpoint, status), count in calls:
+            series = labels(service=service, method=method, endpoint=endpoint, status=status)
+            lines.append(f"ghrm_requests_total{{{series}}} {count}")
+
+        family("ghrm_request_duration_seconds", "histogram", "HTTP request latency.")
+        for (service, method, endpoint), histogram in latency:
+            base = labels(service=service, method=method, endpoint=endpoint)
+            for le, count in histogram.cumulative():
+                lines.append(f'ghrm_request_duration_seconds_bucket{{{base},le="{le}"}} {count}')
+            lines.append(f"ghrm_request_duration_seconds_sum{{{base}}} {histogram.sum:.6f}")
+            lines.append(f"ghrm_request_duration_seconds_count{{{base}}} {histogram.count}")
+
+        family("ghrm_retries_total", "counter", "Requests retried after a rate limit or a transient failure.")
+        for (service, method, endpoint), count in retries:
+            lines.append(f"ghrm_retries_total{{{labels(service=service, method=method, endpoint=endpoint)}}} {count}")
+
+        snapshot = self.snapshot(extra)
+        family("ghrm_rate_limit_consumed", "gauge", "GitHub rate-limit budget used by this run.")
+        for resource, budget in sorted(snapshot["rate_limit"].items()):
+            lines.append(f"ghrm_rate_limit_consumed{{{labels(resource=resource)}}} {budget['consumed']}")
+        family("ghrm_rate_limit_remaining", "gauge", "GitHub rate-limit budget left at the end of the run.")
+        for resource, budget in sorted(snapshot["rate_limit"].items()):
+            if budget["remaining"] is not None:
+                lines.append(f"ghrm_rate_limit_remaining{{{labels(resource=resource)}}} {budget['remaining']}")
+
+        family("ghrm_phase_seconds_total", "counter", "Time spent in each phase of the run.")
+        for phase, (_, seconds) in phases:
+            lines.append(f"ghrm_phase_seconds_total{{{labels(phase=phase)}}} {seconds:.6f}")
+
+        for name, value in sorted((extra or {}).items()):
+            if isinstance(value, (int, float)):
+                family(f"ghrm_{name}", "gauge", f"{name.replace('_', ' ').capitalize()}.")
+                lines.append(f"ghrm_{name} {value}")
+
+        family("ghrm_run_seconds", "gauge", "Wall time of the run.")
+        lines.append(f"ghrm_run_seconds {snapshot['wall_seconds']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, extra=None):
+        """
+        Writes the metrics to `path`: a Prometheus textfile for .prom files, JSON otherwise.
+        """
+        if path.endswith(".prom"):
+            content = self.to_prometheus(extra)
+        else:
+            content = json.dumps(self.snapshot(extra), indent=2) + "\n"
+        with open(path, "w") as f:
+            f.write(content)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# Shared by the transport, the GraphQL reader and the notification webhooks
+registry = Metrics()
@@ -0,0 +1,147 @@
+# digest.py - Coalesces notifications into periodic summary messages
+
+import threading
+from collections import OrderedDict
+from .discord import COLORS as DISCORD_COLORS, build_discord_embed
+from .slack import COLORS as SLACK_COLORS
+
+# Slack truncates long attachment text, keep each attachment below this
+SLACK_TEXT_LIMIT = 3000
+SLACK_ATTACHMENTS_PER_MESSAGE = 20
+# Discord message limits
+DISCORD_EMBEDS_PER_MESSAGE = 10
+DISCORD_FIELDS_PER_EMBED = 25
+DISCORD_FIELD_VALUE_LIMIT = 1024
+DISCORD_MESSAGE_CHAR_LIMIT = 6000
+# Repositories named per group; the rest are only counted
+MAX_NAMES_PER_GROUP = 100
+
+class DigestGroup:
+    def __init__(self, action, status):
+        self.action = action
+        self.status = status
+        self.count = 0
+        self.entries = []
+
+    def add(self, details):
+        self.count += 1
+        if len(self.entries) >= MAX_NAMES_PER_GROUP:
+            return
+        if isinstance(details, dict):
+            entry = str(details.get("Repository") or details.get("Action") or "")
+            if details.get("Error"):
+                entry = f"{entry}: {details['Error']}" if entry else str(details["Error"])
+        else:
+            entry = str(details)
+        self.entries.append(entry)
+
+    @property
+    def omitted(self):
+        return self.count - len(self.entries)
+
+class DigestCollector:
+    """
+    Groups notification events by action and status until drained.
+    """
+
+    def __init__(self):
+        self._groups = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, action, details, status="success"):
+        with self._lock:
+            key = (action, status)
+            if key not in self._groups:
+                self._groups[key] = DigestGroup(action, status)
+            self._groups[key].add(details)
+
+    def drain(self):
+        """
+        Returns the collected groups and starts a new digest.
+        """
+        with self._lock:
+            groups = list(self._groups.values())
+            self._groups = OrderedDict()
+        return groups
+
+def _chunks(lines, limit):
+    # Joins lines into newline-separated chunks no longer than `limit`
+    chunk = ""
+    for line in lines:
+        line = line[:limit]
+        if chunk and len(chunk) + 1 + len(line) > limit:
+            yield chunk
+            chunk = ""
+        chunk = f"{chunk}\n{line}" if chunk else line
+    if chunk:
+        yield chunk
+
+def build_slack_digest(groups):
+    """
+    Builds Slack payloads for a digest: one attachment per group, split when
+    the text would exceed SLACK_TEXT_LIMIT.
+    """
+    attachments = []
+    for group in groups:
+        lines = [f"*{group.action}*: {group.count}"]
+        lines += [f"• {entry}" for entry in group.entries]
+        if group.omitted:
+            lines.append(f"… and {group.omitted} more")
+        for text in _chunks(lines, SLACK_TEXT_LIMIT):
+            attachments.append({"color": SLACK_COLORS.get(group.status, "#0000ff"), "text": text})
+    return [
+        {
+            "text": "*GitHub Manager: run summary*",
+            "attachments": attachments[start:start + SLACK_ATTACHMENTS_PER_MESSAGE]
+        }
+        for start in range(0, len(attachments), SLACK_ATTACHMENTS_PER_MESSAGE)
+    ]
+
+def _embed_size(embed):
+    return len(embed["title"]) + sum(len(field["name"]) + len(field["value"]) for field in embed["fields"])
+
+def _group_embeds(group):
+    # One or more embeds per group, each starting with the group count
+    lines = [f"• {entry}" for entry in group.entries]
+    if group.omitted:
+        lines.append(f"… and {group.omitted} more")
+
+    embeds = []
+    for value in _chunks(lines, DISCORD_FIELD_VALUE_LIMIT):
+        field = {"name": "\u200b", "value": value, "inline": False}
+        if (not embeds
+                or len(embeds[-1]["fields"]) >= DISCORD_FIELDS_PER_EMBED
+                or _embed_size(embeds[-1]) + len(value) + 1 > DISCORD_MESSAGE_CHAR_LIMIT):
+            embeds.append(_new_group_embed(group))
+        embeds[-1]["fields"].append(field)
+    return embeds or [_new_group_embed(group)]
+
+def _new_group_embed(group):
+    return build_discord_embed(
+        title=f"GitHub Manager: {group.action}",
+        description=None,
+        color=DISCORD_COLORS.get(group.status, 0x00ff00),
+        fields=[{"name": "Repositories", "value": str(group.count), "inline": False}]
+    )
+
+def build_discord_digest(groups):
+    """
+    Builds Discord payloads for a digest within the webhook limits: at most
+    10 embeds and 6000 characters per message, 25 fields of 1024 characters per embed.
+    """
+    messages = []
+    current, size = [], 0
+    for group in groups:
+        for embed in _group_embeds(group):
+            embed_size = _embed_size(embed)
+            if current and (
+                len(current) >= DISCORD_EMBEDS_PER_MESSAGE
+                or size + embed_size > DISCORD_MESSAGE_CHAR_LIMIT
+            ):
+                messages.append({"embeds": current})
+                current, size = [], 0
+            current.append(embed)
+            size += embed_size
+    if current:
+        messages.append({"embeds": current})
+    return messages
@@ -1,17 +1,53 @@
 # discord.py - Sends notifications to Discord channels
 
 import os
-from datetime import datetime
-import requests
-from rich.console import Console
+from datetime import datetime, timezone
+from ..display import get_console
+from .webhook import post_webhook
 
-console = Console()
+# Define colors for different statuses
+COLORS = {
+    "success": 0x00ff00,  # Green
+    "warning": 0xffff00,  # Yellow
+    "error": 0xff0000,    # Red
+    "info": 0x0000ff     # Blue
+}
+
+def build_discord_embed(title, description, color=0x00ff00, fields=None):
+    return {
+        "title": title,
+        "description": description,
+        "color": color,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "fields": fields or []
+    }
+
+def build_discord_payload(action, details, status="success"):
+    """Builds the webhook payload for a single notification"""
+    # Create fields based on details
+    fields = []
+    if isinstance(details, dict):
+        fields = [
+            {"name": key, "value": str(value), "inline": True}
+            for key, value in details.items()
+        ]
+
+    embed = build_discord_embed(
+        title=f"GitHub Manager: {action}",
+        description=str(details) if not isinstance(details, dict) else None,
+        color=COLORS.get(status, 0x00ff00),
+        fields=fields if fields else None
+    )
+    return {"embeds": [embed]}
 
 class DiscordNotifier:
-    def __init__(self):
+    def __init__(self, session=None):
         self.webhook_url = os.getenv('DISCORD_WEBHOOK_URL')
+        self.session = session
         if not self.webhook_url:
-            console.print("[bold red]Warning: DISCORD_WEBHOOK_URL not set. Notifications will be disabled.[/bold red]")
+            get_console().print(
+                "[bold red]Warning: DISCORD_WEBHOOK_URL not set. Notifications will be disabled.[/bold red]"
+            )
 
     def send_discord_notification(self, title, description, color=0x00ff00, fields=None):
         """
@@ -22,50 +58,22 @@ class DiscordNotifier:
         if not self.webhook_url:
             return
 
-        embed = {
-            "title": title,
-            "description": description,
-            "color": color,
-            "timestamp": datetime.utcnow().isoformat(),
-            "fields": fields or []
-        }
-
         data = {
-            "embeds": [embed]
+            "embeds": [build_discord_embed(title, description, color, fields)]
         }
+        self.send_payload(data)
 
+    def send_payload(self, data):
+        """Post a prepared payload, retrying when Discord rate limits the webhook"""
+        import requests
         try:
-            response = requests.post(
-                self.webhook_url,
-                json=data
-            )
+            response = post_webhook(self.webhook_url, data, self.session, service="discord")
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
-            console.print(f"[bold red]Failed to send Discord notification: {str(e)}[/bold red]")
+            get_console().print(f"[bold red]Failed to send Discord notification: {str(e)}[/bold red]")
 
-def send_discord_notification(action, details, status="success"):
+def send_discord_notification(action, details, status="success", session=None):
     """Helper function to create and send notifications"""
-    notifier = DiscordNotifier()
-
-    # Define colors for different statuses
-    colors = {
-        "success": 0x00ff00,  # Green
-        "warning": 0xffff00,  # Yellow
-        "error": 0xff0000,    # Red
-        "info": 0x0000ff     # Blue
-    }
-
-    # Create fields based on details
-    fields = []
-    if isinstance(details, dict):
-        fields = [
-            {"name": key, "value": str(value), "inline": True}
-            for key, value in details.items()
-        ]
-
-    notifier.send_discord_notification(
-        title=f"GitHub Manager: {action}",
-        description=str(details) if not isinstance(details, dict) else None,
-        color=colors.get(status, 0x00ff00),
-        fields=fields if fields else None
-    )
+    notifier = DiscordNotifier(session)
+    if notifier.webhook_url:
+        notifier.send_payload(build_discord_payload(action, details, status))
@@ -0,0 +1,140 @@
+# dispatcher.py - Delivers notifications in the background
+
+import atexit
+import queue
+import sys
+import threading
+from .webhook import post_webhook
+from .slack import build_slack_payload
+from .discord import build_discord_payload
+from .digest import DigestCollector, build_slack_digest, build_discord_digest
+
+# Notifications waiting per backend before submit() starts to wait
+DEFAULT_QUEUE_SIZE = 1000
+
+_STOP = object()
+
+class WebhookBackend:
+    """
+    One webhook target with its own bounded queue and worker thread, so a
+    slow or rate-limited service never delays the others. Connections come
+    from the pool the webhooks share.
+    """
+
+    def __init__(self, name, url, build_payload, build_digest, maxsize=DEFAULT_QUEUE_SIZE):
+        from ..transport import session
+        self.name = name
+        self.url = url
+        self.build_payload = build_payload
+        self.build_digest = build_digest
+        self.session = session("webhook")
+        self.sent = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._run, name=f"ghrm-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, action, details, status):
+        self._queue.put((action, details, status))
+
+    def submit_payload(self, payload):
+        self._queue.put(payload)
+
+    def _run(self):
+        while True:
+            message = self._queue.get()
+            try:
+                if message is _STOP:
+                    return
+                payload = self.build_payload(*message) if isinstance(message, tuple) else message
+                self._deliver(payload)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, payload):
+        try:
+            response = post_webhook(self.url, payload, self.session, service=self.name.lower())
+            if response.status_code >= 400:
+                raise RuntimeError(f"status code {response.status_code}")
+            self.sent += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Failed to send {self.name} notification: {str(e)}", file=sys.stderr)
+
+    def close(self, timeout=None):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+class NotificationDispatcher:
+    """
+    Queues notifications for Slack and Discord and sends them from background
+    threads. close() (also run at interpreter exit) waits for the queues to drain.
+
+    In "digest" mode events are grouped by action and status and sent as
+    summary messages when the dispatcher is flushed or closed, and every
+    `window` seconds when a window is given.
+    """
+
+    def __init__(self, slack_url=None, discord_url=None, mode="event", window=None, maxsize=DEFAULT_QUEUE_SIZE):
+        if mode not in ("event", "digest"):
+            raise ValueError(f"Unknown notification mode: {mode}")
+        self.mode = mode
+        self.backends = []
+        if slack_url:
+            self.backends.append(
+                WebhookBackend("Slack", slack_url, build_slack_payload, build_slack_digest, maxsize)
+            )
+        if discord_url:
+            self.backends.append(
+                WebhookBackend("Discord", discord_url, build_discord_payload, build_discord_digest, maxsize)
+            )
+        self._digest = DigestCollector() if mode == "digest" else None
+        self._closed = False
+        self._stopped = threading.Event()
+        if self._digest is not None and window and self.backends:
+            threading.Thread(target=self._flush_every, args=(window,), name="ghrm-digest", daemon=True).start()
+        atexit.register(self.close)
+
+    def submit(self, action, details, status="success"):
+        """
+        Queues a notification. Only waits if a backend is DEFAULT_QUEUE_SIZE messages behind.
+        """
+        if not self.backends:
+            return
+        if self._digest is not None:
+            self._digest.add(action, details, status)
+            return
+        for backend in self.backends:
+            backend.submit(action, details, status)
+
+    def flush(self):
+        """
+        Queues the summary of everything collected since the last flush (digest mode).
+        """
+        if self._digest is None:
+            return
+        groups = self._digest.drain()
+        if not groups:
+            return
+        for backend in self.backends:
+            for payload in backend.build_digest(groups):
+                backend.submit_payload(payload)
+
+    def _flush_every(self, window):
+        while not self._stopped.wait(window):
+            self.flush()
+
+    def close(self, timeout=None):
+        """
+        Sends everything still queued and stops the worker threads.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        # Lets a closed dispatcher be collected before the interpreter exits
+        atexit.unregister(self.close)
+        self._stopped.set()
+        self.flush()
+        for backend in self.backends:
+            backend.close(timeout)
@@ -1,36 +1,30 @@
 # slack.py - Sends notifications to Slack channels
 
 import os
-import requests
-from rich.console import Console
-from rich.markdown import Markdown
+from ..display import get_console
+from .webhook import post_webhook
 
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
-console = Console()
 
-def send_slack_notification(title, details, status="info"):
+# Define colors for different statuses
+COLORS = {
+    "success": "#36a64f",  # Green
+    "warning": "#ffcc00",  # Yellow
+    "error": "#ff0000",    # Red
+    "info": "#0000ff"      # Blue
+}
+
+def build_slack_payload(title, details, status="info"):
     """
-    Sends a notification message to a Slack channel using a webhook.
+    Builds the webhook payload for a notification message.
     Args:
         title (str): The title of the message.
         details (dict or str): The details of the message.
         status (str): The status of the message (info, success, warning, error).
 
     Returns:
-        response: Response object from the Slack API request.
+        dict: Slack webhook payload.
     """
-    if not SLACK_WEBHOOK_URL:
-        console.print("[bold red]Error: SLACK_WEBHOOK_URL is not configured.[/bold red]")
-        return None
-
-    # Define colors for different statuses
-    colors = {
-        "success": "#36a64f",  # Green
-        "warning": "#ffcc00",  # Yellow
-        "error": "#ff0000",    # Red
-        "info": "#0000ff"      # Blue
-    }
-
     # Create the message
     if isinstance(details, dict):
         details_str = "\n".join([f"*{key}*: {value}" for key, value in details.items()])
@@ -38,16 +32,34 @@ def send_slack_notification(title, details, status="info"):
         details_str = details
 
     markdown_message = f"*{title}*\n{details_str}"
-    payload = {
+    return {
         "attachments": [
             {
-                "color": colors.get(status, "#0000ff"),
+                "color": COLORS.get(status, "#0000ff"),
                 "text": markdown_message
             }
         ]
     }
 
-    response = requests.post(SLACK_WEBHOOK_URL, json=payload)
+def send_slack_notification(title, details, status="info", session=None):
+    """
+    Sends a notification message to a Slack channel using a webhook.
+    Args:
+        title (str): The title of the message.
+        details (dict or str): The details of the message.
+        status (str): The status of the message (info, success, warning, error).
+        session (requests.Session): Optional session to reuse connections.
+
+    Returns:
+        response: Response object from the Slack API request.
+    """
+    console = get_console()
+    if not SLACK_WEBHOOK_URL:
+        console.print("[bold red]Error: SLACK_WEBHOOK_URL is not configured.[/bold red]")
+        return None
+
+    payload = build_slack_payload(title, details, status)
+    response = post_webhook(SLACK_WEBHOOK_URL, payload, session, service="slack")
 
     if response.status_code == 200:
         console.print("[bold green]Notification sent successfully.[/bold green]")
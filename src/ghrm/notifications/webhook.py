@@ -0,0 +1,48 @@
+# webhook.py - Shared HTTP handling for notification webhooks
+
+import time
+from .. import metrics
+
+# Seconds to wait for a webhook to answer
+WEBHOOK_TIMEOUT = 10
+# Attempts made after a 429 before giving up on a message
+MAX_RETRIES = 3
+
+def retry_after(response):
+    """
+    Seconds to wait before retrying a rate-limited webhook call. Slack and
+    Discord both send Retry-After, Discord also puts `retry_after` in the body.
+    """
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    try:
+        return float(response.json().get("retry_after", 1))
+    except (ValueError, AttributeError):
+        return 1.0
+
+def post_webhook(url, payload, session=None, max_retries=MAX_RETRIES, service="webhook"):
+    """
+    Posts a JSON payload to a webhook, waiting and retrying when rate limited.
+    Returns the last response. Calls are recorded under `service`, never the URL.
+    """
+    if session is None:
+        from ..transport import session as shared_session
+        session = shared_session("webhook")
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            response = session.post(url, json=payload, timeout=WEBHOOK_TIMEOUT)
+        except Exception as e:
+            metrics.registry.observe(service, "POST", "webhook", type(e).__name__, time.perf_counter() - started)
+            raise
+        metrics.registry.observe(service, "POST", "webhook", response.status_code, time.perf_counter() - started)
+        if response.status_code != 429 or attempt >= max_retries:
+            return response
+        metrics.registry.retry(service, "POST", "webhook")
+        attempt += 1
+        time.sleep(retry_after(response))
@@ -0,0 +1,156 @@
+# orgs.py - Runs an action for several organizations in parallel
+
+import contextlib
+import io
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# One organization from the `organizations` config setting. `token_env` names
+# the environment variable holding its token, `config` is its config file,
+# directory or glob, `api_url` its API (GitHub Enterprise), None for github.com.
+# `token_pool_env` names the variable holding its extra tokens, `installation_id`
+# is its GitHub App installation and `graphql_url` its GraphQL endpoint when it
+# is not the one of `api_url`; all three are None when not configured.
+OrgTarget = namedtuple(
+    "OrgTarget",
+    ["org", "token_env", "config", "api_url", "token_pool_env", "installation_id", "graphql_url"],
+    defaults=(None, None, None)
+)
+
+# What a worker process reports back. `counts` maps outcomes to repositories,
+# `metrics` is the worker's metrics snapshot, `output` what it printed.
+OrgResult = namedtuple("OrgResult", ["org", "counts", "error", "metrics", "output", "seconds"])
+
+DEFAULT_TOKEN_ENV = "GITHUB_TOKEN"
+
+def load_organizations(settings, base_dir="."):
+    """
+    Reads the `organizations` setting:
+
+        organizations:
+          acme:
+            token_env: ACME_GITHUB_TOKEN
+            config: acme/
+          globex:
+            config: globex.yaml
+            api_url: https://github.globex.example/api/v3
+            token_pool_env: GLOBEX_TOKEN_POOL
+            app_installation_id: 1234
+
+    `config` paths are relative to `base_dir`. Organizations without
+    `token_env` use GITHUB_TOKEN. Returns a list of OrgTarget.
+    """
+    organizations = settings.get("organizations") or {}
+    if not isinstance(organizations, dict):
+        raise ValueError("`organizations` must map organization names to their settings")
+    targets = []
+    for org, options in organizations.items():
+        options = options or {}
+        if not options.get("config"):
+            raise ValueError(f"Organization `{org}` has no `config`")
+        targets.append(OrgTarget(
+            str(org),
+            options.get("token_env") or DEFAULT_TOKEN_ENV,
+            os.path.join(base_dir, str(options["config"])),
+            options.get("api_url"),
+            options.get("token_pool_env"),
+            str(options["app_installation_id"]) if options.get("app_installation_id") else None,
+            options.get("graphql_url")
+        ))
+    return targets
+
+def org_environment(target):
+    """
+    Returns the environment variables a worker process sets for `target`;
+    None means the variable is removed. Settings that belong to one
+    organization (its token pool, App installation and GraphQL endpoint) are
+    only kept when the organization configures them, so they never leak from
+    the parent's environment into another organization's requests.
+    """
+    return {
+        "GITHUB_ORG": target.org,
+        "GITHUB_TOKEN": os.getenv(target.token_env) or None,
+        "GITHUB_TOKEN_POOL": os.getenv(target.token_pool_env) if target.token_pool_env else None,
+        # Looked up for the organization when not configured
+        "GITHUB_APP_INSTALLATION_ID": target.installation_id,
+        # Left to the shared API URL when not configured
+        **({"GITHUB_API_URL": target.api_url} if target.api_url else {}),
+        # Derived from the API URL when not configured
+        "GITHUB_GRAPHQL_URL": target.graphql_url,
+    }
+
+def org_path(path, org):
+    """
+    Gives every organization its own file: .ghrm-state.json -> .ghrm-state.acme.json
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.{org}{ext}"
+
+def run_org(target, args):
+    """
+    Runs the action for one organization. This is the entry point of the
+    worker processes, each of which has its own client, rate-limit scheduler
+    and metrics.
+    """
+    from argparse import Namespace
+    from .metrics import registry
+
+    started = time.perf_counter()
+    output = io.StringIO()
+    counts, error = {}, None
+    token = os.getenv(target.token_env)
+    if not token and not os.getenv("GITHUB_APP_ID"):
+        error = f"{target.token_env} is not set"
+    else:
+        for name, value in org_environment(target).items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+        from .cli import run_action, write_metrics
+
+        org_args = Namespace(**vars(args))
+        org_args.organization = target.org
+        org_args.config = target.config
+        org_args.state_file = org_path(args.state_file, target.org)
+        org_args.journal = org_path(args.journal, target.org)
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            try:
+                counts = run_action(org_args) or {}
+            except SystemExit as e:
+                error = f"exited with status {e.code}"
+            except Exception as e:
+                error = str(e)
+            if args.metrics_out:
+                write_metrics(org_path(args.metrics_out, target.org))
+    return OrgResult(
+        target.org,
+        counts,
+        error,
+        registry.snapshot(),
+        output.getvalue(),
+        round(time.perf_counter() - started, 3)
+    )
+
+def fan_out(targets, args, processes=None):
+    """
+    Runs the action for every organization in its own process and yields
+    their OrgResult in input order, each as soon as it and those before it are done.
+    """
+    processes = processes or len(targets)
+    # Worker processes start clean instead of inheriting the parent's client and threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+        futures = [executor.submit(run_org, target, args) for target in targets]
+        for target, future in zip(targets, futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield OrgResult(target.org, {}, f"worker failed: {str(e)}", {}, "", 0.0)
+
+def format_counts(counts):
+    return ", ".join(f"{outcome} {count}" for outcome, count in counts.items()) or "nothing to do"
@@ -0,0 +1,202 @@
+# progress.py - Per-repository output: text lines, a live progress view or NDJSON
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from .display import display_empty, display_list, get_console
+from .metrics import registry
+
+TEXT = "text"
+PROGRESS = "progress"
+NDJSON = "ndjson"
+
+# Text line and style per outcome; other outcomes are printed as they are
+MESSAGES = {
+    "created": ("GitHub repository created: ", "bold green"),
+    "updated": ("GitHub repository updated: ", "bold blue"),
+    "unchanged": ("GitHub repository unchanged: ", "bold"),
+    "deleted": ("GitHub repository deleted: ", "bold red"),
+    "would_delete": ("GitHub repository would be deleted: ", "bold yellow"),
+    "already_gone": ("GitHub repository already gone: ", "bold"),
+}
+
+def default_output(stream=None):
+    """
+    The live view needs a terminal; logs and pipes get one line per repository.
+    """
+    stream = stream or sys.stderr
+    try:
+        return PROGRESS if stream.isatty() else TEXT
+    except (AttributeError, ValueError):
+        return TEXT
+
+class _Discard:
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+class Reporter:
+    """
+    Reports the outcome of every repository of an action.
+
+    `text` prints one line per repository, `progress` a live view on stderr
+    with counters and throughput, `ndjson` one compact JSON record per
+    repository on stdout. With `quiet` only errors are reported. All of them
+    end with a summary of the outcomes.
+    """
+
+    def __init__(self, action, output=TEXT, quiet=False, stream=None, clock=time.perf_counter):
+        self.action = action
+        self.output = output
+        self.quiet = quiet
+        # Kept before stdout is muted, for NDJSON records
+        self.stream = stream or sys.stdout
+        self.clock = clock
+        self.counts = {}
+        self.started = clock()
+        self._progress = None
+        self._task = None
+
+    @property
+    def verbose(self):
+        """Whether progress messages and tables go to stdout"""
+        return not self.quiet and self.output != NDJSON
+
+    @contextmanager
+    def muted(self):
+        """
+        Discards what the action prints to stdout itself, such as the lookup
+        of every repository, for NDJSON output and when quiet.
+        """
+        if self.verbose:
+            yield
+            return
+        stdout = sys.stdout
+        sys.stdout = _Discard()
+        try:
+            yield
+        finally:
+            sys.stdout = stdout
+
+    @contextmanager
+    def track(self, total=None):
+        """
+        Shows the live view while the repositories are processed.
+        """
+        if self.output != PROGRESS or self.quiet:
+            yield
+            return
+        from rich.console import Console
+        from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+
+        progress = Progress(
+            TextColumn("[bold]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TextColumn("{task.fields[counts]}"),
+            TextColumn("{task.fields[rate]}"),
+            TimeElapsedColumn(),
+            console=Console(stderr=True),
+            redirect_stdout=False
+        )
+        self._task = progress.add_task(self.action, total=total, counts="", rate="")
+        self._progress = progress
+        stdout = sys.stdout
+        # Lookups and other chatter would break up the view
+        sys.stdout = _Discard()
+        try:
+            with progress:
+                yield
+        finally:
+            sys.stdout = stdout
+            self._progress = None
+
+    def result(self, repository, outcome, detail=None, error=None):
+        """
+        Reports one repository. `error`, when given, is the exception it failed with.
+        """
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        with registry.timer("render"):
+            if self.output == NDJSON and not self.quiet:
+                record = {"action": self.action, "repository": repository, "outcome": outcome}
+                if detail:
+                    record["detail"] = detail
+                if error is not None:
+                    record["error"] = str(error)
+                self.stream.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+                self.stream.flush()
+                return
+            if error is not None:
+                self._error(repository, error)
+            elif self.verbose and self._progress is None:
+                self._line(repository, outcome, detail)
+            if self._progress is not None:
+                elapsed = max(self.clock() - self.started, 1e-9)
+                self._progress.update(
+                    self._task,
+                    advance=1,
+                    counts=self.format_counts(),
+                    rate=f"{sum(self.counts.values()) / elapsed:.1f}/s"
+                )
+
+    def _line(self, repository, outcome, detail):
+        from rich.text import Text
+
+        if outcome in MESSAGES:
+            prefix, style = MESSAGES[outcome]
+            parts = [prefix, (repository, style)]
+        else:
+            # Label changes and the like read `web: rename bug -> type: bug`
+            parts = [(repository, "bold"), f": {detail or outcome}"]
+        get_console().print(Text.assemble(*parts))
+
+    def _error(self, repository, error):
+        from rich.console import Console
+        from rich.text import Text
+
+        message = Text.assemble("Error processing ", (repository, "bold"), ": ", (str(error), "bold red"))
+        if self._progress is not None:
+            # Printed above the live view
+            self._progress.console.print(message)
+        else:
+            Console(stderr=True).print(message)
+
+    def notice(self, message):
+        """
+        A message about the run as a whole. On stderr unless the output is
+        text or the live view, dropped when quiet.
+        """
+        if self.quiet:
+            return
+        if self._progress is not None:
+            self._progress.console.print(f"[italic]{message}[/italic]")
+        elif self.verbose:
+            display_empty(message)
+        else:
+            print(message, file=sys.stderr)
+
+    def format_counts(self):
+        return ", ".join(f"{outcome} {number}" for outcome, number in self.counts.items())
+
+    def summary(self, title, unit="repositories"):
+        """
+        Ends the run with the results per outcome and the throughput.
+        """
+        total = sum(self.counts.values())
+        seconds = self.clock() - self.started
+        line = (
+            f"{total} {unit} in {seconds:.1f}s ({total / max(seconds, 1e-9):.1f}/s)"
+            f"{': ' + self.format_counts() if total else ''}"
+        )
+        if self.quiet:
+            print(line)
+        elif self.output == NDJSON:
+            # stdout carries only the records
+            print(line, file=sys.stderr)
+        else:
+            if total:
+                display_list(title, self.counts.items(), ["Outcome", unit.capitalize()])
+            display_empty(line)
@@ -0,0 +1,170 @@
+# ratelimit.py - Rate-limit aware scheduling of GitHub API calls
+
+import math
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# GitHub asks to stay under 80 content-creating requests per minute
+DEFAULT_WRITES_PER_MINUTE = 80
+# Writes allowed back to back before pacing kicks in
+DEFAULT_WRITE_BURST = 5
+# Below this share of the primary budget, reads are spread until the reset
+LOW_BUDGET_SHARE = 0.1
+# Below this share of the primary budget, fewer workers are allowed to run
+THROTTLE_BUDGET_SHARE = 0.25
+# Wait used for secondary rate limits without a Retry-After header, doubled per attempt
+SECONDARY_LIMIT_WAIT = 60
+MAX_WAIT = 900
+DEFAULT_MAX_RETRIES = 5
+
+MUTATING_VERBS = ("POST", "PATCH", "PUT", "DELETE")
+
+class RateLimitScheduler:
+    """
+    Paces every GitHub request from the ghrm transport.
+
+    Reads follow the primary budget reported in the X-RateLimit-* headers.
+    Writes additionally go through a token bucket sized for GitHub's secondary
+    limits. Requests rejected with 403/429 for rate limiting put every caller
+    on hold until the time given by Retry-After or the budget reset, after
+    which the request is retried.
+    """
+
+    def __init__(
+        self,
+        writes_per_minute=DEFAULT_WRITES_PER_MINUTE,
+        write_burst=DEFAULT_WRITE_BURST,
+        max_retries=DEFAULT_MAX_RETRIES,
+        clock=time.time,
+        sleep=time.sleep
+    ):
+        self.write_rate = writes_per_minute / 60.0
+        self.write_burst = write_burst
+        self.max_retries = max_retries
+        self.clock = clock
+        self.sleep = sleep
+
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+        self.waited = 0.0
+
+        self._lock = threading.Lock()
+        self._slots = threading.Condition(self._lock)
+        self._active = 0
+        self._hold_until = 0.0
+        self._next_read = 0.0
+        self._write_tokens = float(write_burst)
+        self._write_stamp = clock()
+
+    def is_write(self, verb):
+        return verb.upper() in MUTATING_VERBS
+
+    def before_request(self, verb):
+        """
+        Blocks until the request may be sent.
+        """
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._hold_until)
+
+            if self.remaining is not None and self.reset and self.reset > now:
+                if self.remaining <= 0:
+                    start = max(start, self.reset)
+                elif self.remaining < self.limit * LOW_BUDGET_SHARE:
+                    # Spread what is left of the budget until it resets
+                    interval = (self.reset - now) / self.remaining
+                    self._next_read = max(self._next_read, start)
+                    start = self._next_read
+                    self._next_read += interval
+                self.remaining -= 1
+
+            if self.is_write(verb):
+                elapsed = now - self._write_stamp
+                self._write_tokens = min(self.write_burst, self._write_tokens + elapsed * self.write_rate)
+                self._write_stamp = now
+                # Reserve a token now, possibly going negative, so writes queue up in order
+                self._write_tokens -= 1
+                if self._write_tokens < 0:
+                    start = max(start, now - self._write_tokens / self.write_rate)
+
+            delay = start - now
+            if delay > 0:
+                self.waited += delay
+        if delay > 0:
+            self.sleep(delay)
+
+    def after_response(self, verb, status, headers, body="", attempt=0):
+        """
+        Records the budget reported by a response. Returns the number of
+        seconds to wait before retrying a rate-limited request, or None when
+        the response should be returned as it is.
+        """
+        with self._lock:
+            self._update_budget(headers)
+            if status not in (403, 429) or attempt >= self.max_retries:
+                return None
+
+            retry_after = headers.get("Retry-After")
+            if retry_after is not None and retry_after.isdigit():
+                delay = int(retry_after)
+            elif self.remaining == 0 and self.reset:
+                delay = self.reset - self.clock() + 1
+            elif status == 429 or "rate limit" in (body or "").lower():
+                delay = min(SECONDARY_LIMIT_WAIT * 2 ** attempt, MAX_WAIT)
+            else:
+                # A plain permission error
+                return None
+
+            delay = max(delay, 1) + random.uniform(0, 1)
+            self._hold_until = max(self._hold_until, self.clock() + delay)
+        print(
+            f"GitHub rate limit hit on {verb}, retrying in {math.ceil(delay)}s",
+            file=sys.stderr
+        )
+        return delay
+
+    def _update_budget(self, headers):
+        if headers.get("X-RateLimit-Resource", "core") != "core":
+            return
+        remaining = headers.get("X-RateLimit-Remaining")
+        limit = headers.get("X-RateLimit-Limit")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is None or limit is None:
+            return
+        self.remaining = int(remaining)
+        self.limit = int(limit)
+        if reset is not None:
+            self.reset = int(reset)
+
+    def concurrency_limit(self, concurrency):
+        """
+        Number of workers allowed to run given the remaining budget.
+        """
+        if self.clock() < self._hold_until:
+            return 1
+        if self.remaining is None or not self.limit:
+            return concurrency
+        share = self.remaining / self.limit
+        if share >= THROTTLE_BUDGET_SHARE:
+            return concurrency
+        return max(1, math.floor(concurrency * share / THROTTLE_BUDGET_SHARE))
+
+    @contextmanager
+    def slot(self, concurrency):
+        """
+        Holds one of the worker slots allowed by concurrency_limit().
+        """
+        with self._slots:
+            while self._active >= self.concurrency_limit(concurrency):
+                self._slots.wait(timeout=1)
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._slots:
+                self._active -= 1
+                self._slots.notify_all()
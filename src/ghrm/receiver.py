@@ -0,0 +1,195 @@
+# receiver.py - Receives GitHub organization webhooks about repositories
+
+import hashlib
+import hmac
+import json
+import sys
+import threading
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PATH = "/webhook"
+# GitHub caps webhook payloads at 25 MB
+MAX_PAYLOAD_BYTES = 25 * 1024 * 1024
+
+# Actions of the `repository` event that change what the inventory holds
+REPOSITORY_ACTIONS = (
+    "created",
+    "deleted",
+    "edited",
+    "renamed",
+    "archived",
+    "unarchived",
+    "privatized",
+    "publicized",
+    "transferred",
+)
+# Actions after which the repository is no longer in the organization
+REMOVED_ACTIONS = ("deleted", "transferred")
+
+# One repository change. `old_name` is set for renames, `repository` is the
+# repository object of the payload.
+RepositoryEvent = namedtuple("RepositoryEvent", ["action", "name", "old_name", "repository"])
+
+def sign(secret, body):
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+def verify_signature(secret, body, signature):
+    """
+    Checks the X-Hub-Signature-256 header GitHub computes with the webhook secret.
+    """
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(sign(secret, body), signature)
+
+def parse_event(event_type, payload, org=None):
+    """
+    Returns the RepositoryEvent of a webhook payload, or None when the event
+    is not about a repository of `org`.
+    """
+    if event_type != "repository" or payload.get("action") not in REPOSITORY_ACTIONS:
+        return None
+    repository = payload.get("repository") or {}
+    owner = (payload.get("organization") or repository.get("owner") or {}).get("login", "")
+    if org and owner.lower() != org.lower():
+        return None
+    name = repository.get("name")
+    if not name:
+        return None
+    old_name = None
+    if payload["action"] == "renamed":
+        old_name = ((payload.get("changes") or {}).get("repository") or {}).get("name", {}).get("from")
+    return RepositoryEvent(payload["action"], name, old_name, repository)
+
+class EventQueue:
+    """
+    Events received since the last drain(). `pending` is set while there are any.
+    """
+
+    def __init__(self):
+        self.pending = threading.Event()
+        self._events = []
+        self._lock = threading.Lock()
+
+    def put(self, event):
+        with self._lock:
+            self._events.append(event)
+            self.pending.set()
+
+    def drain(self):
+        with self._lock:
+            events, self._events = self._events, []
+            self.pending.clear()
+        return events
+
+def apply_events(events, inventory, state, build_repository):
+    """
+    Brings an inventory from load_inventory() up to date with webhook events
+    and forgets the affected entries in the AppliedState, so the next pass
+    reconciles them. `build_repository` turns a payload repository into an
+    inventory entry. Returns the names of the repositories affected.
+    """
+    affected = []
+    for event in events:
+        if event.old_name:
+            if inventory is not None:
+                inventory.pop(event.old_name.lower(), None)
+            state.forget(event.old_name)
+            affected.append(event.old_name)
+        if inventory is not None:
+            if event.action in REMOVED_ACTIONS:
+                inventory.pop(event.name.lower(), None)
+            else:
+                inventory[event.name.lower()] = build_repository(event.repository)
+        state.forget(event.name)
+        affected.append(event.name)
+    return affected
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "ghrm-receiver"
+
+    def do_POST(self):
+        receiver = self.server.receiver
+        if self.path.split("?", 1)[0] != receiver.path:
+            return self._reply(404, "not found")
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            return self._reply(400, "bad content length")
+        if length < 0:
+            # rfile.read(-1) would wait for the client to close the connection
+            return self._reply(400, "bad content length")
+        if length > MAX_PAYLOAD_BYTES:
+            return self._reply(413, "payload too large")
+        body = self.rfile.read(length)
+        if not verify_signature(receiver.secret, body, self.headers.get("X-Hub-Signature-256")):
+            return self._reply(401, "bad signature")
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return self._reply(400, "bad payload")
+
+        event_type = self.headers.get("X-GitHub-Event", "")
+        if event_type == "ping":
+            return self._reply(200, "pong")
+        event = parse_event(event_type, payload, receiver.org)
+        if event is None:
+            return self._reply(202, "ignored")
+        receiver.queue.put(event)
+        self._reply(202, "queued")
+
+    def _reply(self, status, message):
+        body = message.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.receiver.verbose:
+            print(f"Webhook: {format % args}", file=sys.stderr)
+
+class WebhookReceiver:
+    """
+    Local HTTP endpoint for GitHub organization webhooks. Repository events
+    with a valid signature are put on `queue`; everything else is ignored.
+    Runs on a background thread between start() and close().
+    """
+
+    def __init__(self, secret, org=None, host=DEFAULT_HOST, port=0, path=DEFAULT_PATH, queue=None, verbose=False):
+        if not secret:
+            raise ValueError("A webhook secret is required")
+        self.secret = secret
+        self.org = org
+        self.path = path
+        self.queue = queue or EventQueue()
+        self.verbose = verbose
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.receiver = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ghrm-webhooks", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
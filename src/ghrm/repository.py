@@ -1,29 +1,54 @@
 # repository.py - Repository module for GitHub Manager CLI
 
+import math
 import os
 import sys
+import threading
 import yaml
+from urllib.parse import quote
 from github import Github, GithubException, Auth
+from github.Repository import Repository
+from . import transport
+from .config import ConfigSource
+from .credentials import credential_pool, github_auth
+from .graphql import fetch_repo_states
+from .state import RepoState, desired_config, diff_repo_config, unread_settings
+
+# Largest page size the REST API accepts for list endpoints
+INVENTORY_PAGE_SIZE = 100
 
 def initialize_github():
     """
     Initialize GitHub connection.
     """
     try:
-        github_token = os.getenv("GITHUB_TOKEN")
         github_org = os.getenv("GITHUB_ORG")
 
-        if not github_token:
-            raise EnvironmentError("GITHUB_TOKEN environment variable is not set")
         if not github_org:
             raise EnvironmentError("GITHUB_ORG environment variable is not set")
 
-        auth = Auth.Token(github_token)
-        g = Github(auth=auth)
+        transport.install()
+        options = {}
+        # GITHUB_API_URL points the client at GitHub Enterprise or a local stand-in
+        if os.getenv("GITHUB_API_URL"):
+            options["base_url"] = os.getenv("GITHUB_API_URL").rstrip("/")
+        # A personal token, or a GitHub App installation token minted and refreshed by PyGithub
+        auth = github_auth(github_org, options.get("base_url"))
+        # Pacing and rate-limit retries are handled by transport.scheduler
+        g = Github(
+            auth=auth,
+            per_page=INVENTORY_PAGE_SIZE,
+            retry=None,
+            seconds_between_requests=None,
+            seconds_between_writes=None,
+            **options
+        )
 
         try:
-            # Test the authentication
-            g.get_user().login
+            # Test the authentication. Installation tokens have no user, the
+            # organization check below covers them.
+            if isinstance(auth, Auth.Token):
+                g.get_user().login
         except GithubException as e:
             if e.status == 401:
                 raise EnvironmentError(
@@ -31,6 +56,11 @@ def initialize_github():
                 ) from e
             raise
 
+        # Extra credentials from GITHUB_TOKEN_POOL add their budget to the client's
+        transport.credentials = credential_pool(auth)
+        if transport.credentials is not None:
+            print(f"Spreading requests over {len(transport.credentials)} credentials", file=sys.stderr)
+
         try:
             org = g.get_organization(github_org)
             # Test organization access
@@ -51,25 +81,51 @@ def initialize_github():
         print(f"Error initializing GitHub connection: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
-# Initialize GitHub connection
-try:
-    g, org = initialize_github()
-except Exception as e:
-    print(f"Failed to initialize: {str(e)}", file=sys.stderr)
-    sys.exit(1)
+_client = None
+_client_lock = threading.Lock()
+
+def get_github():
+    """
+    Returns the (github, organization) pair, connecting on first use.
+    The auth and organization checks run once per session.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = initialize_github()
+    return _client
+
+def get_org():
+    return get_github()[1]
+
+def get_token():
+    """
+    Returns the token the client authenticates with, e.g. for GraphQL calls.
+    """
+    return get_github()[0].requester.auth.token
 
-def get_repo(repo_name):
+def get_repo(repo_name, inventory=None):
     """
-    Fetches a repo from GitHub organization.
+    Fetches the RepoState of a repo from GitHub organization.
+    When an inventory from load_inventory() is given it is used instead of the API.
     """
     if not repo_name:
         raise ValueError("Repository name cannot be empty")
 
-    try:
-        repo = org.get_repo(repo_name)
-        if repo.name:
+    org = get_org()
+    if inventory is not None:
+        repo = inventory.get(repo_name.lower())
+        if repo is None:
+            print(f"Repository `{repo_name}` does not exist within GitHub {org.login}")
+        else:
             print(f"Repository `{repo_name}` exists within GitHub {org.login}")
-            return repo
+        return repo
+
+    try:
+        _, data = org.requester.requestJsonAndCheck("GET", f"/repos/{org.login}/{quote(repo_name, safe='')}")
+        print(f"Repository `{repo_name}` exists within GitHub {org.login}")
+        return RepoState.from_rest(data)
     except GithubException as e:
         if e.status == 404:
             print(f"Repository `{repo_name}` does not exist within GitHub {org.login}")
@@ -84,24 +140,118 @@ def get_repo(repo_name):
             print(f"Error fetching repository from GitHub {org.login} - {str(e)}", file=sys.stderr)
             raise
 
+def paginate(org, path, params=None, page_size=INVENTORY_PAGE_SIZE):
+    """
+    Yields every item of the REST API list at `path`, `page_size` per request.
+    A page shorter than `page_size` is the last one, so no request is made
+    past the end.
+    """
+    page = 1
+    while True:
+        _, data = org.requester.requestJsonAndCheck(
+            "GET",
+            path,
+            parameters={**(params or {}), "per_page": page_size, "page": page}
+        )
+        yield from data
+        if len(data) < page_size:
+            return
+        page += 1
+
+def list_repositories(org):
+    """
+    Yields the REST API object of every repository of the organization,
+    INVENTORY_PAGE_SIZE per request.
+    """
+    yield from paginate(org, f"/orgs/{org.login}/repos", {"type": "all"})
+
+def load_inventory():
+    """
+    Lists every repository of the organization once and indexes its RepoState by lowercase name.
+    Only the settings are kept, not the listing's JSON.
+    """
+    org = get_org()
+    inventory = {}
+    for data in list_repositories(org):
+        inventory[data["name"].lower()] = RepoState.from_rest(data)
+    print(f"Loaded {len(inventory)} repositories from GitHub {org.login}")
+    return inventory
+
+def complete_inventory(inventory, entries):
+    """
+    Reads the settings the organization listing leaves out, such as the merge
+    options, for the `entries` (name, description, config) that configure
+    them, so create_repository() does not read those repositories one by one.
+    Uses the batched read of the drift report: one GraphQL query per
+    READ_BATCH_SIZE repositories. Returns how many entries were completed.
+    """
+    # Imported here: drift reads repositories through this module
+    from .drift import READ_BATCH_SIZE, read_repo_states
+
+    org = get_org()
+    pending = []
+    for repo_name, description, repo_config in entries:
+        current = inventory.get(str(repo_name).lower())
+        desired = desired_config(repo_name, description, repo_config)
+        if current is not None and unread_settings(current, desired):
+            pending.append((current, desired))
+    for start in range(0, len(pending), READ_BATCH_SIZE):
+        inventory.update(read_repo_states(org, pending[start:start + READ_BATCH_SIZE]))
+    return len(pending)
+
+def load_inventory_graphql(repo_names):
+    """
+    Reads the settings of the named repositories through GraphQL, 100 per query,
+    and indexes the ones that exist by lowercase name.
+    """
+    org = get_org()
+    inventory = fetch_repo_states(org.login, repo_names, get_token(), session=transport.session())
+    print(f"Loaded {len(inventory)} repositories from GitHub {org.login} using GraphQL")
+    return inventory
+
+def build_repository(data):
+    """
+    Builds an inventory entry from a repository object sent in a webhook
+    payload, which has the same fields as the REST API's.
+    """
+    return RepoState.from_rest(data)
+
+def as_repository(repo):
+    """
+    Returns a PyGithub Repository for an inventory entry without reading it
+    again: RepoState entries are turned into incomplete objects, and edit()
+    or delete() on them sends only that request.
+    """
+    org = get_org()
+    if isinstance(repo, Repository):
+        return repo
+    # Left incomplete: edit() and delete() only need the URL
+    return Repository(org.requester, url=f"/repos/{org.login}/{quote(repo.name, safe='')}", completed=False)
+
+def inventory_pays_off(repo_count):
+    """
+    Tells whether listing the organization is cheaper than probing `repo_count` repositories one by one.
+    """
+    org = get_org()
+    total = (org.public_repos or 0) + (org.total_private_repos or org.owned_private_repos or 0)
+    return math.ceil(total / INVENTORY_PAGE_SIZE) < repo_count
+
 def load_repo_configs(config_file):
     """
-    Loads repository configurations from a YAML file.
+    Loads repository configurations from a YAML file, a directory or a glob.
     """
     if not config_file:
         raise ValueError("Configuration file path cannot be empty")
 
     try:
-        with open(config_file, 'r') as f:
-            try:
-                repos = yaml.safe_load(f)
-                if not repos:
-                    print("Warning: Empty configuration file", file=sys.stderr)
-                    return {}
-                return repos.get("repositories", {})
-            except yaml.YAMLError as e:
-                print(f"Invalid YAML format: {str(e)}", file=sys.stderr)
-                sys.exit(1)
+        source = ConfigSource(config_file)
+        configs = source.repository_configs()
+        if not configs and not source.settings:
+            print("Warning: Empty configuration file", file=sys.stderr)
+        return configs
+    except yaml.YAMLError as e:
+        print(f"Invalid YAML format: {str(e)}", file=sys.stderr)
+        sys.exit(1)
     except FileNotFoundError:
         print(f"Configuration file not found: {config_file}", file=sys.stderr)
         sys.exit(1)
@@ -112,19 +262,35 @@ def load_repo_configs(config_file):
         print(f"Unexpected error reading configuration: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
+def name_taken(error):
+    """
+    Whether GitHub refused to create a repository because the name is in use.
+    Other validation errors are answered with 422 too.
+    """
+    if error.status != 422 or not isinstance(error.data, dict):
+        return False
+    return any(
+        isinstance(detail, dict)
+        and detail.get("field") == "name"
+        and "already exists" in str(detail.get("message", ""))
+        for detail in error.data.get("errors") or []
+    )
+
 def configure_repository(config_file):
     """
     Creates GitHub repositories based on YAML.
     """
+    org = get_org()
     try:
         repo_configs = load_repo_configs(config_file)
         if not repo_configs:
             print("No repository configurations found", file=sys.stderr)
             return
 
+        inventory = load_inventory() if inventory_pays_off(len(repo_configs)) else None
         for repo_name, repo_config in repo_configs.items():
             try:
-                repo = get_repo(repo_name)
+                repo = get_repo(repo_name, inventory)
                 repo_config["name"] = repo_name
 
                 if repo is None:
@@ -132,18 +298,18 @@ def configure_repository(config_file):
                         print(f"Creating GitHub repository `{repo_name}`")
                         org.create_repo(**repo_config)
                     except GithubException as e:
-                        if e.status == 422:
+                        if name_taken(e):
                             print(f"Repository `{repo_name}` already exists.")
                         else:
                             print(f"Error creating repository `{repo_name}`: {str(e)}", file=sys.stderr)
                             raise
                 else:
-                    print(f"Update GitHub repository `{repo_name}`")
-                    # Remove unsupported arguments for the edit method
-                    unsupported_args = ["auto_init", "gitignore_template", "license_template"]
-                    for arg in unsupported_args:
-                        repo_config.pop(arg, None)
-                    repo.edit(**repo_config)
+                    changes = diff_repo_config(repo, repo_config)
+                    if not changes:
+                        print(f"GitHub repository `{repo_name}` is up to date")
+                        continue
+                    print(f"Update GitHub repository `{repo_name}`: {', '.join(changes)}")
+                    as_repository(repo).edit(**{"name": repo.name, **changes})
 
             except Exception as e:
                 print(f"Error processing repository {repo_name}: {str(e)}", file=sys.stderr)
@@ -153,55 +319,61 @@ def configure_repository(config_file):
         print(f"Error in repository configuration: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
-def create_repository(repo_name, description=None, repo_config=None):
+def create_repository(repo_name, description=None, repo_config=None, inventory=None):
     """
     Creates a single GitHub repository.
     """
     if not repo_name:
         raise ValueError("Repository name cannot be empty")
 
+    org = get_org()
     try:
-        repo = get_repo(repo_name)
-        default_config = {
-            "name": repo_name,
-            "description": description,
-            "private": True
-        }
-
-        if repo_config is None:
-            repo_config = default_config
-        else:
-            repo_config = {**default_config, **repo_config}
+        repo = get_repo(repo_name, inventory)
+        repo_config = desired_config(repo_name, description, repo_config)
 
         if repo is None:
             try:
                 print(f"Creating GitHub repository `{repo_name}`")
-                org.create_repo(**repo_config)
+                created = org.create_repo(**repo_config)
+                if inventory is not None:
+                    # Later passes over the same inventory (serve) see what was created
+                    inventory[repo_name.lower()] = RepoState.from_rest(created.raw_data)
                 return "created"
             except GithubException as e:
-                if e.status == 422:
-                    print(f"Repository `{repo_name}` already exists.")
-                else:
+                if not name_taken(e):
                     print(f"Error creating repository `{repo_name}`: {str(e)}", file=sys.stderr)
                     raise
-        else:
-            print(f"Repository `{repo_name}` already exists. Updating repository.")
-            # Remove unsupported arguments for the edit method
-            unsupported_args = ["auto_init", "gitignore_template", "license_template"]
-            for arg in unsupported_args:
-                repo_config.pop(arg, None)
-            try:
-                repo.edit(**repo_config)
-                return "updated"
-            except GithubException as e:
-                print(f"Error updating repository `{repo_name}`: {str(e)}", file=sys.stderr)
-                raise
+                # Created since it was looked up: its settings still have to be reconciled
+                print(f"Repository `{repo_name}` already exists.")
+                repo = get_repo(repo_name)
+                if repo is None:
+                    raise
+        elif inventory is not None and unread_settings(repo, repo_config):
+            # The listing left out a configured setting; the repository itself has them all
+            repo = get_repo(repo_name)
+
+        # Only send the settings that differ from the repository
+        changes = diff_repo_config(repo, repo_config)
+        if not changes:
+            print(f"Repository `{repo_name}` already exists and is up to date.")
+            return "unchanged"
+        print(f"Repository `{repo_name}` already exists. Updating {', '.join(changes)}.")
+        try:
+            # Passing the name keeps PyGithub from fetching it on a lazy object
+            as_repository(repo).edit(**{"name": repo.name, **changes})
+            if inventory is not None:
+                # Later passes over the same inventory (serve) diff against what was applied
+                inventory[repo_name.lower()] = repo.with_changes(changes)
+            return "updated"
+        except GithubException as e:
+            print(f"Error updating repository `{repo_name}`: {str(e)}", file=sys.stderr)
+            raise
 
     except Exception as e:
         print(f"Error in repository creation/update: {str(e)}", file=sys.stderr)
         raise
 
-def delete_repository(repo_name):
+def delete_repository(repo_name, inventory=None):
     """
     Deletes GitHub repository.
     """
@@ -209,11 +381,11 @@ def delete_repository(repo_name):
         raise ValueError("Repository name cannot be empty")
 
     try:
-        repo = get_repo(repo_name)
+        repo = get_repo(repo_name, inventory)
         if repo:
             try:
                 print(f"Deleting GitHub repository `{repo_name}`")
-                repo.delete()
+                as_repository(repo).delete()
                 return True
             except GithubException as e:
                 if e.status == 403:
@@ -229,35 +401,35 @@ def delete_repository(repo_name):
         print(f"Error in repository deletion: {str(e)}", file=sys.stderr)
         raise
 
-def decommission_repository(repositories_decom_list):
+def decommission_repository(repositories_decom_list, dry_run=True, concurrency=8):
     """
     To delete repositories based on a list in YAML file.
+    Only reports what would be deleted unless `dry_run` is False.
+    Returns the DecommissionResult list.
     """
+    from .decommission import decommission, summarize
     if not repositories_decom_list:
         raise ValueError("Decommission list file path cannot be empty")
 
     try:
-        with open(repositories_decom_list, 'r') as f:
-            try:
-                repos = yaml.safe_load(f)
-                if not repos:
-                    print("Warning: Empty decommission list", file=sys.stderr)
-                    return
-            except yaml.YAMLError as e:
-                print(f"Invalid YAML format in decommission list: {str(e)}", file=sys.stderr)
-                sys.exit(1)
-
-        repo_names = repos.get("repositories", [])
+        try:
+            source = ConfigSource(repositories_decom_list)
+            repo_names = [repo_name for repo_name, _, _ in source.repositories()]
+        except yaml.YAMLError as e:
+            print(f"Invalid YAML format in decommission list: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+
         if not repo_names:
             print("No repositories found in decommission list", file=sys.stderr)
-            return
+            return []
 
-        for repo_name in repo_names:
-            try:
-                delete_repository(repo_name)
-            except Exception as e:
-                print(f"Error decommissioning repository {repo_name}: {str(e)}", file=sys.stderr)
-                continue
+        results = list(decommission(repo_names, dry_run=dry_run, concurrency=concurrency))
+        counts = ", ".join(f"{status}: {count}" for status, count in summarize(results).items())
+        if dry_run:
+            print(f"Dry run, nothing was deleted ({counts})")
+        else:
+            print(f"Decommission finished ({counts})")
+        return results
 
     except FileNotFoundError:
         print(f"Decommission list file not found: {repositories_decom_list}", file=sys.stderr)
@@ -0,0 +1,91 @@
+# serve.py - Keeps running and reconciles config changes as they happen
+
+import signal
+import sys
+import threading
+import time
+
+# Seconds between two scans of the config files where inotify is unavailable
+DEFAULT_POLL_INTERVAL = 2.0
+# Seconds between two reconciliations of every config entry
+DEFAULT_RESYNC_INTERVAL = 3600
+# Editors often save a file in several writes; changes are applied once
+# nothing has changed for this long
+DEBOUNCE_SECONDS = 0.5
+# Longest the loop sleeps before looking at the stop flag again
+TICK_SECONDS = 1.0
+
+def _install_signal_handlers(stop):
+    """
+    Makes SIGTERM and SIGINT set `stop` so a pass in progress can finish.
+    A second signal interrupts right away. Returns a function restoring the
+    previous handlers.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return lambda: None
+
+    def handle(signum, frame):
+        if stop.is_set():
+            raise KeyboardInterrupt
+        print(f"Received {signal.Signals(signum).name}, stopping after the current pass", file=sys.stderr)
+        stop.set()
+
+    previous = {signum: signal.signal(signum, handle) for signum in (signal.SIGTERM, signal.SIGINT)}
+
+    def restore():
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+    return restore
+
+def _run_pass(reconcile, full):
+    # A failed pass is reported and retried with the next change or resync
+    try:
+        reconcile(full)
+    except Exception as e:
+        print(f"Reconciliation failed: {str(e)}", file=sys.stderr)
+
+def serve(
+    source,
+    reconcile,
+    resync_interval=DEFAULT_RESYNC_INTERVAL,
+    poll_interval=DEFAULT_POLL_INTERVAL,
+    watcher=None,
+    stop=None,
+    wake=None,
+    clock=time.monotonic
+):
+    """
+    Calls reconcile(False) once at start and again whenever a config file of
+    `source` changes, and reconcile(True) every `resync_interval` seconds
+    (never when 0). Setting the `wake` event (e.g. from the webhook receiver)
+    also triggers reconcile(False). Returns after SIGTERM / SIGINT or once `stop` is set;
+    a pass that is running is finished first.
+    """
+    # Imported here so the CLI can read the defaults without loading the config parser
+    from .watch import open_watcher
+
+    stop = stop or threading.Event()
+    watcher = watcher or open_watcher(source, poll_interval)
+    restore = _install_signal_handlers(stop)
+    try:
+        print(f"Watching {source} for changes ({watcher.kind})")
+        _run_pass(reconcile, False)
+        next_resync = clock() + resync_interval if resync_interval else None
+        while not stop.is_set():
+            timeout = TICK_SECONDS
+            if next_resync is not None:
+                timeout = max(0.0, min(timeout, next_resync - clock()))
+            changed = watcher.wait(timeout)
+            if changed:
+                while not stop.is_set() and watcher.wait(DEBOUNCE_SECONDS):
+                    pass
+            if stop.is_set():
+                break
+            if changed or (wake is not None and wake.is_set()):
+                _run_pass(reconcile, False)
+            if next_resync is not None and clock() >= next_resync and not stop.is_set():
+                _run_pass(reconcile, True)
+                next_resync = clock() + resync_interval
+    finally:
+        restore()
+        watcher.close()
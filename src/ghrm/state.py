@@ -0,0 +1,142 @@
+# state.py - Compares desired repository settings with the current state
+
+# Settings accepted when creating a repository but not by Repository.edit()
+CREATE_ONLY_SETTINGS = ("auto_init", "gitignore_template", "license_template", "has_downloads")
+
+# Repository settings in REST API responses, under the names
+# diff_repo_config() compares. List responses leave some of them out.
+REST_SETTINGS = (
+    "description",
+    "homepage",
+    "private",
+    "visibility",
+    "archived",
+    "is_template",
+    "default_branch",
+    "has_issues",
+    "has_wiki",
+    "has_projects",
+    "has_discussions",
+    "has_downloads",
+    "allow_forking",
+    "allow_merge_commit",
+    "allow_squash_merge",
+    "allow_rebase_merge",
+    "allow_auto_merge",
+    "allow_update_branch",
+    "use_squash_pr_title_as_default",
+    "squash_merge_commit_title",
+    "squash_merge_commit_message",
+    "merge_commit_title",
+    "merge_commit_message",
+    "delete_branch_on_merge",
+    "web_commit_signoff_required",
+)
+
+_MISSING = object()
+
+def _same(current_value, desired_value):
+    # GitHub reports unset text fields as either null or an empty string
+    if current_value in (None, "") and desired_value in (None, ""):
+        return True
+    return current_value == desired_value
+
+def desired_config(repo_name, description=None, repo_config=None):
+    """
+    The settings a config entry asks for, on top of the defaults every
+    managed repository gets.
+    """
+    default_config = {
+        "name": repo_name,
+        "description": description,
+        "private": True
+    }
+    return {**default_config, **(repo_config or {})}
+
+def unread_settings(current, repo_config):
+    """
+    Returns the settings from `repo_config` that GitHub reports but `current`
+    was read without, such as the merge options organization listings leave out.
+    """
+    return [
+        key for key, value in repo_config.items()
+        if key in REST_SETTINGS and key not in CREATE_ONLY_SETTINGS and value is not None
+        and not hasattr(current, key)
+    ]
+
+def diff_repo_config(current, repo_config):
+    """
+    Returns the settings from `repo_config` that differ from `current`.
+
+    `current` is anything exposing repository settings as attributes. Settings
+    it does not expose are always returned, unset (None) ones never are.
+    """
+    changes = {}
+    for key, value in repo_config.items():
+        if key in CREATE_ONLY_SETTINGS or value is None:
+            continue
+        current_value = getattr(current, key, _MISSING)
+        if current_value is _MISSING or not _same(current_value, value):
+            changes[key] = value
+    return changes
+
+class RepoState:
+    """
+    Current settings of a repository, with the same attribute names as
+    PyGithub's Repository so it can be compared with diff_repo_config().
+
+    Only the settings ghrm manages are kept, in slots: an organization of
+    50,000 repositories fits in a few tens of MB, where PyGithub objects hold
+    the whole response and a requester each. Settings the state was read
+    without are unset and reported missing by getattr() and hasattr().
+    """
+
+    __slots__ = ("name",) + REST_SETTINGS
+
+    def __init__(self, name, **settings):
+        self.name = name
+        for key, value in settings.items():
+            setattr(self, key, value)
+
+    @classmethod
+    def from_rest(cls, data):
+        """
+        Builds the state from a REST API repository object, keeping only
+        the settings it contains.
+        """
+        return cls(data["name"], **{key: data[key] for key in REST_SETTINGS if key in data})
+
+    @classmethod
+    def from_graphql(cls, node):
+        """
+        Builds the state from a GraphQL `Repository` node.
+        """
+        return cls(
+            node["name"],
+            description=node.get("description"),
+            homepage=node.get("homepageUrl"),
+            private=node.get("isPrivate"),
+            visibility=(node.get("visibility") or "").lower() or None,
+            archived=node.get("isArchived"),
+            has_issues=node.get("hasIssuesEnabled"),
+            has_wiki=node.get("hasWikiEnabled"),
+            has_projects=node.get("hasProjectsEnabled"),
+            allow_merge_commit=node.get("mergeCommitAllowed"),
+            allow_squash_merge=node.get("squashMergeAllowed"),
+            allow_rebase_merge=node.get("rebaseMergeAllowed"),
+            delete_branch_on_merge=node.get("deleteBranchOnMerge")
+        )
+
+    def with_changes(self, changes):
+        """
+        Returns a copy with the settings of `changes`, as sent to Repository.edit(), applied.
+        """
+        settings = {key: getattr(self, key) for key in REST_SETTINGS if hasattr(self, key)}
+        if "private" in changes and "visibility" not in changes:
+            # Follows from `private`; read again when configured
+            settings.pop("visibility", None)
+        settings.update((key, value) for key, value in changes.items() if key in REST_SETTINGS)
+        return RepoState(changes.get("name", self.name), **settings)
+
+    def __repr__(self):
+        return f"RepoState({self.name!r})"
@@ -0,0 +1,147 @@
+# teams.py - Synchronises team access to repositories
+
+import sys
+from collections import namedtuple
+from urllib.parse import quote
+from .engine import run_tasks, write_gate
+
+TEAMS_PAGE_SIZE = 100
+
+# Built-in repository roles, lowest first
+PERMISSIONS = ("pull", "triage", "push", "maintain", "admin")
+# Names GitHub also uses for them, in the UI and in `role_name`
+PERMISSION_ALIASES = {"read": "pull", "write": "push"}
+
+# One write needed to bring a team's access in line. `action` is "grant",
+# "update" or "revoke"; `current` is the permission the team has, None when
+# it has no access, and `permission` the configured one, None for a revoke.
+TeamChange = namedtuple("TeamChange", ["team", "repository", "action", "permission", "current"])
+
+# The outcome of listing a team's repositories (change is None) or of applying a change
+TeamResult = namedtuple("TeamResult", ["team", "change", "error"])
+
+def normalize_permission(value):
+    value = str(value).lower()
+    return PERMISSION_ALIASES.get(value, value)
+
+def load_team_access(settings):
+    """
+    Reads the `team_access` setting, which maps team slugs to the permission
+    the team has on each repository:
+
+        team_access:
+          platform:
+            api: admin
+            web: push
+
+    Permissions are the built-in roles (pull, triage, push, maintain, admin)
+    or the name of a custom repository role. Returns {team: {repository: permission}}.
+    """
+    teams = settings.get("team_access") or {}
+    if not isinstance(teams, dict):
+        raise ValueError("`team_access` must map team slugs to their repositories")
+    access = {}
+    for team, repositories in teams.items():
+        repositories = repositories or {}
+        if not isinstance(repositories, dict):
+            raise ValueError(f"Team `{team}` must map repositories to a permission")
+        access[str(team)] = {}
+        for repo_name, permission in repositories.items():
+            if not permission:
+                raise ValueError(f"Repository `{repo_name}` of team `{team}` has no permission")
+            access[str(team)][str(repo_name)] = normalize_permission(permission)
+    return access
+
+def team_permission(repo):
+    """
+    Returns the permission of a team on a repository of its listing.
+    """
+    if repo.get("role_name"):
+        return normalize_permission(repo["role_name"])
+    permissions = repo.get("permissions") or {}
+    return next((permission for permission in reversed(PERMISSIONS) if permissions.get(permission)), None)
+
+def list_team_repos(org, team):
+    """
+    Returns {lowercase name: (name, permission)} of every repository the team
+    has access to, TEAMS_PAGE_SIZE per request.
+    """
+    # Imported here so the CLI can load without PyGithub
+    from .repository import paginate
+
+    path = f"/orgs/{org.login}/teams/{quote(team, safe='')}/repos"
+    return {
+        repo["name"].lower(): (repo["name"], team_permission(repo))
+        for repo in paginate(org, path, page_size=TEAMS_PAGE_SIZE)
+    }
+
+def diff_team_access(team, current, desired, prune=False):
+    """
+    Compares the repositories a team has access to (from list_team_repos)
+    with the configured ones and returns the TeamChange list that reconciles
+    them. Repository names are compared case insensitively. Access that is
+    not configured is revoked only with `prune`.
+    """
+    changes = []
+    for repo_name, permission in desired.items():
+        existing = current.get(repo_name.lower())
+        if existing is None:
+            changes.append(TeamChange(team, repo_name, "grant", permission, None))
+        elif existing[1] != permission:
+            changes.append(TeamChange(team, existing[0], "update", permission, existing[1]))
+
+    if prune:
+        configured = {repo_name.lower() for repo_name in desired}
+        for key, (repo_name, permission) in current.items():
+            if key not in configured:
+                changes.append(TeamChange(team, repo_name, "revoke", None, permission))
+    return changes
+
+def describe_change(change):
+    if change.action == "grant":
+        return f"grant {change.team} {change.permission}"
+    if change.action == "update":
+        return f"{change.team} {change.current} -> {change.permission}"
+    return f"revoke {change.team}"
+
+def apply_change(org, change):
+    url = f"/orgs/{org.login}/teams/{quote(change.team, safe='')}/repos/{org.login}/{quote(change.repository, safe='')}"
+    if change.action in ("grant", "update"):
+        org.requester.requestJsonAndCheck("PUT", url, input={"permission": change.permission})
+    elif change.action == "revoke":
+        org.requester.requestJsonAndCheck("DELETE", url)
+    else:
+        raise ValueError(f"Unknown team access change: {change.action}")
+    return change
+
+def sync_team_access(access, prune=False, concurrency=8, gate=None):
+    """
+    Brings the access of every team in `access` (from load_team_access) in
+    line and yields TeamResult rows: one per team that could not be listed
+    and one per change applied.
+
+    Each team's repositories are listed once and diffed locally, so the
+    requests grow with the teams and the changes, not with teams times
+    repositories. Only the differences are sent, concurrently and paced by
+    the transport's write throttle.
+    """
+    # Imported here so the CLI can load without PyGithub
+    from .repository import get_org
+
+    org = get_org()
+    if gate is None:
+        gate = write_gate(concurrency)
+
+    def plan(team):
+        return diff_team_access(team, list_team_repos(org, team), access[team], prune)
+
+    changes = []
+    for task in run_tasks(plan, list(access), concurrency, gate=gate):
+        if task.error is not None:
+            print(f"Error listing the repositories of team `{task.item}`: {str(task.error)}", file=sys.stderr)
+            yield TeamResult(task.item, None, task.error)
+        else:
+            changes.extend(task.value)
+
+    for task in run_tasks(lambda change: apply_change(org, change), changes, concurrency, gate=gate):
+        yield TeamResult(task.item.team, task.item, task.error)
@@ -0,0 +1,334 @@
+# transport.py - HTTP transport used by the GitHub client
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+from github.Requester import (
+    HTTPRequestsConnectionClass,
+    HTTPSRequestsConnectionClass,
+    Requester,
+    RequestsResponse
+)
+from urllib3.util import Retry
+from . import metrics
+from .cache import HttpCache
+from .ratelimit import RateLimitScheduler
+
+# Conditional-request cache shared by every connection, None when disabled
+cache = None
+use_cache = True
+
+# Paces and retries every request sent through the ghrm connections
+scheduler = RateLimitScheduler()
+
+# CredentialPool the requests are spread over, None to send them as PyGithub signed them
+credentials = None
+
+# Built-in defaults of the HTTP settings, in its [http] table
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.toml")
+
+# Environment variables overriding each HTTP setting, with its type
+HTTP_ENV = {
+    "pool_size": ("GHRM_HTTP_POOL_SIZE", int),
+    "connect_timeout": ("GHRM_HTTP_CONNECT_TIMEOUT", float),
+    "read_timeout": ("GHRM_HTTP_READ_TIMEOUT", float),
+    "retries": ("GHRM_HTTP_RETRIES", int),
+    "backoff_factor": ("GHRM_HTTP_BACKOFF_FACTOR", float),
+    "backoff_jitter": ("GHRM_HTTP_BACKOFF_JITTER", float),
+    "backoff_max": ("GHRM_HTTP_BACKOFF_MAX", float),
+}
+
+# Answers worth retrying: GitHub or a proxy in front of it failed in passing.
+# 403 and 429 are rate limits, paced and retried by the scheduler.
+TRANSIENT_STATUSES = (500, 502, 503, 504)
+
+# Methods a GitHub request can be repeated with once it may have been
+# received. PATCH is not: a repeated rename or label rename finds the old
+# name gone and fails, or worse, renames what took the old name since.
+GITHUB_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Webhook posts are not repeated once they may have been delivered
+WEBHOOK_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Resolved by configure(), on first use otherwise
+http_settings = None
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def load_http_settings(overrides=None):
+    """
+    Returns the HTTP settings: config.toml, then `overrides` (the `http`
+    mapping of the repositories config), then GHRM_HTTP_* variables.
+    """
+    import tomllib
+
+    with open(CONFIG_FILE, "rb") as f:
+        settings = dict(tomllib.load(f).get("http", {}))
+    for key, value in (overrides or {}).items():
+        if key not in HTTP_ENV:
+            raise ValueError(f"Unknown HTTP setting `{key}`")
+        settings[key] = HTTP_ENV[key][1](value)
+    for key, (env, cast) in HTTP_ENV.items():
+        if os.getenv(env):
+            settings[key] = cast(os.getenv(env))
+    return settings
+
+def configure(concurrency=1, overrides=None):
+    """
+    Resolves the HTTP settings for a run with `concurrency` workers. Call it
+    before the first request: sessions already open keep their settings.
+    """
+    global http_settings
+    import requests
+
+    settings = load_http_settings(overrides)
+    if not settings.get("pool_size"):
+        # A connection for every worker, the main thread and the notifiers
+        settings["pool_size"] = max(requests.adapters.DEFAULT_POOLSIZE, concurrency + 2)
+    http_settings = settings
+    return settings
+
+def get_http_settings():
+    return http_settings or configure()
+
+def timeout():
+    """
+    (connect, read) timeout of every request.
+    """
+    settings = get_http_settings()
+    return (settings["connect_timeout"], settings["read_timeout"])
+
+class MeteredRetry(Retry):
+    """
+    urllib3 retry policy that records every retry in the metrics, under `service`.
+    """
+
+    def __init__(self, *args, service="github", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.service = service
+
+    def new(self, **kwargs):
+        kwargs.setdefault("service", self.service)
+        return super().new(**kwargs)
+
+    def increment(self, method=None, url=None, *args, **kwargs):
+        endpoint = metrics.endpoint_template(urlsplit(url or "").path) if self.service == "github" else "webhook"
+        metrics.registry.retry(self.service, method or "", endpoint)
+        return super().increment(method, url, *args, **kwargs)
+
+def retry_policy(service="github", settings=None):
+    """
+    Retries connection errors and TRANSIENT_STATUSES with a jittered
+    exponential backoff. Requests that may have reached the server are only
+    repeated for idempotent methods: all GitHub methods but POST, and none of
+    the webhook posts.
+    """
+    settings = settings or get_http_settings()
+    retries = settings["retries"]
+    return MeteredRetry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        other=0,
+        allowed_methods=GITHUB_IDEMPOTENT_METHODS if service == "github" else WEBHOOK_IDEMPOTENT_METHODS,
+        status_forcelist=TRANSIENT_STATUSES,
+        backoff_factor=settings["backoff_factor"],
+        backoff_jitter=settings["backoff_jitter"],
+        backoff_max=settings["backoff_max"],
+        # Rate-limit waits are the scheduler's and the webhook code's to make
+        respect_retry_after_header=False,
+        raise_on_status=False,
+        raise_on_redirect=False,
+        service=service
+    )
+
+def session(service="github"):
+    """
+    Returns the requests session shared by every caller of `service`
+    ("github" or a notification webhook): keep-alive connections pooled to
+    the configured size, gzip responses and retry_policy().
+    """
+    import requests
+
+    settings = get_http_settings()
+    with _sessions_lock:
+        shared = _sessions.get(service)
+        if shared is None:
+            shared = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=requests.adapters.DEFAULT_POOLSIZE,
+                pool_maxsize=settings["pool_size"],
+                max_retries=retry_policy(service, settings)
+            )
+            shared.mount("https://", adapter)
+            shared.mount("http://", adapter)
+            shared.headers["Accept-Encoding"] = "gzip, deflate"
+            shared.headers["Connection"] = "keep-alive"
+            _sessions[service] = shared
+        return shared
+
+class CachedResponse:
+    """
+    Replays a cached body for a request GitHub answered with 304 Not Modified.
+    Headers of the fresh response (rate limits, dates) override the cached ones.
+    """
+
+    def __init__(self, headers, body, response):
+        self.status = 200
+        self.headers = {**headers, **response.headers}
+        self.response = response
+        self._body = body
+
+    def getheaders(self):
+        return self.headers.items()
+
+    def read(self):
+        return self._body
+
+def _cache_key(url, headers):
+    # Responses depend on who is asking and which media type was requested
+    authorization = headers.get("Authorization", "")
+    identity = hashlib.sha256(authorization.encode()).hexdigest()[:16]
+    return f"{identity}|{headers.get('Accept', '')}|{url}"
+
+class _ThreadSafeConnection:
+    """
+    PyGithub keeps one connection object per client and stores the pending
+    request on it between request() and getresponse(). Keep the pending
+    request per thread so one client can be shared by a worker pool.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+        # Every client (the app's token minting too) shares one tuned pool
+        self.session.close()
+        self.session = session("github")
+        # Keeps requests from falling back to ~/.netrc, as PyGithub does
+        self.session.auth = Requester.noopAuth
+
+    def request(self, verb, url, input, headers, stream=False):
+        self._local.pending = (verb, url, input, headers, stream)
+
+    def getresponse(self):
+        verb, url, data, headers, stream = self._local.pending
+        self._local.pending = None
+        url = f"{self.protocol}://{self.host}:{self.port}{url}"
+
+        http_cache = cache
+        if http_cache is None or verb != "GET" or stream or _is_conditional(headers):
+            return RequestsResponse(self._send(verb, url, headers, data, stream))
+
+        key = _cache_key(url, headers)
+        entry = http_cache.lookup(key)
+        if entry is not None:
+            etag, last_modified, _, _ = entry
+            headers = dict(headers)
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = self._send(verb, url, headers, data, stream)
+        if response.status_code == 304 and entry is not None:
+            http_cache.hit(key)
+            return CachedResponse(entry[2], entry[3], response)
+
+        http_cache.miss()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code == 200 and (etag or last_modified):
+            http_cache.store(key, etag, last_modified, response.headers, response.text)
+        return RequestsResponse(response)
+
+    def _send(self, verb, url, headers, data, stream):
+        send = getattr(self.session, verb.lower())
+        endpoint = metrics.endpoint_template(urlsplit(url).path)
+        attempt = 0
+        while True:
+            pool = credentials
+            credential = None
+            # Requests of the GitHub App itself are signed with its JWT and keep it
+            if pool is not None and not endpoint.startswith("/app"):
+                credential = pool.choose()
+                headers = {**headers, "Authorization": credential.authorization()}
+            scheduler.before_request(verb)
+            started = time.perf_counter()
+            try:
+                response = send(
+                    url,
+                    headers=headers,
+                    data=data,
+                    timeout=timeout(),
+                    verify=self.verify,
+                    allow_redirects=False,
+                    stream=stream
+                )
+            except Exception as e:
+                metrics.registry.observe("github", verb, endpoint, type(e).__name__, time.perf_counter() - started)
+                raise
+            metrics.registry.observe("github", verb, endpoint, response.status_code, time.perf_counter() - started)
+            metrics.registry.rate_limit(response.headers)
+            budget = response.headers
+            if credential is not None:
+                pool.update(credential, response.headers)
+                if (
+                    response.status_code in (403, 429)
+                    and credential.remaining == 0
+                    and pool.available()
+                    and attempt < scheduler.max_retries
+                ):
+                    # This credential is spent but another one still has budget
+                    metrics.registry.retry("github", verb, endpoint)
+                    attempt += 1
+                    continue
+                budget = pool.budget_headers(response.headers)
+            body = response.text if response.status_code in (403, 429) and not stream else ""
+            if scheduler.after_response(verb, response.status_code, budget, body, attempt) is None:
+                return response
+            metrics.registry.retry("github", verb, endpoint)
+            attempt += 1
+            if hasattr(data, "seek"):
+                data.seek(0)
+
+def _is_conditional(headers):
+    # Leave requests PyGithub already made conditional (e.g. Repository.update()) alone
+    return "If-None-Match" in headers or "If-Modified-Since" in headers
+
+class HTTPSConnection(_ThreadSafeConnection, HTTPSRequestsConnectionClass):
+    pass
+
+class HTTPConnection(_ThreadSafeConnection, HTTPRequestsConnectionClass):
+    pass
+
+def enable_cache(path=None):
+    """
+    Turns on the persistent conditional-request cache. A cache that cannot be
+    opened (e.g. read-only home directory) is reported and left disabled.
+    """
+    global cache, use_cache
+    use_cache = True
+    try:
+        cache = HttpCache(path)
+    except Exception as e:
+        print(f"HTTP cache disabled: {str(e)}", file=sys.stderr)
+        cache = None
+    return cache
+
+def disable_cache():
+    global cache, use_cache
+    if cache is not None:
+        cache.close()
+    cache = None
+    use_cache = False
+
+def install():
+    """
+    Makes PyGithub use the ghrm connection classes for new clients.
+    """
+    if use_cache and cache is None:
+        enable_cache()
+    Requester.injectConnectionClasses(HTTPConnection, HTTPSConnection)
@@ -0,0 +1,203 @@
+# watch.py - Notices changes to config files
+
+import glob
+import os
+import select
+import struct
+import time
+from .config import CONFIG_EXTENSIONS, resolve_paths
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+
+_EVENT = struct.Struct("iIII")
+
+def watch_root(source):
+    """
+    Returns (directory, recursive) to watch for a config source: the
+    directory itself, the directory of a file, or the fixed part of a glob.
+    """
+    if os.path.isdir(source):
+        return source, False
+    if glob.has_magic(source):
+        parts = []
+        for part in source.split(os.sep):
+            if glob.has_magic(part):
+                break
+            parts.append(part)
+        root = os.sep.join(parts) or "."
+        return root, "**" in source
+    return os.path.dirname(source) or ".", False
+
+class PollingWatcher:
+    """
+    Compares the modification time and size of the config files every
+    `interval` seconds.
+    """
+    kind = "polling"
+
+    def __init__(self, source, interval, clock=time.monotonic):
+        self.source = source
+        self.interval = interval
+        self.clock = clock
+        self._snapshot = self._scan()
+        self._next_poll = clock() + interval
+
+    def _scan(self):
+        try:
+            paths = resolve_paths(self.source)
+        except FileNotFoundError:
+            return {}
+        snapshot = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout):
+        """
+        Returns True once a config file changed, False after `timeout` seconds without changes.
+        """
+        deadline = self.clock() + timeout
+        while True:
+            now = self.clock()
+            if now >= self._next_poll:
+                self._next_poll = now + self.interval
+                snapshot = self._scan()
+                if snapshot != self._snapshot:
+                    self._snapshot = snapshot
+                    return True
+            if now >= deadline:
+                return False
+            time.sleep(max(0.0, min(self._next_poll, deadline) - now))
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """
+    Uses Linux inotify (through libc, no extra dependency) to be told about
+    changes instead of scanning for them.
+    """
+    kind = "inotify"
+
+    def __init__(self, source):
+        import ctypes
+        import ctypes.util
+
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        self.root, self.recursive = watch_root(source)
+        # Only this file matters when the source is a single file
+        self._name = None
+        if not os.path.isdir(source) and not glob.has_magic(source):
+            self._name = os.path.basename(source)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._get_errno = ctypes.get_errno
+        self._dirs = {}
+        try:
+            self._add(self.root)
+            if self.recursive:
+                for directory, _, _ in os.walk(self.root):
+                    if directory != self.root:
+                        self._add(directory)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def _add(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = self._get_errno()
+            raise OSError(errno, f"Cannot watch {directory}: {os.strerror(errno)}")
+        self._dirs[wd] = directory
+
+    def _relevant(self, wd, mask, name):
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            return True
+        if mask & IN_ISDIR:
+            if self.recursive and mask & (IN_CREATE | IN_MOVED_TO) and wd in self._dirs:
+                try:
+                    self._add(os.path.join(self._dirs[wd], name))
+                except OSError:
+                    pass
+            return self.recursive
+        if self._name is not None:
+            return name == self._name
+        return name.endswith(CONFIG_EXTENSIONS)
+
+    def _drain(self):
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+                offset += length
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                if self._relevant(wd, mask, name):
+                    changed = True
+
+    def wait(self, timeout):
+        """
+        Returns True once a config file changed, False after `timeout` seconds without changes.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if readable and self._drain():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+def open_watcher(source, poll_interval, polling=False):
+    """
+    Returns an InotifyWatcher where inotify is available, a PollingWatcher otherwise.
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(source)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(source, poll_interval)
@@ -0,0 +1,25 @@
+"""Shared fixtures."""
+import pytest
+from ghrm import repository, transport
+from ghrm.ratelimit import RateLimitScheduler
+
+@pytest.fixture
+def fake_api(monkeypatch, tmp_path):
+    """A fake GitHub API with an authenticated ghrm client pointed at it."""
+    fake_github = pytest.importorskip("benchmarks.fake_github")
+    with fake_github.FakeGitHub() as server:
+        monkeypatch.setenv("GITHUB_API_URL", server.url)
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", f"{server.url}/graphql")
+        monkeypatch.setenv("GITHUB_TOKEN", "test-token")
+        monkeypatch.setenv("GITHUB_ORG", server.org)
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        monkeypatch.delenv("GITHUB_APP_ID", raising=False)
+        monkeypatch.delenv("GITHUB_TOKEN_POOL", raising=False)
+        monkeypatch.setattr(transport, "cache", None)
+        monkeypatch.setattr(transport, "use_cache", False)
+        monkeypatch.setattr(transport, "credentials", None)
+        monkeypatch.setattr(transport, "scheduler", RateLimitScheduler(writes_per_minute=6000, write_burst=100))
+        monkeypatch.setattr(repository, "_client", None)
+        repository.get_github()
+        server.log.clear()
+        yield server
@@ -0,0 +1,65 @@
+"""Tests for skipping config entries applied by earlier runs."""
+import sys
+from ghrm.applied import AppliedState
+
+ENTRIES = [
+    ("repo1", "First", {"description": "First", "private": True}),
+    ("repo2", "Team repositories", None),
+]
+
+def test_unchanged_entries_are_skipped(tmp_path):
+    """Only added or changed entries are pending after a successful run."""
+    path = str(tmp_path / "state.json")
+    state = AppliedState(path, org="acme")
+    assert list(state.pending(ENTRIES)) == ENTRIES
+    for entry in ENTRIES:
+        state.record(entry, "created")
+    state.save()
+
+    changed = ("repo1", "First", {"private": True, "description": "First", "has_wiki": False})
+    added = ("repo3", None, {})
+    state = AppliedState(path, org="acme")
+    assert list(state.pending([changed, ENTRIES[1], added])) == [changed, added]
+    assert state.skipped == 1
+    assert list(state.pending(ENTRIES, full=True)) == ENTRIES
+
+def test_key_order_does_not_matter(tmp_path):
+    state = AppliedState(str(tmp_path / "state.json"))
+    state.record(("repo1", None, {"a": 1, "b": 2}), "updated")
+    assert list(state.pending([("repo1", None, {"b": 2, "a": 1})])) == []
+
+def test_removed_entries_are_pruned(tmp_path):
+    """Entries no longer in the config are dropped; another org starts empty."""
+    path = str(tmp_path / "state.json")
+    state = AppliedState(path, org="acme")
+    for entry in ENTRIES:
+        state.record(entry, "created")
+    state.save()
+
+    state = AppliedState(path, org="acme")
+    list(state.pending(ENTRIES[:1]))
+    assert state.prune() == ["repo2"]
+    state.save()
+    assert list(AppliedState(path, org="acme").entries) == ["repo1"]
+    assert AppliedState(path, org="other").entries == {}
+
+def test_refused_creations_are_not_recorded(fake_api, tmp_path, monkeypatch):
+    """An entry GitHub refused is pending again on the next run."""
+    from ghrm.cli import run_cli
+
+    config = tmp_path / "repos.yaml"
+    config.write_text("repositories:\n  api:\n    description: API\n")
+    state_file = tmp_path / "state.json"
+    fake_api.inject_faults("POST", 422)
+    monkeypatch.setattr(sys, "argv", [
+        "ghrm", "create",
+        "--config", str(config),
+        "--state-file", str(state_file),
+        "--journal", str(tmp_path / "journal.ndjson"),
+        "--no-cache",
+        "--output", "text",
+    ])
+    run_cli()
+
+    state = AppliedState(str(state_file), fake_api.org)
+    assert [entry[0] for entry in state.pending([("api", "API", {"description": "API"})])] == ["api"]
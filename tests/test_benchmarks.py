@@ -0,0 +1,55 @@
+"""Smoke test for the benchmark suite and its fake GitHub API."""
+import pytest
+from ghrm import repository, transport
+
+benchmarks = pytest.importorskip("benchmarks.run")
+
+@pytest.fixture
+def isolated(monkeypatch):
+    for name in ("GITHUB_API_URL", "GITHUB_GRAPHQL_URL", "GITHUB_TOKEN", "GITHUB_ORG", "XDG_CACHE_HOME"):
+        monkeypatch.setenv(name, "")
+    monkeypatch.setattr(transport, "scheduler", transport.scheduler)
+    monkeypatch.setattr(transport, "cache", None)
+    monkeypatch.setattr(transport, "use_cache", transport.use_cache)
+    yield
+    repository._client = None
+
+def test_benchmark_scenarios_run(isolated, tmp_path):
+    """Every scenario completes against the fake API and reports its request counts."""
+    out = tmp_path / "results.json"
+    report = benchmarks.main(["--sizes", "20", "--out", str(out)])
+    results = {result["scenario"]: result for result in report["results"]}
+    assert set(results) == set(benchmarks.SCENARIOS)
+    assert results["create_repository"]["requests_per_repo"] == 2
+    assert results["create_repository"]["by_status"] == {"404": 20, "201": 20}
+    assert results["delete_repository"]["by_status"] == {"200": 20, "204": 20}
+    # One org listing, then deletes without a lookup per repository
+    assert results["decommission_repository"]["by_route"] == {
+        "GET /orgs/{org}/repos": 1,
+        "DELETE /repos/{org}/{repo}": 20,
+    }
+    # Half the repositories exist: one write each, reads come from the org listing
+    # Repositories already carry the configured labels: one listing each, no writes
+    assert results["labels_sync"]["by_route"] == {"GET /repos/{org}/{repo}/labels": 20}
+    # One listing per team; only the access every tenth repository lacks is granted
+    assert results["teams_sync"]["by_route"] == {
+        "GET /orgs/{org}/teams/{team}/repos": benchmarks.BENCH_TEAMS,
+        "PUT /orgs/{org}/teams/{team}/repos/{org}/{repo}": 2 * benchmarks.BENCH_TEAMS,
+    }
+    # The drift report reads the organization listing, and the merge option it leaves out in one query
+    assert results["drift"]["by_route"] == {"GET /orgs/{org}/repos": 1, "POST /graphql": 1}
+    # The same batched read completes the inventory for create: no lookup per repository
+    assert results["run_cli"]["by_route"] == {
+        "GET /orgs/{org}/repos": 1,
+        "POST /graphql": 1,
+        "POST /orgs/{org}/repos": 10,
+        "PATCH /repos/{org}/{repo}": 10,
+    }
+    assert out.exists()
+
+def test_memory_benchmark(tmp_path):
+    """RepoState records take a fraction of the memory of PyGithub objects."""
+    memory = pytest.importorskip("benchmarks.memory")
+    report = memory.main(["--repos", "300", "--out", str(tmp_path / "memory.json")])
+    results = {result["model"]: result for result in report["results"]}
+    assert results["repo_state"]["bytes"] * 5 < results["pygithub"]["bytes"]
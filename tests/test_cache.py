@@ -0,0 +1,74 @@
+"""Tests for the conditional-request cache."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from ghrm import transport
+from ghrm.cache import HttpCache
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """Serves a fixed body and honours If-None-Match."""
+    requests = []
+
+    def do_GET(self):
+        ETagHandler.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("X-RateLimit-Remaining", "4999")
+            self.end_headers()
+            return
+        body = b'{"name": "repo1"}'
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ETagHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    ETagHandler.requests = []
+    yield httpd
+    httpd.shutdown()
+
+@pytest.fixture
+def http_cache(tmp_path):
+    cache = transport.enable_cache(str(tmp_path / "http.sqlite"))
+    yield cache
+    transport.disable_cache()
+
+def fetch(server, headers=None):
+    cnx = transport.HTTPConnection("127.0.0.1", server.server_address[1])
+    cnx.request("GET", "/repos/org/repo1", None, headers or {"Authorization": "token abc"})
+    return cnx.getresponse()
+
+def test_second_read_is_conditional(server, http_cache):
+    """The second GET sends If-None-Match and replays the cached body."""
+    first = fetch(server)
+    second = fetch(server)
+    assert ETagHandler.requests == [None, '"v1"']
+    assert first.status == second.status == 200
+    assert second.read() == '{"name": "repo1"}'
+    assert dict(second.getheaders())["X-RateLimit-Remaining"] == "4999"
+    assert (http_cache.hits, http_cache.misses) == (1, 1)
+
+def test_cache_is_keyed_by_credentials(server, http_cache):
+    """A different token never sees another token's cached response."""
+    fetch(server)
+    fetch(server, {"Authorization": "token other"})
+    assert ETagHandler.requests == [None, None]
+
+def test_eviction_keeps_cache_bounded(tmp_path):
+    """Least recently used entries are evicted once the size budget is exceeded."""
+    cache = HttpCache(str(tmp_path / "http.sqlite"), max_bytes=1000)
+    for i in range(10):
+        cache.store(f"key{i}", f'"{i}"', None, {}, "x" * 200)
+    assert len(cache) < 10
+    assert cache.lookup("key9") is not None
+    assert cache.lookup("key0") is None
+    cache.close()
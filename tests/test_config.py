@@ -0,0 +1,122 @@
+"""Tests for loading repository config files."""
+import datetime
+import io
+import pickle
+import pytest
+from ghrm import config
+from ghrm.config import ConfigSource
+
+TEAM_A = """
+description: Team A repositories
+defaults: &defaults
+  private: true
+  has_wiki: false
+repositories:
+  repo1:
+    <<: *defaults
+    description: First repository
+  repo2:
+    <<: *defaults
+    has_wiki: true
+"""
+
+TEAM_B = """
+description: Team B repositories
+repositories:
+  - repo3
+  - Repo1
+"""
+
+@pytest.fixture
+def config_dir(tmp_path):
+    directory = tmp_path / "config"
+    directory.mkdir()
+    (directory / "a.yaml").write_text(TEAM_A)
+    (directory / "b.yml").write_text(TEAM_B)
+    (directory / "notes.txt").write_text("not a config file")
+    return directory
+
+def test_directory_files_are_merged(config_dir, tmp_path, capsys):
+    """Every YAML file is read in order; merge keys resolve and duplicates keep the first definition."""
+    source = ConfigSource(str(config_dir), cache_dir=str(tmp_path / "cache"))
+    entries = list(source.repositories())
+    assert entries == [
+        ("repo1", "First repository", {"private": True, "has_wiki": False, "description": "First repository"}),
+        ("repo2", None, {"private": True, "has_wiki": True}),
+        ("repo3", "Team B repositories", None),
+    ]
+    assert "Repo1" in capsys.readouterr().err
+    assert len(source) == 4
+    assert source.settings["description"] == "Team B repositories"
+
+def test_glob_and_set_syntax(tmp_path):
+    """A glob selects files and `{a, b}` lists repositories without settings."""
+    (tmp_path / "one.yaml").write_text("repositories: {repo1, repo2}\n")
+    (tmp_path / "two.yaml").write_text("")
+    source = ConfigSource(str(tmp_path / "*.yaml"), use_cache=False)
+    assert source.repository_configs() == {"repo1": {}, "repo2": {}}
+
+def test_second_load_uses_compiled_cache(config_dir, tmp_path, monkeypatch):
+    """Unchanged files are not parsed again; an edited file is."""
+    cache_dir = str(tmp_path / "cache")
+    first = list(ConfigSource(str(config_dir), cache_dir=cache_dir).repositories())
+
+    def fail(path):
+        raise AssertionError(f"{path} parsed again")
+
+    monkeypatch.setattr(config, "parse_config_file", fail)
+    assert list(ConfigSource(str(config_dir), cache_dir=cache_dir).repositories()) == first
+
+    (config_dir / "b.yml").write_text("repositories: [repo4]\n")
+    with pytest.raises(AssertionError):
+        list(ConfigSource(str(config_dir), cache_dir=cache_dir).repositories())
+
+def test_missing_source_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ConfigSource(str(tmp_path / "missing.yaml"))
+    with pytest.raises(FileNotFoundError):
+        ConfigSource(str(tmp_path / "*.yaml"))
+
+def test_damaged_cache_is_rebuilt(config_dir, tmp_path):
+    """Whatever a stale or truncated cache file raises, the config is read from the files."""
+    cache_dir = tmp_path / "cache"
+    first = list(ConfigSource(str(config_dir), cache_dir=str(cache_dir)).repositories())
+
+    metas = sorted(cache_dir.glob("*.meta"))
+    # Names a class that no longer exists
+    metas[0].write_bytes(b"cghrm.config\nRemovedClass\n.")
+    for entries in cache_dir.glob("*.entries"):
+        entries.write_bytes(entries.read_bytes()[:-5])
+    source = ConfigSource(str(config_dir), cache_dir=str(cache_dir))
+    assert list(source.repositories()) == first
+    assert len(source) == 4
+
+def test_cache_cannot_run_code(config_dir, tmp_path, monkeypatch):
+    """A planted cache file naming anything but date and time classes is refused and the files are read."""
+    cache_dir = tmp_path / "cache"
+    first = list(ConfigSource(str(config_dir), cache_dir=str(cache_dir)).repositories())
+    calls = []
+    monkeypatch.setattr(config, "planted", calls.append, raising=False)
+
+    for entries in cache_dir.glob("*.entries"):
+        entries.write_bytes(b"cghrm.config\nplanted\n(S'ran'\ntR.")
+    assert list(ConfigSource(str(config_dir), cache_dir=str(cache_dir)).repositories()) == first
+    assert calls == []
+
+    # Dates from YAML still load
+    released = datetime.datetime(2024, 5, 1, tzinfo=datetime.timezone.utc)
+    assert config.CacheUnpickler(io.BytesIO(pickle.dumps(("repo1", {"released": released})))).load()[1] == {
+        "released": released
+    }
+    with pytest.raises(pickle.UnpicklingError):
+        config.CacheUnpickler(io.BytesIO(pickle.dumps(print))).load()
+
+def test_failed_compile_leaves_no_temporary_files(config_dir, tmp_path, monkeypatch):
+    def broken(path):
+        yield "repository", "repo1", {}
+        raise ValueError("bad YAML")
+
+    monkeypatch.setattr(config, "parse_config_file", broken)
+    with pytest.raises(ValueError):
+        list(ConfigSource(str(config_dir), cache_dir=str(tmp_path / "cache")).repositories())
+    assert not list((tmp_path / "cache").glob("*.tmp"))
@@ -0,0 +1,88 @@
+"""Tests for GitHub App authentication and the credential pool."""
+import pytest
+from ghrm import repository, transport
+from ghrm.credentials import Credential, CredentialPool
+from ghrm.ratelimit import RateLimitScheduler
+
+def _client(monkeypatch, tmp_path, server):
+    monkeypatch.setenv("GITHUB_API_URL", server.url)
+    monkeypatch.setenv("GITHUB_ORG", server.org)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setattr(transport, "cache", None)
+    monkeypatch.setattr(transport, "use_cache", False)
+    monkeypatch.setattr(transport, "credentials", None)
+    monkeypatch.setattr(transport, "scheduler", RateLimitScheduler(writes_per_minute=6000, write_burst=100))
+    monkeypatch.setattr(repository, "_client", None)
+    return repository.get_github()
+
+def test_app_installation_tokens_are_cached_and_refreshed(monkeypatch, tmp_path):
+    """One installation token serves every request until it is about to expire."""
+    fake_github = pytest.importorskip("benchmarks.fake_github")
+    rsa = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.rsa")
+    from cryptography.hazmat.primitives import serialization
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    with fake_github.FakeGitHub(app_id=4242) as server:
+        server.token_ttl = 10
+        server.add_repo("api")
+        monkeypatch.setenv("GITHUB_APP_ID", "4242")
+        monkeypatch.setenv("GITHUB_APP_PRIVATE_KEY", key.replace("\n", "\\n"))
+        monkeypatch.delenv("GITHUB_APP_INSTALLATION_ID", raising=False)
+        monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+        monkeypatch.delenv("GITHUB_TOKEN_POOL", raising=False)
+        _client(monkeypatch, tmp_path, server)
+
+        # Expiring within the refresh threshold, so every request mints a new one
+        repository.get_repo("api")
+        assert len(server.tokens_issued) >= 2
+
+        server.token_ttl = 3600
+        issued = len(server.tokens_issued)
+        for _ in range(3):
+            repository.get_repo("api")
+        assert len(server.tokens_issued) == issued + 1
+        assert repository.get_token() == server.tokens_issued[-1]
+        assert server.log.routes().count("GET /orgs/{org}/installation") == 1
+        assert f"token {server.tokens_issued[-1]}" in server.authorizations
+
+def test_requests_rotate_through_the_pool(monkeypatch, tmp_path):
+    """Three credentials of 5 requests each cover 12 requests without a 403."""
+    fake_github = pytest.importorskip("benchmarks.fake_github")
+    with fake_github.FakeGitHub(rate_limit=5) as server:
+        server.add_repo("api")
+        monkeypatch.delenv("GITHUB_APP_ID", raising=False)
+        monkeypatch.setenv("GITHUB_TOKEN", "primary")
+        monkeypatch.setenv("GITHUB_TOKEN_POOL", "second, third")
+        _client(monkeypatch, tmp_path, server)
+        assert len(transport.credentials) == 3
+
+        server.log.clear()
+        for _ in range(10):
+            repository.get_repo("api")
+
+        assert 403 not in [status for _, _, status, _ in server.log.entries]
+        assert set(server.authorizations) == {"token primary", "token second", "token third"}
+        assert all(count <= 5 for count in server.authorizations.values())
+
+def test_pool_chooses_the_largest_budget():
+    clock = lambda: 1000
+    first, second = Credential(None, "first"), Credential(None, "second")
+    pool = CredentialPool([first, second], clock=clock)
+    # Unknown budgets go first
+    pool.update(first, {"X-RateLimit-Limit": "10", "X-RateLimit-Remaining": "3", "X-RateLimit-Reset": "2000"})
+    assert pool.choose() is second
+    assert pool.budget_headers({"X-RateLimit-Remaining": "3"}) == {"X-RateLimit-Remaining": "3"}
+
+    pool.update(second, {"X-RateLimit-Limit": "10", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1500"})
+    assert pool.choose() is first
+    assert first.remaining == 2
+    assert pool.budget_headers({}) == {
+        "X-RateLimit-Remaining": "2",
+        "X-RateLimit-Limit": "20",
+        "X-RateLimit-Reset": "1500",
+    }
+    # A credential whose reset has passed is trusted again
+    pool.clock = lambda: 1600
+    assert pool.choose() is second
@@ -0,0 +1,36 @@
+"""Tests for the bulk decommission pipeline against the fake GitHub API."""
+from ghrm.decommission import decommission, ALREADY_GONE, DELETED, WOULD_DELETE
+
+def test_dry_run_makes_no_writes(fake_api):
+    """The plan is built from reads only and reports missing repositories as gone."""
+    for name in ("old-1", "old-2"):
+        fake_api.add_repo(name)
+    results = list(decommission(["old-1", "OLD-2", "never-existed"]))
+    assert [(r.repository, r.status) for r in results] == [
+        ("old-1", WOULD_DELETE), ("OLD-2", WOULD_DELETE), ("never-existed", ALREADY_GONE)
+    ]
+    assert all(route.startswith("GET") for route in fake_api.log.routes())
+    assert len(fake_api.repos) == 2
+
+def test_deletes_run_without_lookups(fake_api):
+    """Listed repositories are deleted with no pre-check; a 404 counts as already gone."""
+    names = [f"old-{i}" for i in range(150)]
+    for name in names:
+        fake_api.add_repo(name)
+    # A stale listing that still contains a repository deleted since
+    inventory = {name: type("Listed", (), {"name": name})() for name in names + ["removed"]}
+    results = list(decommission(names + ["removed"], dry_run=False, concurrency=8, inventory=inventory))
+    assert [r.status for r in results] == [DELETED] * 150 + [ALREADY_GONE]
+    assert fake_api.log.routes() == ["DELETE /repos/{org}/{repo}"] * 151
+    assert fake_api.repos == {}
+
+def test_large_lists_use_one_listing(fake_api):
+    names = [f"old-{i}" for i in range(250)]
+    for name in names:
+        fake_api.add_repo(name)
+    results = list(decommission(names + ["missing"], dry_run=False, concurrency=8))
+    assert results[-1].status == ALREADY_GONE
+    routes = fake_api.log.routes()
+    assert routes.count("GET /orgs/{org}/repos") == 3
+    assert routes.count("DELETE /repos/{org}/{repo}") == 250
+    assert "GET /repos/{org}/{repo}" not in routes
@@ -0,0 +1,83 @@
+"""Tests for the drift report."""
+import json
+import sys
+import pytest
+from ghrm.display import display_list
+from ghrm.drift import drift, format_changes, DRIFTED, IN_SYNC, MISSING, UNMANAGED
+
+def test_drift_reads_one_listing(fake_api):
+    """Every status is found from the organization listing alone."""
+    fake_api.add_repo("api", description="API")
+    fake_api.add_repo("Web", description="Web", has_wiki=False)
+    fake_api.add_repo("scratch")
+    for i in range(150):
+        fake_api.add_repo(f"svc-{i}", description="Service")
+    entries = [
+        ("api", "API", {"has_wiki": True}),
+        ("web", "Web", {"has_wiki": True}),
+        ("docs", "Docs", {}),
+    ] + [(f"svc-{i}", "Service", None) for i in range(150)]
+
+    results = {result.repository: result for result in drift(iter(entries))}
+
+    assert results["api"].status == IN_SYNC
+    assert results["web"].status == DRIFTED
+    # Names differing only in case are the same repository
+    assert results["web"].changes == {"has_wiki": (False, True)}
+    assert results["docs"].status == MISSING
+    assert results["scratch"].status == UNMANAGED
+    assert sum(result.status == IN_SYNC for result in results.values()) == 151
+    assert fake_api.log.routes() == ["GET /orgs/{org}/repos"] * 2
+
+def test_drift_reads_settings_the_listing_leaves_out(fake_api, monkeypatch):
+    """Merge options come from one GraphQL query per batch, others from a REST read."""
+    from ghrm import drift as drift_module
+    monkeypatch.setattr(drift_module, "READ_BATCH_SIZE", 2)
+    fake_api.add_repo("api", allow_squash_merge=False)
+    fake_api.add_repo("web")
+    fake_api.add_repo("docs")
+    entries = [
+        ("api", None, {"allow_squash_merge": False, "delete_branch_on_merge": False}),
+        ("web", None, {"allow_squash_merge": False}),
+        ("docs", None, {"allow_auto_merge": True}),
+    ]
+
+    results = {result.repository: result for result in drift(iter(entries))}
+
+    assert results["api"].status == IN_SYNC
+    assert results["api"].unchecked == []
+    assert results["web"].changes == {"allow_squash_merge": (True, False)}
+    # Neither the GraphQL reader nor this repository's REST object has it
+    assert results["docs"].unchecked == ["allow_auto_merge"]
+    assert fake_api.log.routes() == [
+        "GET /orgs/{org}/repos",
+        "POST /graphql",
+        "POST /graphql",
+        "GET /repos/{org}/{repo}",
+    ]
+
+def test_format_changes():
+    assert format_changes({"private": (False, True)}) == "private: False -> True"
+
+def test_display_list_streams_ndjson_and_csv(capsys):
+    rows = [("web", "drifted", {"has_wiki": {"current": False, "desired": True}}, [])]
+    display_list("Drift report", iter(rows), ["Repository", "Status", "Changes", "Not checked"], format="ndjson")
+    assert json.loads(capsys.readouterr().out) == {
+        "repository": "web",
+        "status": "drifted",
+        "changes": {"has_wiki": {"current": False, "desired": True}},
+        "not_checked": [],
+    }
+    display_list("Drift report", [("docs", "missing")], ["Repository", "Status"], format="csv")
+    assert capsys.readouterr().out.splitlines() == ["repository,status", "docs,missing"]
+
+@pytest.mark.parametrize("option", [["--output", "ndjson"], ["--quiet"]])
+def test_drift_rejects_reporter_options(option, monkeypatch, capsys):
+    """drift has its own --format; --output and --quiet are refused rather than ignored."""
+    from ghrm.cli import run_cli
+
+    monkeypatch.setattr(sys, "argv", ["ghrm", "drift", "--config", "config/repositories.yaml", *option])
+    with pytest.raises(SystemExit) as exited:
+        run_cli()
+    assert exited.value.code == 2
+    assert "--format" in capsys.readouterr().err
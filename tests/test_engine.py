@@ -0,0 +1,54 @@
+"""Tests for the batch execution engine."""
+import contextlib
+import random
+import time
+from ghrm.engine import run_tasks, write_gate
+
+def slow_upper(name):
+    """Sleep a little so tasks finish out of order, then print and return."""
+    time.sleep(random.uniform(0, 0.01))
+    print(f"processing {name}")
+    return name.upper()
+
+def fail_on_b(name):
+    if name == "b":
+        raise RuntimeError("boom")
+    return name
+
+def test_serial_and_concurrent_results_match():
+    """Concurrent runs yield the same results, in input order."""
+    names = [f"repo{i}" for i in range(50)]
+    serial = [(r.item, r.value) for r in run_tasks(slow_upper, names)]
+    concurrent = [(r.item, r.value) for r in run_tasks(slow_upper, names, concurrency=8)]
+    assert serial == concurrent
+    assert [item for item, _ in concurrent] == names
+
+def test_errors_are_kept_per_item():
+    """A failing item does not stop the batch."""
+    results = list(run_tasks(fail_on_b, ["a", "b", "c"], concurrency=3))
+    assert [r.value for r in results] == ["a", None, "c"]
+    assert isinstance(results[1].error, RuntimeError)
+    assert results[0].error is None and results[2].error is None
+
+def test_output_is_replayed_in_input_order(capsys):
+    """Output printed by workers appears in input order."""
+    names = [f"repo{i}" for i in range(20)]
+    for _ in run_tasks(slow_upper, names, concurrency=6):
+        pass
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == [f"processing {name}" for name in names]
+
+def test_write_gate_holds_a_scheduler_slot(monkeypatch):
+    from ghrm import transport
+
+    held = []
+
+    class Scheduler:
+        def slot(self, concurrency):
+            held.append(concurrency)
+            return contextlib.nullcontext()
+
+    monkeypatch.setattr(transport, "scheduler", Scheduler())
+    assert write_gate(1) is None
+    assert [result.value for result in run_tasks(str.upper, ["a", "b"], 2, gate=write_gate(2))] == ["A", "B"]
+    assert held == [2, 2]
@@ -0,0 +1,105 @@
+"""Tests for the GraphQL settings reader against a local stub endpoint."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from ghrm.graphql import BATCH_SIZE, DEFAULT_GRAPHQL_URL, GraphQLError, fetch_repo_states, graphql_url
+from ghrm.state import diff_repo_config
+
+EXISTING = {f"repo{i}" for i in range(0, 150, 2)}
+
+def repository_node(name):
+    return {
+        "name": name,
+        "description": f"{name} description",
+        "homepageUrl": "",
+        "visibility": "PRIVATE",
+        "isPrivate": True,
+        "isArchived": False,
+        "hasIssuesEnabled": True,
+        "hasWikiEnabled": False,
+        "hasProjectsEnabled": False,
+        "mergeCommitAllowed": True,
+        "squashMergeAllowed": True,
+        "rebaseMergeAllowed": False,
+        "deleteBranchOnMerge": True,
+    }
+
+class GraphQLStub(BaseHTTPRequestHandler):
+    """Answers aliased repository lookups like the GitHub GraphQL API."""
+    queries = []
+    fail = False
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        GraphQLStub.queries.append(request)
+        data, errors = {}, []
+        for key, name in request["variables"].items():
+            if key == "owner":
+                continue
+            alias = "r" + key[1:]
+            if name in EXISTING:
+                data[alias] = repository_node(name)
+            else:
+                data[alias] = None
+                errors.append({"type": "NOT_FOUND", "path": [alias], "message": "Could not resolve"})
+        if GraphQLStub.fail:
+            errors.append({"type": "RATE_LIMITED", "message": "API rate limit exceeded"})
+        body = json.dumps({"data": data, "errors": errors}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def endpoint():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), GraphQLStub)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    GraphQLStub.queries = []
+    GraphQLStub.fail = False
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/graphql"
+    httpd.shutdown()
+
+def test_batches_lookups(endpoint):
+    """150 names take two queries and only existing repositories are returned."""
+    names = [f"repo{i}" for i in range(150)]
+    states = fetch_repo_states("acme", names, "token", url=endpoint)
+    assert len(GraphQLStub.queries) == 2
+    assert len(GraphQLStub.queries[0]["variables"]) == BATCH_SIZE + 1
+    assert set(states) == EXISTING
+
+def test_states_compare_with_config(endpoint):
+    """States use PyGithub attribute names, so they diff against YAML config."""
+    state = fetch_repo_states("acme", ["repo2"], "token", url=endpoint)["repo2"]
+    assert state.visibility == "private"
+    repo_config = {
+        "name": "repo2",
+        "description": "repo2 description",
+        "private": True,
+        "has_wiki": True,
+        "allow_rebase_merge": False,
+        "delete_branch_on_merge": True,
+    }
+    assert diff_repo_config(state, repo_config) == {"has_wiki": True}
+
+def test_other_errors_are_raised(endpoint):
+    """Errors other than NOT_FOUND are surfaced so callers can fall back to REST."""
+    GraphQLStub.fail = True
+    with pytest.raises(GraphQLError):
+        fetch_repo_states("acme", ["repo2"], "token", url=endpoint)
+
+def test_endpoint_follows_the_api_host(monkeypatch):
+    """A GitHub Enterprise token is never sent to github.com."""
+    monkeypatch.delenv("GITHUB_GRAPHQL_URL", raising=False)
+    monkeypatch.delenv("GITHUB_API_URL", raising=False)
+    assert graphql_url() == DEFAULT_GRAPHQL_URL
+    monkeypatch.setenv("GITHUB_API_URL", "https://ghe.example/api/v3/")
+    assert graphql_url() == "https://ghe.example/api/graphql"
+    monkeypatch.setenv("GITHUB_API_URL", "http://127.0.0.1:8080")
+    assert graphql_url() == "http://127.0.0.1:8080/graphql"
+    monkeypatch.setenv("GITHUB_GRAPHQL_URL", "https://graphql.example/")
+    assert graphql_url() == "https://graphql.example/"
@@ -0,0 +1,85 @@
+"""Tests for reconciling repositories against a prefetched inventory."""
+import pytest
+from github import GithubException
+from ghrm import repository
+
+def test_taken_name_is_reconciled_not_skipped(fake_api):
+    """A repository the inventory missed is read and updated when its creation is refused."""
+    fake_api.add_repo("api", description="Old")
+
+    assert repository.create_repository("api", "API", inventory={}) == "updated"
+    assert fake_api.repos["api"]["description"] == "API"
+    assert fake_api.log.routes() == [
+        "POST /orgs/{org}/repos",
+        "GET /repos/{org}/{repo}",
+        "PATCH /repos/{org}/{repo}",
+    ]
+
+def test_other_validation_errors_fail(fake_api):
+    fake_api.inject_faults("POST", 422)
+
+    with pytest.raises(GithubException) as raised:
+        repository.create_repository("api", "API", inventory={})
+    assert raised.value.status == 422
+
+def test_inventory_entries_are_edited_without_a_lookup(fake_api):
+    """Edits and deletes of inventory entries go to the repository URL, with no GET first."""
+    fake_api.add_repo("api", description="Old")
+    fake_api.add_repo("web")
+    inventory = repository.load_inventory()
+    fake_api.log.clear()
+
+    assert repository.create_repository("api", "API", inventory=inventory) == "updated"
+    assert repository.delete_repository("web", inventory=inventory)
+    assert fake_api.log.routes() == ["PATCH /repos/{org}/{repo}", "DELETE /repos/{org}/{repo}"]
+    assert fake_api.repos["api"]["description"] == "API"
+
+def test_one_listing_replaces_the_lookups(fake_api, monkeypatch):
+    """The organization is listed in pages of 100; lookups are then answered from the inventory."""
+    for i in range(250):
+        fake_api.add_repo(f"repo-{i}", description=f"Repository {i}")
+    # A new client, so the organization's repository count includes them
+    monkeypatch.setattr(repository, "_client", None)
+    repository.get_github()
+    fake_api.log.clear()
+
+    assert repository.inventory_pays_off(4)
+    assert not repository.inventory_pays_off(3)
+    inventory = repository.load_inventory()
+    assert len(inventory) == 250
+    assert repository.get_repo("REPO-7", inventory).description == "Repository 7"
+    # Not in the inventory, so it does not exist: no request is made to check
+    assert repository.get_repo("missing", inventory) is None
+    assert fake_api.log.routes() == ["GET /orgs/{org}/repos"] * 3
+
+    assert repository.create_repository("missing", "New", inventory=inventory) == "created"
+    assert fake_api.log.routes()[3:] == ["POST /orgs/{org}/repos"]
+
+def test_settings_left_out_of_the_listing_are_read_in_batches(fake_api):
+    """Merge options the listing leaves out are read by GraphQL, 100 repositories per query."""
+    for i in range(150):
+        fake_api.add_repo(f"repo-{i}")
+    inventory = repository.load_inventory()
+    entries = [(f"repo-{i}", None, {"allow_squash_merge": False}) for i in range(150)]
+    entries.append(("missing", None, {"allow_squash_merge": False}))
+    fake_api.log.clear()
+
+    assert repository.complete_inventory(inventory, entries) == 150
+    assert fake_api.log.routes() == ["POST /graphql"] * 2
+    fake_api.log.clear()
+
+    for repo_name, description, repo_config in entries[:2]:
+        assert repository.create_repository(repo_name, description, repo_config, inventory=inventory) == "updated"
+    assert fake_api.log.routes() == ["PATCH /repos/{org}/{repo}"] * 2
+    assert fake_api.repos["repo-1"]["allow_squash_merge"] is False
+
+def test_paginate_stops_at_the_first_short_page(fake_api):
+    for i in range(5):
+        fake_api.add_repo(f"repo-{i}")
+    org = repository.get_org()
+    fake_api.log.clear()
+
+    repos = repository.paginate(org, f"/orgs/{org.login}/repos", {"type": "all"}, page_size=2)
+    names = [repo["name"] for repo in repos]
+    assert sorted(names) == [f"repo-{i}" for i in range(5)]
+    assert fake_api.log.routes() == ["GET /orgs/{org}/repos"] * 3
@@ -0,0 +1,84 @@
+"""Tests for the run journal and --resume."""
+import os
+import sys
+from ghrm.config import ConfigSource
+from ghrm.journal import Journal, run_key
+
+def test_records_are_synced_in_batches(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+    now = [0.0]
+    path = tmp_path / "journal.ndjson"
+
+    with Journal(str(path), "key", sync_records=100, sync_interval=5.0, clock=lambda: now[0]) as journal:
+        synced.clear()
+        for i in range(250):
+            journal.record(f"repo-{i}", "created")
+        assert len(synced) == 2
+        now[0] = 6.0
+        journal.record("late", "updated")
+        assert len(synced) == 3
+    assert len(path.read_text().splitlines()) == 252
+
+def test_resume_reads_completed_entries(tmp_path):
+    path = str(tmp_path / "journal.ndjson")
+    with Journal(path, "key") as journal:
+        journal.record("api", "created")
+        journal.record("Web", "failed")
+        journal.record("docs", "unchanged")
+        # Refused before anything was applied, by older versions
+        journal.record("ops", "already_exists")
+    # The run died halfway through a record
+    with open(path, "a") as f:
+        f.write('{"repository":"cli","outc')
+
+    with Journal(path, "key", resume=True) as journal:
+        assert journal.resumed
+        assert journal.done("API") == "created"
+        assert journal.done("web") is None
+        assert journal.done("cli") is None
+        assert journal.done("ops") is None
+        journal.record("web", "updated")
+    with Journal(path, "key", resume=True) as journal:
+        assert journal.completed == {"api": "created", "docs": "unchanged", "web": "updated"}
+
+    # Another config starts a new journal
+    with Journal(path, "other", resume=True) as journal:
+        assert not journal.resumed
+        assert journal.completed == {}
+    assert len(open(path).read().splitlines()) == 1
+
+def test_resume_skips_completed_entries(fake_api, tmp_path, monkeypatch, capsys):
+    """Entries the interrupted run completed are neither looked up nor sent again."""
+    from ghrm.cli import run_cli
+
+    config = tmp_path / "repos.yaml"
+    config.write_text("repositories:\n  api:\n    description: API\n  web:\n    description: Web\n")
+    journal_path = str(tmp_path / "journal.ndjson")
+    key = run_key("create", fake_api.org, ConfigSource(str(config), use_cache=False).digest(), dry_run=True)
+    # The interrupted run created `api`, then died before saving its state file
+    fake_api.add_repo("api", description="API")
+    with Journal(journal_path, key) as journal:
+        journal.record("api", "created")
+
+    monkeypatch.setattr(sys, "argv", [
+        "ghrm", "create",
+        "--config", str(config),
+        "--state-file", str(tmp_path / "state.json"),
+        "--journal", journal_path,
+        "--resume",
+        "--no-cache",
+        "--output", "text",
+    ])
+    run_cli()
+
+    assert "Resuming: 1 entries were completed by the interrupted run" in capsys.readouterr().out
+    routes = fake_api.log.routes()
+    assert routes.count("POST /orgs/{org}/repos") == 1
+    assert "PATCH /repos/{org}/{repo}" not in routes
+    assert set(fake_api.repos) == {"api", "web"}
+    # Both are recorded, so the next run skips them without --resume
+    assert '"api"' in (tmp_path / "state.json").read_text()
+    with Journal(journal_path, key, resume=True) as journal:
+        assert journal.completed == {"api": "created", "web": "created"}
@@ -0,0 +1,55 @@
+"""Tests for label synchronisation."""
+from ghrm.labels import LabelSpec, diff_labels, load_label_specs, sync_labels
+
+SPECS = [
+    LabelSpec("bug", ["error"], None, None),
+    LabelSpec("enhancement", ["feature"], "a2eeef", "New feature or request"),
+    LabelSpec("documentation", ["docs"], None, None),
+]
+
+def label(name, color="ededed", description=None):
+    return {"name": name, "color": color, "description": description}
+
+def test_diff_renames_aliases_and_creates_missing():
+    """Aliases are renamed, configured settings updated, missing labels created."""
+    current = [label("Bug"), label("feature", "000000"), label("wontfix")]
+    changes = diff_labels("api", current, SPECS)
+    assert [(c.action, c.label, c.payload) for c in changes] == [
+        ("update", "Bug", {"new_name": "bug"}),
+        ("rename", "feature", {"new_name": "enhancement", "color": "a2eeef", "description": "New feature or request"}),
+        ("create", "documentation", {"name": "documentation", "color": "ededed"}),
+    ]
+
+def test_diff_prunes_only_when_asked():
+    current = [label("bug"), label("enhancement", "a2eeef", "New feature or request"), label("documentation"), label("wontfix")]
+    assert diff_labels("api", current, SPECS) == []
+    assert [(c.action, c.label) for c in diff_labels("api", current, SPECS, prune=True)] == [("delete", "wontfix")]
+
+def test_shipped_label_file_loads():
+    specs = {spec.name: spec for spec in load_label_specs("config/labels.yaml")}
+    assert specs["bug"].aliases == ["error"]
+    assert specs["documentation"].aliases == ["docs"]
+
+def test_sync_sends_only_the_differences(fake_api):
+    """Each repository is listed once; repositories already in line cost no writes."""
+    for i in range(30):
+        fake_api.add_repo(f"repo-{i}")
+    fake_api.add_repo("legacy", labels=[("error", "ff0000", None), ("feature", "00ff00", None)])
+
+    specs = load_label_specs("config/labels.yaml")
+    results = list(sync_labels([f"repo-{i}" for i in range(30)] + ["legacy", "missing"], specs, concurrency=4))
+
+    errors = [result for result in results if result.error is not None]
+    assert [result.repository for result in errors] == ["missing"]
+    changes = [(result.repository, result.change.action, result.change.label) for result in results if result.change]
+    assert sorted(changes) == [
+        ("legacy", "create", "documentation"),
+        ("legacy", "create", "duplicate"),
+        ("legacy", "create", "invalid"),
+        ("legacy", "rename", "error"),
+        ("legacy", "rename", "feature"),
+    ]
+    routes = fake_api.log.routes()
+    assert routes.count("GET /repos/{org}/{repo}/labels") == 32
+    assert len(routes) == 32 + 5
+    assert set(fake_api.labels["legacy"]) == {"bug", "enhancement", "documentation", "duplicate", "invalid"}
@@ -0,0 +1,50 @@
+"""Tests for API call instrumentation."""
+import json
+from ghrm.metrics import Metrics, endpoint_template
+
+def test_endpoint_template():
+    """Owner, repository and id segments are folded into one series per endpoint."""
+    assert endpoint_template("/repos/acme/api?per_page=100") == "/repos/{owner}/{repo}"
+    assert endpoint_template("/api/v3/orgs/acme/repos") == "/orgs/{org}/repos"
+    assert endpoint_template("/repos/acme/api/labels/bug") == "/repos/{owner}/{repo}/labels/{name}"
+    assert endpoint_template("/orgs/acme/teams/core/repos/acme/api") == "/orgs/{org}/teams/{team}/repos/{owner}/{repo}"
+    assert endpoint_template("/user") == "/user"
+
+def test_snapshot_counts_latency_and_budget(tmp_path):
+    """Calls are counted per status, budget use is taken from X-RateLimit-Used."""
+    metrics = Metrics()
+    for seconds in (0.001, 0.002, 0.2):
+        metrics.observe("github", "GET", "/repos/{owner}/{repo}", 200, seconds)
+    metrics.observe("github", "GET", "/repos/{owner}/{repo}", 404, 0.003)
+    metrics.retry("slack", "POST", "webhook")
+    for used in (11, 13, 12):
+        metrics.rate_limit({"X-RateLimit-Used": str(used), "X-RateLimit-Reset": "100",
+                            "X-RateLimit-Remaining": str(5000 - used), "X-RateLimit-Limit": "5000"})
+    metrics.rate_limit({"X-RateLimit-Used": "1", "X-RateLimit-Reset": "200",
+                        "X-RateLimit-Remaining": "4999", "X-RateLimit-Limit": "5000"})
+    with metrics.timer("render"):
+        pass
+
+    path = tmp_path / "metrics.json"
+    metrics.write(str(path), {"scheduler_wait_seconds": 1.5})
+    snapshot = json.loads(path.read_text())
+    endpoint = snapshot["endpoints"][0]
+    assert endpoint["count"] == 4
+    assert endpoint["status"] == {"200": 3, "404": 1}
+    assert endpoint["latency_seconds"]["p50"] == 0.005
+    assert endpoint["latency_seconds"]["max"] == 0.2
+    assert snapshot["rate_limit"]["core"] == {"consumed": 4, "remaining": 4999, "limit": 5000}
+    assert snapshot["phases"]["render"]["count"] == 1
+    assert snapshot["scheduler_wait_seconds"] == 1.5
+
+def test_prometheus_textfile(tmp_path):
+    metrics = Metrics()
+    metrics.observe("github", "POST", "/orgs/{org}/repos", 201, 0.02)
+    path = tmp_path / "ghrm.prom"
+    metrics.write(str(path))
+    text = path.read_text()
+    labels = 'service="github",method="POST",endpoint="/orgs/{org}/repos"'
+    assert f'ghrm_requests_total{{{labels},status="201"}} 1' in text
+    assert f'ghrm_request_duration_seconds_bucket{{{labels},le="0.01"}} 0' in text
+    assert f'ghrm_request_duration_seconds_bucket{{{labels},le="0.025"}} 1' in text
+    assert f'ghrm_request_duration_seconds_count{{{labels}}} 1' in text
@@ -0,0 +1,124 @@
+"""Tests for background notification delivery."""
+import gc
+import json
+import threading
+import weakref
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from ghrm.notifications.dispatcher import NotificationDispatcher
+
+class WebhookStub(BaseHTTPRequestHandler):
+    """Slow webhook that rate limits the first request."""
+    received = []
+    connections = set()
+    delay = 0.05
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        WebhookStub.connections.add(self.client_address)
+        time.sleep(WebhookStub.delay)
+        if not WebhookStub.received and not getattr(WebhookStub, "limited", False):
+            WebhookStub.limited = True
+            self.send_response(429)
+            self.send_header("Retry-After", "0.1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        WebhookStub.received.append(payload)
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def webhook_url():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), WebhookStub)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    WebhookStub.received = []
+    WebhookStub.connections = set()
+    WebhookStub.limited = False
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/hook"
+    httpd.shutdown()
+
+def test_submit_does_not_wait_for_webhooks(webhook_url):
+    """Submitting is immediate; close() flushes everything, including the 429 retry."""
+    dispatcher = NotificationDispatcher(discord_url=webhook_url)
+    started = time.perf_counter()
+    for i in range(10):
+        dispatcher.submit("Repository Created", {"Repository": f"repo{i}"}, "success")
+    assert time.perf_counter() - started < WebhookStub.delay
+
+    dispatcher.close()
+    assert len(WebhookStub.received) == 10
+    fields = [payload["embeds"][0]["fields"][0]["value"] for payload in WebhookStub.received]
+    assert fields == [f"repo{i}" for i in range(10)]
+    assert dispatcher.backends[0].sent == 10
+
+def test_backend_reuses_its_connection(webhook_url):
+    """Messages from one backend share a pooled keep-alive connection."""
+    dispatcher = NotificationDispatcher(slack_url=webhook_url)
+    for i in range(5):
+        dispatcher.submit("Repository Updated", {"Repository": f"repo{i}"}, "success")
+    dispatcher.close()
+    assert len(WebhookStub.received) == 5
+    assert len(WebhookStub.connections) == 1
+
+def test_digest_mode_coalesces_events(webhook_url):
+    """Digest mode sends one summary instead of a message per repository."""
+    dispatcher = NotificationDispatcher(slack_url=webhook_url, mode="digest")
+    for i in range(300):
+        dispatcher.submit("Repository Created", {"Repository": f"repo{i}"}, "success")
+    dispatcher.submit("Error Occurred", {"Repository": "broken", "Error": "boom"}, "error")
+    dispatcher.close()
+    assert len(WebhookStub.received) == 1
+    texts = [a["text"] for a in WebhookStub.received[0]["attachments"]]
+    assert texts[0].startswith("*Repository Created*: 300")
+    assert "… and 200 more" in texts[0]
+    assert "broken: boom" in texts[-1]
+
+def test_discord_digest_respects_limits():
+    """Large digests are split to stay within Discord's message limits."""
+    from ghrm.notifications.digest import (
+        DigestCollector, build_discord_digest,
+        DISCORD_EMBEDS_PER_MESSAGE, DISCORD_FIELDS_PER_EMBED,
+        DISCORD_FIELD_VALUE_LIMIT, DISCORD_MESSAGE_CHAR_LIMIT,
+    )
+    collector = DigestCollector()
+    for action in range(15):
+        for i in range(100):
+            collector.add(f"Action {action}", {"Repository": f"repository-with-a-long-name-{i:05d}"})
+    messages = build_discord_digest(collector.drain())
+    assert len(messages) > 1
+    for message in messages:
+        assert len(message["embeds"]) <= DISCORD_EMBEDS_PER_MESSAGE
+        size = 0
+        for embed in message["embeds"]:
+            assert len(embed["fields"]) <= DISCORD_FIELDS_PER_EMBED
+            assert all(len(field["value"]) <= DISCORD_FIELD_VALUE_LIMIT for field in embed["fields"])
+            size += len(embed["title"]) + sum(len(f["name"]) + len(f["value"]) for f in embed["fields"])
+        assert size <= DISCORD_MESSAGE_CHAR_LIMIT
+
+def test_digest_window_sends_without_a_flush(webhook_url):
+    """With a window, a quiet long-running process still sends what it collected."""
+    dispatcher = NotificationDispatcher(slack_url=webhook_url, mode="digest", window=0.1)
+    dispatcher.submit("Repository Created", {"Repository": "api"}, "success")
+    deadline = time.monotonic() + 5
+    while not WebhookStub.received and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(WebhookStub.received) == 1
+    assert WebhookStub.received[0]["attachments"][0]["text"].startswith("*Repository Created*: 1")
+    dispatcher.close()
+    assert len(WebhookStub.received) == 1
+
+def test_closed_dispatchers_are_released(webhook_url):
+    dispatcher = NotificationDispatcher(slack_url=webhook_url)
+    dispatcher.close()
+    released = weakref.ref(dispatcher)
+    del dispatcher
+    gc.collect()
+    assert released() is None
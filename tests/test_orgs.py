@@ -0,0 +1,92 @@
+"""Tests for running several organizations in parallel."""
+import os
+import sys
+import pytest
+from ghrm.orgs import OrgTarget, load_organizations, org_environment, org_path
+
+def test_load_organizations():
+    settings = {
+        "organizations": {
+            "acme": {"token_env": "ACME_TOKEN", "config": "acme/"},
+            "globex": {"config": "globex.yaml", "api_url": "https://ghe.globex.test/api/v3"},
+        }
+    }
+    assert load_organizations(settings, "config") == [
+        OrgTarget("acme", "ACME_TOKEN", os.path.join("config", "acme/"), None),
+        OrgTarget("globex", "GITHUB_TOKEN", os.path.join("config", "globex.yaml"), "https://ghe.globex.test/api/v3"),
+    ]
+    with pytest.raises(ValueError):
+        load_organizations({"organizations": {"acme": {"token_env": "ACME_TOKEN"}}})
+
+def test_org_settings_do_not_leak_between_organizations(monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "shared-token")
+    monkeypatch.setenv("GLOBEX_POOL", "globex-2,globex-3")
+    settings = {
+        "organizations": {
+            "acme": {"token_env": "ACME_TOKEN", "config": "acme/"},
+            "globex": {
+                "config": "globex.yaml",
+                "api_url": "https://ghe.globex.test/api/v3",
+                "token_pool_env": "GLOBEX_POOL",
+                "app_installation_id": 42,
+            },
+        }
+    }
+    acme, globex = load_organizations(settings)
+    monkeypatch.setenv("ACME_TOKEN", "acme-token")
+    assert org_environment(acme) == {
+        "GITHUB_ORG": "acme",
+        "GITHUB_TOKEN": "acme-token",
+        "GITHUB_TOKEN_POOL": None,
+        "GITHUB_APP_INSTALLATION_ID": None,
+        "GITHUB_GRAPHQL_URL": None,
+    }
+    assert org_environment(globex) == {
+        "GITHUB_ORG": "globex",
+        "GITHUB_TOKEN": "shared-token",
+        "GITHUB_TOKEN_POOL": "globex-2,globex-3",
+        "GITHUB_APP_INSTALLATION_ID": "42",
+        "GITHUB_API_URL": "https://ghe.globex.test/api/v3",
+        # Derived from GITHUB_API_URL
+        "GITHUB_GRAPHQL_URL": None,
+    }
+
+def test_org_path():
+    assert org_path(".ghrm-state.json", "acme") == ".ghrm-state.acme.json"
+    assert org_path("out/metrics.prom", "acme") == os.path.join("out", "metrics.acme.prom")
+
+def test_organizations_run_in_parallel_processes(tmp_path, monkeypatch, capsys):
+    """Each organization gets its own process, token and state file; the summary merges them."""
+    fake_github = pytest.importorskip("benchmarks.fake_github")
+    from ghrm.cli import run_cli
+
+    with fake_github.FakeGitHub(org="acme") as acme, fake_github.FakeGitHub(org="globex") as globex:
+        globex.add_repo("billing", has_wiki=False)
+        (tmp_path / "acme.yaml").write_text("repositories:\n  api:\n    description: API\n  web:\n    description: Web\n")
+        (tmp_path / "globex.yaml").write_text("repositories:\n  billing:\n    has_wiki: true\n")
+        (tmp_path / "orgs.yaml").write_text(
+            "organizations:\n"
+            f"  acme:\n    token_env: ACME_TOKEN\n    config: acme.yaml\n    api_url: {acme.url}\n"
+            f"  globex:\n    token_env: GLOBEX_TOKEN\n    config: globex.yaml\n    api_url: {globex.url}\n"
+        )
+        monkeypatch.setenv("ACME_TOKEN", "acme-token")
+        monkeypatch.setenv("GLOBEX_TOKEN", "globex-token")
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+        monkeypatch.delenv("GITHUB_ORG", raising=False)
+        monkeypatch.setattr(sys, "argv", [
+            "ghrm", "create",
+            "--config", str(tmp_path / "orgs.yaml"),
+            "--state-file", str(tmp_path / "state.json"),
+            "--journal", str(tmp_path / "journal.ndjson"),
+        ])
+        run_cli()
+
+        assert set(acme.repos) == {"api", "web"}
+        assert globex.repos["billing"]["has_wiki"] is True
+
+    output = capsys.readouterr().out
+    assert "Organizations summary" in output
+    assert "2 organizations: created 2, updated 1" in output
+    assert (tmp_path / "state.acme.json").exists()
+    assert (tmp_path / "state.globex.json").exists()
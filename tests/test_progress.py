@@ -0,0 +1,75 @@
+"""Tests for the per-repository output modes."""
+import io
+import json
+import sys
+from ghrm.progress import Reporter, default_output, NDJSON, PROGRESS, TEXT
+
+CONFIG = "repositories:\n  api:\n    description: API\n  web:\n    description: Web\n  docs:\n    description: Docs\n"
+
+def run_create(monkeypatch, tmp_path, *options):
+    from ghrm.cli import run_cli
+
+    (tmp_path / "repos.yaml").write_text(CONFIG)
+    monkeypatch.setattr(sys, "argv", [
+        "ghrm", "create",
+        "--config", str(tmp_path / "repos.yaml"),
+        "--state-file", str(tmp_path / "state.json"),
+        "--journal", str(tmp_path / "journal.ndjson"),
+        "--no-cache",
+        *options,
+    ])
+    run_cli()
+
+def test_ndjson_streams_one_record_per_repository(fake_api, tmp_path, monkeypatch, capsys):
+    """stdout carries only the records; lookups and the summary go elsewhere."""
+    fake_api.add_repo("web", description="Old")
+    fake_api.add_repo("docs", description="Docs")
+    run_create(monkeypatch, tmp_path, "--output", "ndjson", "--concurrency", "2")
+
+    captured = capsys.readouterr()
+    records = [json.loads(line) for line in captured.out.splitlines()]
+    assert records == [
+        {"action": "create", "repository": "api", "outcome": "created"},
+        {"action": "create", "repository": "web", "outcome": "updated"},
+        {"action": "create", "repository": "docs", "outcome": "unchanged"},
+    ]
+    assert "3 repositories in" in captured.err
+    assert "created 1, updated 1, unchanged 1" in captured.err
+
+def test_quiet_prints_only_the_summary(fake_api, tmp_path, monkeypatch, capsys):
+    run_create(monkeypatch, tmp_path, "--quiet")
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    assert lines[0].startswith("3 repositories in")
+    assert lines[0].endswith(": created 3")
+
+def test_text_prints_a_line_per_repository_and_a_summary_table(fake_api, tmp_path, monkeypatch, capsys):
+    run_create(monkeypatch, tmp_path, "--output", "text")
+
+    output = capsys.readouterr().out
+    assert output.count("GitHub repository created:") == 3
+    assert "Create summary" in output
+    # No panel per repository
+    assert "GitHub Manager" not in output
+
+def test_reporter_progress_counts_and_errors(capsys):
+    clock = iter(range(100)).__next__
+    reporter = Reporter("create", output=PROGRESS, clock=clock)
+    with reporter.track(total=2):
+        print("lookup chatter")
+        reporter.result("api", "created")
+        reporter.result("web", "failed", error="Bad credentials")
+    captured = capsys.readouterr()
+    assert "lookup chatter" not in captured.out
+    assert "Error processing web: Bad credentials" in captured.err
+    assert reporter.format_counts() == "created 1, failed 1"
+
+def test_default_output():
+    class Terminal(io.StringIO):
+        def isatty(self):
+            return True
+
+    assert default_output(Terminal()) == PROGRESS
+    assert default_output(io.StringIO()) == TEXT
+    assert Reporter("create", output=NDJSON).verbose is False
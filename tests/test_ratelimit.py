@@ -0,0 +1,67 @@
+"""Tests for the rate-limit aware request scheduler."""
+from ghrm.ratelimit import RateLimitScheduler
+
+class FakeClock:
+    """Clock whose sleep() only advances time."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def scheduler(**kwargs):
+    clock = FakeClock()
+    return RateLimitScheduler(clock=clock, sleep=clock.sleep, **kwargs), clock
+
+def budget(remaining, limit=5000, reset_in=600, now=1_000_000):
+    return {
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Reset": str(int(now + reset_in)),
+    }
+
+def test_writes_are_paced_after_the_burst():
+    """Writes beyond the burst are spread at the configured rate; reads are not."""
+    limiter, clock = scheduler(writes_per_minute=60, write_burst=2)
+    for _ in range(5):
+        limiter.before_request("GET")
+    assert clock.now == 1_000_000.0
+    for _ in range(4):
+        limiter.before_request("PATCH")
+    assert clock.now == 1_000_002.0
+
+def test_exhausted_budget_waits_for_reset():
+    """With no budget left requests wait for the reset instead of failing."""
+    limiter, clock = scheduler()
+    limiter.after_response("GET", 200, budget(0, reset_in=120))
+    limiter.before_request("GET")
+    assert clock.now == 1_000_120.0
+
+def test_retry_after_is_honoured():
+    """A 429 with Retry-After asks for a retry and holds other callers."""
+    limiter, clock = scheduler()
+    delay = limiter.after_response("POST", 429, {"Retry-After": "30"})
+    assert 30 <= delay <= 31
+    limiter.before_request("GET")
+    assert clock.now >= 1_000_030.0
+
+def test_permission_errors_are_not_retried():
+    """A 403 that is not about rate limits is returned to the caller."""
+    limiter, _ = scheduler()
+    assert limiter.after_response("DELETE", 403, budget(4000), "Must have admin rights") is None
+    assert limiter.after_response("POST", 403, budget(4000), "You have exceeded a secondary rate limit") >= 60
+
+def test_concurrency_follows_budget():
+    """Fewer workers are allowed as the remaining budget shrinks."""
+    limiter, _ = scheduler()
+    assert limiter.concurrency_limit(16) == 16
+    limiter.after_response("GET", 200, budget(2500))
+    assert limiter.concurrency_limit(16) == 16
+    limiter.after_response("GET", 200, budget(625))
+    assert limiter.concurrency_limit(16) == 8
+    limiter.after_response("GET", 200, budget(10))
+    assert limiter.concurrency_limit(16) == 1
@@ -0,0 +1,109 @@
+"""Tests for the GitHub webhook receiver."""
+import http.client
+import json
+import urllib.parse
+import urllib.error
+import urllib.request
+import pytest
+from ghrm.applied import AppliedState
+from ghrm.receiver import (
+    WebhookReceiver,
+    apply_events,
+    parse_event,
+    sign,
+    verify_signature
+)
+
+SECRET = "It's a Secret to Everybody"
+
+# Trimmed from payloads recorded from GitHub
+CREATED = {
+    "action": "created",
+    "repository": {"id": 1, "name": "api", "full_name": "acme/api", "private": True, "owner": {"login": "acme"}},
+    "organization": {"login": "acme"},
+}
+RENAMED = {
+    "action": "renamed",
+    "changes": {"repository": {"name": {"from": "web-old"}}},
+    "repository": {"id": 2, "name": "web", "full_name": "acme/web", "private": False, "owner": {"login": "acme"}},
+    "organization": {"login": "acme"},
+}
+DELETED = {
+    "action": "deleted",
+    "repository": {"id": 3, "name": "legacy", "full_name": "acme/legacy", "owner": {"login": "acme"}},
+    "organization": {"login": "acme"},
+}
+
+def post(url, payload, event="repository", secret=SECRET):
+    body = json.dumps(payload).encode()
+    request = urllib.request.Request(url, data=body, method="POST", headers={
+        "Content-Type": "application/json",
+        "X-GitHub-Event": event,
+        "X-Hub-Signature-256": sign(secret, body),
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def test_verify_signature():
+    # Example from GitHub's webhook documentation
+    signature = "sha256=757107ea0eb2509fc211221cce984b8a37570b6d7586c22c46f4379c8b043e17"
+    assert verify_signature(SECRET, b"Hello, World!", signature)
+    assert not verify_signature(SECRET, b"Hello, World?", signature)
+    assert not verify_signature(SECRET, b"Hello, World!", None)
+
+def test_parse_event():
+    assert parse_event("repository", RENAMED, "ACME") == ("renamed", "web", "web-old", RENAMED["repository"])
+    assert parse_event("repository", CREATED, "other-org") is None
+    assert parse_event("push", CREATED, "acme") is None
+
+def test_receiver_queues_signed_repository_events():
+    with WebhookReceiver(SECRET, org="acme") as receiver:
+        assert post(receiver.url, {"zen": "Keep it logically awesome."}, event="ping") == 200
+        assert post(receiver.url, CREATED) == 202
+        assert post(receiver.url, DELETED, secret="wrong") == 401
+        assert post(receiver.url, {"action": "opened"}, event="issues") == 202
+        assert receiver.queue.pending.is_set()
+        events = receiver.queue.drain()
+    assert [(event.action, event.name) for event in events] == [("created", "api")]
+    assert not receiver.queue.pending.is_set()
+
+def test_receiver_rejects_a_negative_content_length():
+    with WebhookReceiver(SECRET, org="acme") as receiver:
+        url = urllib.parse.urlsplit(receiver.url)
+        connection = http.client.HTTPConnection(url.hostname, url.port, timeout=5)
+        connection.putrequest("POST", url.path)
+        connection.putheader("Content-Length", "-1")
+        connection.endheaders()
+        try:
+            assert connection.getresponse().status == 400
+        finally:
+            connection.close()
+
+def test_receiver_requires_a_secret():
+    with pytest.raises(ValueError):
+        WebhookReceiver("")
+
+def test_apply_events_updates_inventory_and_state(tmp_path):
+    state = AppliedState(str(tmp_path / "state.json"), "acme")
+    for name in ("api", "web-old", "legacy", "docs"):
+        state.record((name, None, {}), "unchanged")
+    inventory = {"web-old": "stale", "legacy": "stale", "docs": "kept"}
+    events = [parse_event("repository", payload, "acme") for payload in (CREATED, RENAMED, DELETED)]
+
+    affected = apply_events(events, inventory, state, lambda data: data["full_name"])
+
+    assert affected == ["api", "web-old", "web", "legacy"]
+    assert inventory == {"api": "acme/api", "web": "acme/web", "docs": "kept"}
+    # Only the untouched entry is still skipped by the next pass
+    assert list(state.entries) == ["docs"]
+
+def test_payload_repositories_need_no_request(fake_api, tmp_path):
+    from ghrm.repository import build_repository
+    state = AppliedState(str(tmp_path / "state.json"), fake_api.org)
+    inventory = {}
+    apply_events([parse_event("repository", CREATED)], inventory, state, build_repository)
+    assert inventory["api"].name == "api" and inventory["api"].private
+    assert fake_api.log.routes() == []
@@ -0,0 +1,219 @@
+"""Tests for serve mode and the config watchers."""
+import os
+import signal
+import sys
+import threading
+import time
+import pytest
+from ghrm import serve as serve_module
+from ghrm.serve import serve
+from ghrm.watch import InotifyWatcher, PollingWatcher, watch_root
+
+class ScriptedWatcher:
+    """Reports the scripted changes, one per wait() call, then sets stop."""
+    kind = "scripted"
+
+    def __init__(self, changes, stop, clock):
+        self.changes = list(changes)
+        self.stop = stop
+        self.clock = clock
+        self.closed = False
+
+    def wait(self, timeout):
+        self.clock.now += timeout
+        if not self.changes:
+            self.stop.set()
+            return False
+        return self.changes.pop(0)
+
+    def close(self):
+        self.closed = True
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+def test_watch_root():
+    assert watch_root(os.path.join("config", "repos.yaml")) == ("config", False)
+    assert watch_root(os.path.join("config", "**", "*.yaml")) == ("config", True)
+    assert watch_root(os.path.join("config", "team-*.yaml")) == ("config", False)
+
+def test_polling_watcher_sees_changes(tmp_path):
+    config = tmp_path / "repos.yaml"
+    write(config, "repositories: {}\n")
+    watcher = PollingWatcher(str(tmp_path), interval=0.01)
+    assert not watcher.wait(0.05)
+    write(config, "repositories:\n  api: {}\n")
+    assert watcher.wait(1.0)
+    write(tmp_path / "more.yml", "repositories: {}\n")
+    assert watcher.wait(1.0)
+    # Other files in the directory are not config files
+    write(tmp_path / "notes.txt", "ignored")
+    assert not watcher.wait(0.05)
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_watcher_sees_changes(tmp_path):
+    config = tmp_path / "repos.yaml"
+    write(config, "repositories: {}\n")
+    watcher = InotifyWatcher(str(tmp_path))
+    try:
+        write(tmp_path / "notes.txt", "ignored")
+        assert not watcher.wait(0.1)
+        write(config, "repositories:\n  api: {}\n")
+        assert watcher.wait(1.0)
+    finally:
+        watcher.close()
+
+def test_serve_reconciles_changes_and_resyncs(monkeypatch):
+    """One pass at start, one per change (debounced) and a full pass per resync interval."""
+    monkeypatch.setattr(serve_module, "DEBOUNCE_SECONDS", 0.0)
+    stop = threading.Event()
+    clock = Clock()
+    # change, debounce (a second write), settle, then quiet until the resync
+    watcher = ScriptedWatcher([True, True, False] + [False] * 10, stop, clock)
+    passes = []
+    serve("config", passes.append, resync_interval=5, watcher=watcher, stop=stop, clock=clock)
+    assert passes == [False, False, True, True]
+    assert watcher.closed
+
+def test_serve_survives_failed_passes():
+    stop = threading.Event()
+    clock = Clock()
+    calls = []
+
+    def reconcile(full):
+        calls.append(full)
+        raise RuntimeError("GitHub is down")
+
+    watcher = ScriptedWatcher([True, False], stop, clock)
+    serve("config", reconcile, resync_interval=0, watcher=watcher, stop=stop, clock=clock)
+    assert calls == [False, False]
+
+def test_serve_applies_only_changed_entries(fake_api, tmp_path, monkeypatch):
+    """End to end: one inventory listing, then only the edited entry is sent; SIGTERM stops the loop."""
+    from ghrm.cli import run_cli
+
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    write(config_dir / "repos.yaml", "repositories:\n  api:\n    description: API\n")
+
+    def edit_and_stop():
+        deadline = time.monotonic() + 10
+        while "api" not in fake_api.repos and time.monotonic() < deadline:
+            time.sleep(0.02)
+        write(
+            config_dir / "repos.yaml",
+            "repositories:\n  api:\n    description: API\n  web:\n    description: Web\n"
+        )
+        while "web" not in fake_api.repos and time.monotonic() < deadline:
+            time.sleep(0.02)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    monkeypatch.setattr(sys, "argv", [
+        "ghrm", "serve",
+        "--watch", str(config_dir),
+        "--state-file", str(tmp_path / "state.json"),
+        "--poll-interval", "0.05",
+        "--resync-interval", "0",
+    ])
+    thread = threading.Thread(target=edit_and_stop)
+    thread.start()
+    run_cli()
+    thread.join()
+
+    assert set(fake_api.repos) == {"api", "web"}
+    routes = fake_api.log.routes()
+    assert routes.count("GET /orgs/{org}/repos") == 1
+    assert routes.count("POST /orgs/{org}/repos") == 2
+    # Each new repository is looked up once; the unchanged entry is not sent again
+    assert routes.count("GET /repos/{org}/{repo}") == 2
+
+def test_serve_reverts_a_reverted_config_change(fake_api, tmp_path, monkeypatch):
+    """The inventory follows the edits serve applies, so undoing a change in the config is applied too."""
+    from ghrm.cli import run_cli
+
+    fake_api.add_repo("api", description="Old")
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    write(config_dir / "repos.yaml", "repositories:\n  api:\n    description: New\n")
+    seen = []
+
+    def revert_and_stop():
+        deadline = time.monotonic() + 10
+        while fake_api.repos["api"]["description"] != "New" and time.monotonic() < deadline:
+            time.sleep(0.02)
+        seen.append(fake_api.repos["api"]["description"])
+        write(config_dir / "repos.yaml", "repositories:\n  api:\n    description: Old\n")
+        while fake_api.repos["api"]["description"] != "Old" and time.monotonic() < deadline:
+            time.sleep(0.02)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    monkeypatch.setattr(sys, "argv", [
+        "ghrm", "serve",
+        "--watch", str(config_dir),
+        "--state-file", str(tmp_path / "state.json"),
+        "--poll-interval", "0.05",
+        "--resync-interval", "0",
+    ])
+    thread = threading.Thread(target=revert_and_stop)
+    thread.start()
+    run_cli()
+    thread.join()
+
+    assert seen == ["New"]
+    assert fake_api.repos["api"]["description"] == "Old"
+    routes = fake_api.log.routes()
+    assert routes.count("GET /orgs/{org}/repos") == 1
+    assert routes.count("PATCH /repos/{org}/{repo}") == 2
+
+def test_serve_passes_the_notify_window(fake_api, tmp_path, monkeypatch):
+    from ghrm.cli import run_cli
+    from ghrm.notifications import dispatcher
+
+    created = []
+
+    class RecordingDispatcher(dispatcher.NotificationDispatcher):
+        def __init__(self, *args, **kwargs):
+            created.append(kwargs)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(dispatcher, "NotificationDispatcher", RecordingDispatcher)
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    write(config_dir / "repos.yaml", "repositories:\n  api:\n    description: API\n")
+
+    def stop():
+        deadline = time.monotonic() + 10
+        while "api" not in fake_api.repos and time.monotonic() < deadline:
+            time.sleep(0.02)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    monkeypatch.setattr(sys, "argv", [
+        "ghrm", "serve",
+        "--watch", str(config_dir),
+        "--state-file", str(tmp_path / "state.json"),
+        "--poll-interval", "0.05",
+        "--resync-interval", "0",
+        "--notify", "digest",
+        "--notify-window", "300",
+    ])
+    thread = threading.Thread(target=stop)
+    thread.start()
+    run_cli()
+    thread.join()
+
+    assert created == [{"mode": "digest", "window": 300.0}]
+
+def test_notify_window_needs_a_digest(monkeypatch, tmp_path):
+    from ghrm.cli import run_cli
+
+    monkeypatch.setattr(sys, "argv", ["ghrm", "serve", "--watch", str(tmp_path), "--notify-window", "60"])
+    with pytest.raises(SystemExit):
+        run_cli()
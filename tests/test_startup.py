@@ -0,0 +1,62 @@
+"""Regression tests for CLI start-up cost."""
+import os
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("github", "rich", "requests", "yaml")
+
+CHECK_IMPORTS = """
+import sys
+from ghrm.cli import run_cli
+sys.argv = ["ghrm"] + sys.argv[1:]
+try:
+    run_cli()
+except SystemExit:
+    pass
+print("LOADED=" + ",".join(m for m in {modules!r} if m in sys.modules))
+"""
+
+def run_ghrm(*args):
+    env = {key: value for key, value in os.environ.items() if not key.startswith("GITHUB_")}
+    # Any attempt to reach the network fails fast
+    env.update({"HTTPS_PROXY": "http://127.0.0.1:9", "HTTP_PROXY": "http://127.0.0.1:9"})
+    code = CHECK_IMPORTS.format(modules=HEAVY_MODULES)
+    return subprocess.run(
+        [sys.executable, "-c", code, *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=30
+    )
+
+def loaded_modules(output):
+    line = [line for line in output.splitlines() if line.startswith("LOADED=")][-1]
+    return [module for module in line[len("LOADED="):].split(",") if module]
+
+def test_version_needs_no_heavy_imports():
+    """`ghrm --version` works without credentials and loads no heavy dependency."""
+    result = run_ghrm("--version")
+    assert result.returncode == 0, result.stderr
+    assert "GitHub Manager CLI Version" in result.stdout
+    assert loaded_modules(result.stdout) == []
+
+def test_help_needs_no_heavy_imports():
+    """`ghrm --help` loads no heavy dependency."""
+    result = run_ghrm("--help")
+    assert result.returncode == 0, result.stderr
+    assert "usage:" in result.stdout
+    assert loaded_modules(result.stdout) == []
+
+def test_version_is_fast():
+    """`python -m ghrm --version` stays well under interactive latency."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-m", "ghrm", "--version"],
+        capture_output=True,
+        text=True,
+        timeout=30
+    )
+    elapsed = time.perf_counter() - started
+    assert result.returncode == 0, result.stderr
+    assert elapsed < 1.5
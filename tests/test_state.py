@@ -0,0 +1,69 @@
+"""Tests for comparing desired and current repository settings."""
+from types import SimpleNamespace
+from ghrm.state import RepoState, diff_repo_config, unread_settings
+
+def current_repo(**overrides):
+    settings = {
+        "name": "repo1",
+        "description": "This is an example repository",
+        "homepage": None,
+        "private": True,
+        "has_issues": True,
+        "allow_rebase_merge": False,
+    }
+    settings.update(overrides)
+    return SimpleNamespace(**settings)
+
+def test_unchanged_repository_has_no_changes():
+    """Matching settings produce an empty payload."""
+    repo_config = {
+        "name": "repo1",
+        "description": "This is an example repository",
+        "homepage": "",
+        "private": True,
+        "has_issues": True,
+        "allow_rebase_merge": False,
+        "auto_init": True,
+        "gitignore_template": "Python",
+    }
+    assert diff_repo_config(current_repo(), repo_config) == {}
+
+def test_only_changed_settings_are_returned():
+    """Changed settings are returned, matching ones are dropped."""
+    repo_config = {"name": "repo1", "private": False, "has_issues": True}
+    assert diff_repo_config(current_repo(), repo_config) == {"private": False}
+
+def test_unset_and_unknown_settings():
+    """None means unmanaged, attributes the repository lacks are always sent."""
+    repo_config = {"description": None, "team_id": 123456}
+    assert diff_repo_config(current_repo(), repo_config) == {"team_id": 123456}
+
+def test_repo_state_keeps_only_managed_settings():
+    """Listing fields ghrm does not manage are dropped; settings the listing lacks stay unset."""
+    state = RepoState.from_rest({"name": "repo1", "private": True, "has_wiki": False, "owner": {"login": "org"}})
+    assert not hasattr(state, "__dict__")
+    assert not hasattr(state, "owner")
+    repo_config = {"name": "repo1", "private": True, "has_wiki": True, "allow_auto_merge": True, "team_id": 1}
+    assert diff_repo_config(state, repo_config) == {"has_wiki": True, "allow_auto_merge": True, "team_id": 1}
+    # Only settings GitHub reports are worth reading the repository for
+    assert unread_settings(state, repo_config) == ["allow_auto_merge"]
+
+def test_merge_commit_messages_are_managed_and_downloads_are_not_edited():
+    """Merge commit title and message settings are read and compared; has_downloads is only sent on creation."""
+    state = RepoState.from_rest({
+        "name": "repo1",
+        "has_downloads": True,
+        "squash_merge_commit_title": "COMMIT_OR_PR_TITLE",
+        "merge_commit_message": "PR_TITLE",
+    })
+    repo_config = {
+        "has_downloads": False,
+        "squash_merge_commit_title": "PR_TITLE",
+        "merge_commit_message": "PR_TITLE",
+        "use_squash_pr_title_as_default": True,
+    }
+    assert diff_repo_config(state, repo_config) == {
+        "squash_merge_commit_title": "PR_TITLE",
+        "use_squash_pr_title_as_default": True,
+    }
+    assert unread_settings(state, repo_config) == ["use_squash_pr_title_as_default"]
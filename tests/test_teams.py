@@ -0,0 +1,90 @@
+"""Tests for team access synchronisation."""
+import sys
+import pytest
+from ghrm.config import ConfigSource
+from ghrm.teams import diff_team_access, load_team_access, sync_team_access, team_permission
+
+def test_diff_grants_missing_and_updates_changed_access():
+    current = {"api": ("API", "pull"), "web": ("web", "push"), "legacy": ("legacy", "admin")}
+    desired = {"api": "maintain", "web": "push", "docs": "triage"}
+    changes = diff_team_access("platform", current, desired)
+    assert [(c.action, c.repository, c.permission, c.current) for c in changes] == [
+        ("update", "API", "maintain", "pull"),
+        ("grant", "docs", "triage", None),
+    ]
+    revokes = [c for c in diff_team_access("platform", current, desired, prune=True) if c.action == "revoke"]
+    assert [(c.repository, c.current) for c in revokes] == [("legacy", "admin")]
+
+def test_team_permission_reads_the_role():
+    assert team_permission({"role_name": "write"}) == "push"
+    assert team_permission({"role_name": "security-auditor"}) == "security-auditor"
+    permissions = {"admin": False, "maintain": False, "push": True, "triage": True, "pull": True}
+    assert team_permission({"permissions": permissions}) == "push"
+
+def test_shipped_config_loads():
+    access = load_team_access(ConfigSource("config/repositories.yaml", use_cache=False).settings)
+    assert access == {"platform": {"repo1": "admin", "repo2": "push"}, "docs-writers": {"repo3": "triage"}}
+    with pytest.raises(ValueError, match="has no permission"):
+        load_team_access({"team_access": {"platform": {"api": None}}})
+
+def test_sync_lists_each_team_once_and_sends_only_the_differences(fake_api):
+    for i in range(250):
+        fake_api.add_repo(f"repo-{i}")
+    fake_api.add_team("platform", {f"repo-{i}": "push" for i in range(250)})
+    fake_api.add_team("docs", {"repo-1": "pull", "repo-2": "admin"})
+    access = {
+        "platform": {**{f"repo-{i}": "push" for i in range(249)}, "repo-0": "maintain"},
+        "docs": {"repo-1": "pull", "repo-3": "triage", "missing": "pull"},
+        "ghosts": {"repo-1": "pull"},
+    }
+
+    results = list(sync_team_access(access, prune=True, concurrency=4))
+
+    errors = sorted(
+        (result.team, result.change.repository if result.change else None) for result in results
+        if result.error
+    )
+    assert errors == [("docs", "missing"), ("ghosts", None)]
+    applied = sorted(
+        (result.team, result.change.action, result.change.repository) for result in results
+        if result.error is None
+    )
+    assert applied == [
+        ("docs", "grant", "repo-3"),
+        ("docs", "revoke", "repo-2"),
+        ("platform", "revoke", "repo-249"),
+        ("platform", "update", "repo-0"),
+    ]
+    routes = fake_api.log.routes()
+    # Three pages for platform, one each for docs and ghosts
+    assert routes.count("GET /orgs/{org}/teams/{team}/repos") == 5
+    assert len(routes) == 5 + 5
+    assert fake_api.teams["platform"]["repo-0"] == "maintain"
+    assert fake_api.teams["docs"] == {"repo-1": "pull", "repo-3": "triage"}
+
+def test_teams_sync_command(fake_api, tmp_path, monkeypatch, capsys):
+    from ghrm.cli import run_cli
+
+    fake_api.add_repo("api")
+    fake_api.add_repo("web")
+    fake_api.add_team("platform", {"api": "pull"})
+    config = tmp_path / "repos.yaml"
+    config.write_text(
+        "repositories:\n  api:\n    description: API\n"
+        "team_access:\n  platform:\n    api: write\n    web: maintain\n"
+    )
+    monkeypatch.setattr(sys, "argv", [
+        "ghrm", "teams", "sync",
+        "--config", str(config),
+        "--state-file", str(tmp_path / "state.json"),
+        "--no-cache",
+        "--output", "ndjson",
+    ])
+    run_cli()
+
+    records = sorted(capsys.readouterr().out.splitlines())
+    assert records == [
+        '{"action":"teams","repository":"api","outcome":"update","detail":"platform pull -> push"}',
+        '{"action":"teams","repository":"web","outcome":"grant","detail":"grant platform maintain"}',
+    ]
+    assert fake_api.teams["platform"] == {"api": "push", "web": "maintain"}
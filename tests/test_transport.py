@@ -0,0 +1,60 @@
+"""Tests for the shared HTTP transport settings and retries."""
+import pytest
+from github import GithubException
+from ghrm import metrics, repository, transport
+
+def test_http_settings_are_layered(monkeypatch):
+    monkeypatch.delenv("GHRM_HTTP_RETRIES", raising=False)
+    assert transport.load_http_settings()["retries"] == 3
+    assert transport.load_http_settings({"retries": "5"})["retries"] == 5
+
+    monkeypatch.setenv("GHRM_HTTP_RETRIES", "7")
+    assert transport.load_http_settings({"retries": 5})["retries"] == 7
+
+    with pytest.raises(ValueError, match="Unknown HTTP setting `retry`"):
+        transport.load_http_settings({"retry": 5})
+
+def test_pool_is_sized_for_the_workers(monkeypatch):
+    monkeypatch.setattr(transport, "http_settings", None)
+    monkeypatch.delenv("GHRM_HTTP_POOL_SIZE", raising=False)
+    assert transport.configure(32)["pool_size"] == 34
+    assert transport.configure(1)["pool_size"] == 10
+    assert transport.configure(32, {"pool_size": 8})["pool_size"] == 8
+
+def retries(service, method, endpoint):
+    return sum(
+        entry["retries"] for entry in metrics.registry.snapshot()["endpoints"]
+        if (entry["service"], entry["method"], entry["endpoint"]) == (service, method, endpoint)
+    )
+
+def test_transient_failures_of_reads_are_retried(fake_api):
+    fake_api.add_repo("api", description="API")
+    before = retries("github", "GET", "/repos/{owner}/{repo}")
+    fake_api.inject_faults("GET", 502)
+
+    assert repository.get_repo("api").description == "API"
+    assert [(method, route, status) for method, route, status, _ in fake_api.log.entries] == [
+        ("GET", "/repos/{org}/{repo}", 502),
+        ("GET", "/repos/{org}/{repo}", 200),
+    ]
+    assert retries("github", "GET", "/repos/{owner}/{repo}") == before + 1
+
+def test_creations_are_not_repeated(fake_api):
+    fake_api.inject_faults("POST", 502)
+
+    with pytest.raises(GithubException) as raised:
+        repository.create_repository("api", "API")
+    assert raised.value.status == 502
+    assert fake_api.log.routes().count("POST /orgs/{org}/repos") == 1
+    assert "api" not in fake_api.repos
+
+def test_edits_are_not_repeated(fake_api):
+    """An edit may rename the repository, so a failed one is not sent again."""
+    fake_api.add_repo("api", description="Old")
+    inventory = repository.load_inventory()
+    fake_api.inject_faults("PATCH", 502)
+
+    with pytest.raises(GithubException) as raised:
+        repository.create_repository("api", "API", inventory=inventory)
+    assert raised.value.status == 502
+    assert fake_api.log.routes().count("PATCH /repos/{org}/{repo}") == 1